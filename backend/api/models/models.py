@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, Float, Text, Index
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, Boolean, Float, Text, Index
 from sqlalchemy.sql import func
 from backend.core.database import Base
 import enum
@@ -12,6 +12,13 @@ class ClientStatus(str, enum.Enum):
     SCHEDULED_FOR_DELETION = "scheduled_for_deletion"
 
 
+class JobStatus(str, enum.Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
 class PlanType(str, enum.Enum):
     BASIC = "basic"
     BUSINESS = "business"
@@ -80,8 +87,27 @@ class User(Base):
     created_at = Column(DateTime, server_default=func.now())
 
 
+class RefreshToken(Base):
+    __tablename__ = "refresh_tokens"
+    __table_args__ = (
+        Index('idx_refresh_token_family', 'family_id', 'revoked_at'),
+    )
+    
+    jti = Column(String(32), primary_key=True)
+    family_id = Column(String(32), nullable=False)
+    user_id = Column(Integer, nullable=False, index=True)
+    issued_at = Column(DateTime, nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
+    revoked_at = Column(DateTime, nullable=True)
+    replaced_by = Column(String(32), nullable=True)
+
+
 class Backup(Base):
     __tablename__ = "backups"
+    __table_args__ = (
+        Index('idx_backup_client_created_id', 'client_name', 'created_at', 'id'),
+        Index('idx_backup_created_id', 'created_at', 'id'),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     client_id = Column(Integer, nullable=False, index=True)
@@ -89,11 +115,56 @@ class Backup(Base):
     backup_type = Column(String(50), nullable=False)
     filename = Column(String(255), nullable=False)
     size_mb = Column(Float, default=0)
+    size_bytes = Column(BigInteger, nullable=True)
+    checksum = Column(String(64), nullable=True)
+    format = Column(String(20), default="custom")
+    codec = Column(String(20), nullable=True)
+    encrypted = Column(Boolean, default=False)
     s3_key = Column(String(500), nullable=True)
     status = Column(String(50), default="pending")
     error_message = Column(Text, nullable=True)
     created_at = Column(DateTime, server_default=func.now())
     completed_at = Column(DateTime, nullable=True)
+    
+    verify_status = Column(String(20), nullable=True)
+    verified_at = Column(DateTime, nullable=True)
+    verify_seconds = Column(Float, nullable=True)
+    verify_mbps = Column(Float, nullable=True)
+    verify_error = Column(Text, nullable=True)
+
+
+class BackupChunk(Base):
+    __tablename__ = "backup_chunks"
+    
+    hash = Column(String(64), primary_key=True)
+    size = Column(Integer, nullable=False)
+    stored_size = Column(Integer, nullable=False)
+    refcount = Column(Integer, default=0, nullable=False)
+    created_at = Column(DateTime, server_default=func.now())
+    released_at = Column(DateTime, nullable=True)
+    
+    __table_args__ = (
+        Index('idx_chunk_refcount', 'refcount', 'released_at'),
+    )
+
+
+class BackupSlot(Base):
+    """One unit of backup concurrency, shared by every API process.
+
+    A running backup holds a slot in the "all" scope and one in its
+    database host's scope until it finishes or its lease lapses.
+    """
+    __tablename__ = "backup_slots"
+    __table_args__ = (
+        Index('idx_backup_slot_scope', 'scope', 'slot', unique=True),
+        Index('idx_backup_slot_client', 'client_id'),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    scope = Column(String(255), nullable=False)
+    slot = Column(Integer, nullable=False)
+    client_id = Column(Integer, nullable=True)
+    lease_until = Column(DateTime, nullable=True)
 
 
 class ActivityLog(Base):
@@ -106,3 +177,69 @@ class ActivityLog(Base):
     details = Column(Text, nullable=True)
     ip_address = Column(String(50), nullable=True)
     created_at = Column(DateTime, server_default=func.now())
+
+
+class ProvisioningMetric(Base):
+    __tablename__ = "provisioning_metrics"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    client_id = Column(Integer, nullable=False, index=True)
+    db_method = Column(String(20), nullable=False)
+    template_name = Column(String(255), nullable=True)
+    db_create_seconds = Column(Float, nullable=True)
+    time_to_login_seconds = Column(Float, nullable=True)
+    created_at = Column(DateTime, server_default=func.now())
+
+
+class StandbyDatabase(Base):
+    __tablename__ = "standby_databases"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    plan = Column(String(50), nullable=False)
+    db_name = Column(String(255), unique=True, nullable=False)
+    db_user = Column(String(255), nullable=False)
+    template_name = Column(String(255), nullable=True)
+    status = Column(String(20), default="ready", nullable=False)
+    client_id = Column(Integer, nullable=True)
+    created_at = Column(DateTime, server_default=func.now())
+    claimed_at = Column(DateTime, nullable=True)
+    
+    __table_args__ = (
+        Index('idx_standby_plan_status', 'plan', 'status'),
+    )
+
+
+class PortAllocation(Base):
+    __tablename__ = "port_allocations"
+    __table_args__ = (
+        Index('idx_port_allocation_status', 'status', 'port'),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    port = Column(Integer, unique=True, nullable=False)
+    client_name = Column(String(255), unique=True, nullable=True)
+    status = Column(String(50), default="allocated", nullable=False)
+    allocated_at = Column(DateTime, nullable=True)
+    released_at = Column(DateTime, nullable=True)
+
+
+class Job(Base):
+    __tablename__ = "jobs"
+    __table_args__ = (
+        Index('idx_job_status', 'status', 'id'),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    job_type = Column(String(100), nullable=False)
+    status = Column(String(50), default=JobStatus.QUEUED.value, nullable=False)
+    client_id = Column(Integer, nullable=True, index=True)
+    user_id = Column(Integer, nullable=True)
+    payload = Column(Text, default="{}")
+    result = Column(Text, nullable=True)
+    error_message = Column(Text, nullable=True)
+    attempts = Column(Integer, default=0)
+    progress_done = Column(Integer, default=0)
+    progress_total = Column(Integer, nullable=True)
+    created_at = Column(DateTime, server_default=func.now())
+    started_at = Column(DateTime, nullable=True)
+    completed_at = Column(DateTime, nullable=True)
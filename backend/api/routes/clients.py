@@ -1,26 +1,51 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from sqlalchemy import case, func, select
 from typing import List
 from datetime import datetime, timedelta
 import json
 import os
 
-from backend.core.database import get_db
-from backend.core.security import verify_password, create_access_token, create_refresh_token, decode_access_token, get_password_hash
-from backend.api.models.models import Client, User, ClientStatus, ActivityLog
+from backend.core.database import get_db, get_async_db, get_database_metrics, SessionLocal
+from backend.core.security import (
+    create_access_token, decode_access_token,
+    hash_password_async, verify_password_async, get_password_hasher, PasswordHasherBusy
+)
+from backend.api.models.models import Client, User, ClientStatus, ActivityLog, ProvisioningMetric
 from backend.api.schemas.schemas import (
     ClientCreate, ClientUpdate, ClientResponse, ClientDetailResponse,
     ClientStats, UserCreate, UserResponse, Token
 )
 from backend.api.services.provisioning import (
-    generate_secure_password, generate_db_name, generate_db_user, get_next_odoo_port,
-    get_plan_resources, create_client_directories, create_docker_compose, create_env_file,
-    create_nginx_config, start_client_stack, stop_client_stack, remove_client_stack,
-    reload_nginx, request_ssl_certificate, get_container_stats, get_disk_usage,
-    create_external_database, delete_external_database
+    generate_secure_password, generate_db_name, generate_db_user, get_plan_resources,
+    create_nginx_config, create_nginx_configs, start_client_stack, stop_client_stack,
+    remove_client_stack, reload_nginx, request_ssl_certificate, get_container_stats,
+    delete_external_database
+)
+from backend.api.services.backup_service import (
+    trigger_backup, BACKUP_FORMAT_CUSTOM, BACKUP_FORMAT_DIRECTORY, BACKUP_FORMAT_CHUNKED
+)
+from backend.api.services.stats_collector import get_stats_collector
+from backend.api.services.port_allocator import allocate_port, release_port
+from backend.api.services.nginx_reload import get_nginx_reloader
+from backend.api.services.external_db import get_admin_pool
+from backend.api.services.warm_pool import get_warm_pool
+from backend.api.services.backup_scheduler import get_backup_scheduler
+from backend.api.services.backup_retention import prune_backups
+from backend.api.services.backup_verify import get_backup_verifier
+from backend.api.services.backup_listing import list_backups, export_backups_ndjson, CursorError
+from backend.api.services.s3_transfer import get_transfer_metrics
+from backend.api.services.principal_cache import get_principal_cache, principal_claims
+from backend.api.services.refresh_tokens import get_refresh_token_store, RefreshTokenError
+from backend.api.services.job_queue import enqueue_job
+from backend.api.services.client_jobs import (
+    PROVISION_CLIENT, ACTIVATE_CLIENT, RESUME_CLIENT, CLEANUP_CLIENTS,
+    unpaid_expired, deletion_due, pending_cleanup_ids
 )
-from backend.api.services.backup_service import trigger_backup
 from backend.core.config import get_settings
 
 router = APIRouter()
@@ -28,22 +53,39 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 settings = get_settings()
 
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+def _token_payload(token: str) -> dict:
     payload = decode_access_token(token)
     if payload is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid authentication credentials",
         )
-    
-    user = db.query(User).filter(User.username == payload.get("sub")).first()
-    if user is None:
+    return payload
+
+
+def _authenticated(principal):
+    if principal is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found",
         )
     
-    return user
+    if not principal.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="User account is disabled"
+        )
+    
+    return principal
+
+
+def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+    return _authenticated(get_principal_cache().resolve(_token_payload(token), db))
+
+
+async def get_current_user_async(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)):
+    """get_current_user for async routes; a cache miss queries through the async engine"""
+    return _authenticated(await get_principal_cache().resolve_async(_token_payload(token), db))
 
 
 def log_activity(db: Session, user_id: int, client_id: int, action: str, details: str = None, ip: str = None):
@@ -58,11 +100,34 @@ def log_activity(db: Session, user_id: int, client_id: int, action: str, details
     db.commit()
 
 
+async def _password_operation(operation):
+    try:
+        return await operation
+    except PasswordHasherBusy:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many sign-in attempts in progress, try again shortly",
+            headers={"Retry-After": "1"}
+        )
+
+
+def _save_user(db: Session, user: User) -> User:
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+    return user
+
+
+# register and login are async so bcrypt waits on the hashing pool without
+# holding one of the threads every sync endpoint shares; their database work
+# still runs on that threadpool
 @router.post("/auth/register", response_model=UserResponse)
-def register(user: UserCreate, db: Session = Depends(get_db)):
-    existing_user = db.query(User).filter(
-        (User.email == user.email) | (User.username == user.username)
-    ).first()
+async def register(user: UserCreate, db: Session = Depends(get_db)):
+    existing_user = await run_in_threadpool(
+        lambda: db.query(User).filter(
+            (User.email == user.email) | (User.username == user.username)
+        ).first()
+    )
     
     if existing_user:
         raise HTTPException(
@@ -70,7 +135,7 @@ def register(user: UserCreate, db: Session = Depends(get_db)):
             detail="User already exists"
         )
     
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await _password_operation(hash_password_async(user.password))
     db_user = User(
         email=user.email,
         username=user.username,
@@ -78,18 +143,22 @@ def register(user: UserCreate, db: Session = Depends(get_db)):
         hashed_password=hashed_password
     )
     
-    db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
-    
-    return db_user
+    return await run_in_threadpool(_save_user, db, db_user)
 
 
 @router.post("/auth/login", response_model=Token)
-def login(request: Request, form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.username == form_data.username).first()
+async def login(request: Request, form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+    user = await run_in_threadpool(
+        lambda: db.query(User).filter(User.username == form_data.username).first()
+    )
     
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    valid, new_hash = False, None
+    if user:
+        valid, new_hash = await _password_operation(
+            verify_password_async(form_data.password, user.hashed_password)
+        )
+    
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password"
@@ -101,8 +170,13 @@ def login(request: Request, form_data: OAuth2PasswordRequestForm = Depends(), db
             detail="User account is disabled"
         )
     
-    access_token = create_access_token(data={"sub": user.username})
-    refresh_token = create_refresh_token(data={"sub": user.username})
+    access_token = create_access_token(data=principal_claims(user))
+    
+    if new_hash:
+        # The stored hash predates the current CryptContext settings; it is
+        # committed along with the refresh token
+        user.hashed_password = new_hash
+    refresh_token = await run_in_threadpool(get_refresh_token_store().issue, db, user)
     
     return {
         "access_token": access_token, 
@@ -113,36 +187,39 @@ def login(request: Request, form_data: OAuth2PasswordRequestForm = Depends(), db
 
 @router.post("/auth/refresh", response_model=Token)
 def refresh_token(refresh_token: str, db: Session = Depends(get_db)):
+    payload = decode_access_token(refresh_token)
+    if not payload or payload.get("type") != "refresh":
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid refresh token"
+        )
+    
     try:
-        payload = decode_access_token(refresh_token)
-        if not payload or payload.get("type") != "refresh":
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid refresh token"
-            )
-        
-        username = payload.get("sub")
-        user = db.query(User).filter(User.username == username).first()
-        
-        if not user or not user.is_active:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="User not found or inactive"
-            )
-        
-        new_access_token = create_access_token(data={"sub": user.username})
-        new_refresh_token = create_refresh_token(data={"sub": user.username})
-        
-        return {
-            "access_token": new_access_token,
-            "refresh_token": new_refresh_token,
-            "token_type": "bearer"
-        }
-    except Exception:
+        user, new_refresh_token = get_refresh_token_store().rotate(db, payload)
+    except RefreshTokenError as e:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Could not validate credentials"
+            detail=str(e)
         )
+    
+    return {
+        "access_token": create_access_token(data=principal_claims(user)),
+        "refresh_token": new_refresh_token,
+        "token_type": "bearer"
+    }
+
+
+@router.post("/auth/logout")
+def logout(refresh_token: str, db: Session = Depends(get_db)):
+    payload = decode_access_token(refresh_token)
+    if not payload or payload.get("type") != "refresh" or not payload.get("fam"):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid refresh token"
+        )
+    
+    get_refresh_token_store().revoke_family(db, payload["fam"])
+    return {"success": True}
 
 
 @router.get("/system/metrics")
@@ -150,21 +227,15 @@ def get_system_metrics(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    import subprocess
     import psutil
+    from backend.api.services.docker_client import get_docker_client
     
     try:
         cpu_percent = psutil.cpu_percent(interval=1)
         memory = psutil.virtual_memory()
         disk = psutil.disk_usage('/')
         
-        result = subprocess.run(
-            ["docker", "ps", "--format", "{{.Names}}"],
-            capture_output=True,
-            text=True,
-            check=True
-        )
-        container_count = len(result.stdout.strip().split('\n')) if result.stdout.strip() else 0
+        container_count = len(get_docker_client().list_containers())
         
         total_clients = db.query(Client).count()
         active_clients = db.query(Client).filter(Client.status == ClientStatus.ACTIVE.value).count()
@@ -185,65 +256,77 @@ def get_system_metrics(
                 "percent": disk.percent
             },
             "containers": {
-                "running": container_count
+                "running": container_count,
+                "fleet": get_stats_collector().fleet_summary()
             },
             "clients": {
                 "total": total_clients,
                 "active": active_clients
-            }
+            },
+            "external_db_pool": get_admin_pool().stats(),
+            "control_plane_db": get_database_metrics(),
+            "s3_transfers": get_transfer_metrics().snapshot(),
+            "principal_cache": get_principal_cache().status(),
+            "password_hasher": get_password_hasher().status(),
+            "refresh_tokens": get_refresh_token_store().status()
         }
     except Exception as e:
         return {"error": str(e)}
 
 
+def _decode_custom_domains(client: Client) -> Client:
+    if client.custom_domains and isinstance(client.custom_domains, str):
+        client.custom_domains = json.loads(client.custom_domains)
+    elif not client.custom_domains:
+        client.custom_domains = []
+    return client
+
+
 @router.get("/clients", response_model=List[ClientResponse])
-def list_clients(
+async def list_clients(
     skip: int = 0,
     limit: int = 100,
     status: str = None,
     include_scheduled: bool = False,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async)
 ):
-    query = db.query(Client)
+    query = select(Client)
     
     if status:
-        query = query.filter(Client.status == status)
+        query = query.where(Client.status == status)
     
     if not current_user.is_superuser:
-        query = query.filter(Client.status != ClientStatus.SCHEDULED_FOR_DELETION.value)
+        query = query.where(Client.status != ClientStatus.SCHEDULED_FOR_DELETION.value)
     
     if include_scheduled and current_user.is_superuser:
         pass
     
-    clients = query.offset(skip).limit(limit).all()
+    clients = (await db.execute(query.offset(skip).limit(limit))).scalars().all()
     
-    for client in clients:
-        if client.custom_domains and isinstance(client.custom_domains, str):
-            import json
-            client.custom_domains = json.loads(client.custom_domains)
-        elif not client.custom_domains:
-            client.custom_domains = []
-    
-    return clients
+    return [_decode_custom_domains(client) for client in clients]
 
 
 @router.get("/clients/stats", response_model=ClientStats)
-def get_stats(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    total = db.query(Client).count()
-    active = db.query(Client).filter(Client.status == ClientStatus.ACTIVE.value).count()
-    suspended = db.query(Client).filter(Client.status == ClientStatus.SUSPENDED.value).count()
+async def get_stats(db: AsyncSession = Depends(get_async_db), current_user: User = Depends(get_current_user_async)):
+    # One pass over clients instead of a query per figure
+    total, active, suspended, total_disk_usage = (await db.execute(select(
+        func.count(Client.id),
+        func.coalesce(func.sum(case((Client.status == ClientStatus.ACTIVE.value, 1), else_=0)), 0),
+        func.coalesce(func.sum(case((Client.status == ClientStatus.SUSPENDED.value, 1), else_=0)), 0),
+        func.sum(case((Client.status != ClientStatus.DELETED.value, Client.disk_usage_mb), else_=None))
+    ))).one()
     
     return ClientStats(
         total_clients=total,
         active_clients=active,
         suspended_clients=suspended,
-        total_disk_usage_mb=0,
-        avg_memory_usage_percent=0.0
+        total_disk_usage_mb=total_disk_usage or 0,
+        avg_memory_usage_percent=get_stats_collector().fleet_summary()["avg_memory_usage_percent"]
     )
 
 
-@router.post("/clients", response_model=ClientDetailResponse, status_code=status.HTTP_201_CREATED)
+@router.post("/clients", response_model=ClientDetailResponse, status_code=status.HTTP_202_ACCEPTED)
 def create_client(
     client_data: ClientCreate,
     db: Session = Depends(get_db),
@@ -271,7 +354,7 @@ def create_client(
         db_name=generate_db_name(client_data.name),
         db_user=generate_db_user(client_data.name),
         db_password=db_password,
-        odoo_port=get_next_odoo_port(),
+        odoo_port=allocate_port(db, client_data.name),
         plan=client_data.plan,
         memory_limit=plan_resources["memory_limit"],
         db_memory_limit=plan_resources["db_memory_limit"],
@@ -283,42 +366,28 @@ def create_client(
     )
     
     db.add(client)
-    db.commit()
-    db.refresh(client)
-    
     try:
-        db_created = create_external_database(
-            client.db_name,
-            client.db_user,
-            db_password
-        )
-        
-        if not db_created:
-            print("Warning: Could not create external database")
-        
-        create_client_directories(client.name)
-        create_docker_compose(client, db_password)
-        create_env_file(client, db_password, settings.S3_ACCESS_KEY, settings.S3_SECRET_KEY)
-        
-        log_activity(db, current_user.id, client.id, "create", f"Created pending client {client.name} - awaiting payment")
-        
-    except Exception as e:
+        db.commit()
+    except Exception:
         db.rollback()
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to provision client: {str(e)}"
-        )
+        release_port(db, client_data.name)
+        raise
+    db.refresh(client)
     
-    return client
+    job = enqueue_job(db, PROVISION_CLIENT, client_id=client.id, user_id=current_user.id)
+    
+    response = ClientDetailResponse.model_validate(client)
+    response.job_id = job.id
+    return response
 
 
 @router.get("/clients/{client_name}", response_model=ClientDetailResponse)
-def get_client(
+async def get_client(
     client_name: str,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async)
 ):
-    client = db.query(Client).filter(Client.name == client_name).first()
+    client = (await db.execute(select(Client).where(Client.name == client_name))).scalars().first()
     
     if not client:
         raise HTTPException(
@@ -326,15 +395,7 @@ def get_client(
             detail="Client not found"
         )
     
-    client.disk_usage_mb = get_disk_usage(client.name)
-    
-    if client.custom_domains and isinstance(client.custom_domains, str):
-        import json
-        client.custom_domains = json.loads(client.custom_domains)
-    elif not client.custom_domains:
-        client.custom_domains = []
-    
-    return client
+    return _decode_custom_domains(client)
 
 
 @router.patch("/clients/{client_name}", response_model=ClientResponse)
@@ -404,7 +465,7 @@ def suspend_client(
     return {"success": True, "message": f"Client {client.name} has been suspended"}
 
 
-@router.post("/clients/{client_name}/resume")
+@router.post("/clients/{client_name}/resume", status_code=status.HTTP_202_ACCEPTED)
 def resume_client(
     client_name: str,
     db: Session = Depends(get_db),
@@ -424,19 +485,9 @@ def resume_client(
             detail="Client is not suspended"
         )
     
-    if start_client_stack(client.name):
-        client.status = ClientStatus.ACTIVE.value
-        client.suspended_at = None
-        db.commit()
-        
-        log_activity(db, current_user.id, client.id, "resume", f"Resumed client {client.name}")
-        
-        return {"success": True, "message": f"Client {client.name} has been resumed"}
+    job = enqueue_job(db, RESUME_CLIENT, client_id=client.id, user_id=current_user.id)
     
-    raise HTTPException(
-        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-        detail="Failed to resume client"
-    )
+    return {"success": True, "message": f"Resuming client {client.name}", "job_id": job.id}
 
 
 @router.delete("/clients/{client_name}")
@@ -461,6 +512,7 @@ def delete_client(
     
     stop_client_stack(client.name)
     remove_client_stack(client.name)
+    release_port(db, client.name)
     
     nginx_config = f"/etc/nginx/sites-available/{client_name}.conf"
     nginx_enabled = f"/etc/nginx/sites-enabled/{client_name}.conf"
@@ -475,7 +527,7 @@ def delete_client(
     
     log_activity(db, current_user.id, client.id, "delete", f"Deleted client {client.name}")
     
-    reload_nginx()
+    reload_nginx(f"delete {client_name}")
     
     return {"success": True, "message": f"Client {client_name} has been deleted"}
 
@@ -632,6 +684,8 @@ def force_delete(
     except Exception:
         pass
     
+    release_port(db, client.name)
+    
     import os
     nginx_config = f"/etc/nginx/sites-available/{client_name}.conf"
     nginx_enabled = f"/etc/nginx/sites-enabled/{client_name}.conf"
@@ -651,7 +705,7 @@ def force_delete(
     )
     
     try:
-        reload_nginx()
+        reload_nginx(f"force delete {client_name}")
     except Exception:
         pass
     
@@ -673,11 +727,11 @@ def get_client_stats(
         )
     
     stats = get_container_stats(client_name)
-    disk_usage = get_disk_usage(client_name)
     
     return {
         "containers": stats,
-        "disk_usage_mb": disk_usage,
+        "history": get_stats_collector().client_history(client_name),
+        "disk_usage_mb": client.disk_usage_mb or 0,
         "status": client.status
     }
 
@@ -686,6 +740,7 @@ def get_client_stats(
 def create_backup(
     client_name: str,
     backup_type: str = "manual",
+    backup_format: str = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
@@ -697,7 +752,13 @@ def create_backup(
             detail="Client not found"
         )
     
-    result = trigger_backup(client_name, backup_type)
+    if backup_format not in (None, BACKUP_FORMAT_CUSTOM, BACKUP_FORMAT_DIRECTORY, BACKUP_FORMAT_CHUNKED):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"backup_format must be {BACKUP_FORMAT_CUSTOM}, {BACKUP_FORMAT_DIRECTORY} or {BACKUP_FORMAT_CHUNKED}"
+        )
+    
+    result = trigger_backup(client_name, backup_type, db, backup_format)
     
     log_activity(db, current_user.id, client.id, "backup", f"Started {backup_type} backup")
     
@@ -706,22 +767,27 @@ def create_backup(
 
 @router.get("/backups")
 def list_all_backups(
-    skip: int = 0,
+    cursor: str = None,
     limit: int = 50,
     client_name: str = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    from backend.api.models.models import Backup
-    
-    query = db.query(Backup)
-    
-    if client_name:
-        query = query.filter(Backup.client_name == client_name)
-    
-    backups = query.order_by(Backup.created_at.desc()).offset(skip).limit(limit).all()
-    
-    return {"backups": backups, "total": query.count()}
+    try:
+        return list_backups(db, client_name=client_name, cursor=cursor, limit=limit)
+    except CursorError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+@router.get("/backups/export")
+def export_backups(
+    client_name: str = None,
+    current_user: User = Depends(get_current_user)
+):
+    return StreamingResponse(
+        export_backups_ndjson(SessionLocal, client_name),
+        media_type="application/x-ndjson"
+    )
 
 
 @router.get("/clients/{client_name}/domains")
@@ -787,9 +853,10 @@ def add_custom_domain(
     
     try:
         create_nginx_config(client)
-        reload_nginx()
+        # certbot --nginx serves its challenge from its own temporary config,
+        # so one reload afterwards picks up both the server block and the cert
         request_ssl_certificate(domain, settings.SMTP_FROM)
-        reload_nginx()
+        reload_nginx(f"add domain {domain}")
     except Exception:
         pass
     
@@ -826,7 +893,7 @@ def remove_custom_domain(
     db.commit()
     
     remove_nginx_domain_config(client, domain)
-    reload_nginx()
+    reload_nginx(f"remove domain {domain}")
     
     log_activity(db, current_user.id, client.id, "domain_remove", f"Removed custom domain: {domain}")
     
@@ -843,7 +910,7 @@ def remove_nginx_domain_config(client: Client, domain: str):
             os.remove(path)
 
 
-@router.post("/clients/{client_name}/activate")
+@router.post("/clients/{client_name}/activate", status_code=status.HTTP_202_ACCEPTED)
 def activate_client(
     client_name: str,
     db: Session = Depends(get_db),
@@ -860,38 +927,131 @@ def activate_client(
     if client.status == ClientStatus.ACTIVE.value:
         return {"success": True, "message": "Client is already active"}
     
-    try:
-        if start_client_stack(client.name):
-            client.status = ClientStatus.ACTIVE.value
-            client.activated_at = datetime.utcnow()
-            
-            create_nginx_config(client)
-            reload_nginx()
-            
-            try:
-                request_ssl_certificate(client.domain, settings.SMTP_FROM)
-                reload_nginx()
-            except Exception:
-                pass
-            
-            db.commit()
-            
-            log_activity(db, current_user.id, client.id, "activate", f"Activated client {client.name}")
-            
-            return {"success": True, "message": "Client activated successfully"}
-        
+    job = enqueue_job(db, ACTIVATE_CLIENT, client_id=client.id, user_id=current_user.id)
+    
+    return {"success": True, "message": f"Activating client {client.name}", "job_id": job.id}
+
+
+@router.post("/nginx/regenerate")
+def regenerate_nginx_configs(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    if not current_user.is_superuser:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to start client services"
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required"
         )
-    except Exception as e:
+    
+    clients = db.query(Client).filter(Client.status == ClientStatus.ACTIVE.value).all()
+    count = create_nginx_configs(clients)
+    reloaded = reload_nginx(f"regenerate {count} configs")
+    
+    log_activity(db, current_user.id, None, "nginx_regenerate", f"Regenerated {count} nginx configs")
+    
+    return {"success": reloaded, "regenerated": count, "reload": get_nginx_reloader().last_batch}
+
+
+@router.get("/nginx/status")
+def nginx_reload_status(current_user: User = Depends(get_current_user)):
+    if not current_user.is_superuser:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required"
+        )
+    
+    return {"last_reload": get_nginx_reloader().last_batch}
+
+
+@router.get("/system/warm-pool")
+def get_warm_pool_status(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    if not current_user.is_superuser:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Activation failed: {str(e)}"
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required"
         )
+    
+    return {"enabled": settings.WARM_POOL_ENABLED, "plans": get_warm_pool().status(db)}
 
 
-@router.post("/cleanup/expired-clients")
+@router.get("/system/backup-scheduler")
+def get_backup_scheduler_status(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    if not current_user.is_superuser:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required"
+        )
+    
+    return get_backup_scheduler().status(db)
+
+
+@router.get("/system/backup-verification")
+def get_backup_verification_status(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    if not current_user.is_superuser:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required"
+        )
+    
+    return get_backup_verifier().status(db)
+
+
+@router.post("/system/backup-retention")
+def run_backup_retention(
+    dry_run: bool = True,
+    client_name: str = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    if not current_user.is_superuser:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required"
+        )
+    
+    return prune_backups(db, client_name=client_name, dry_run=dry_run)
+
+
+@router.get("/system/provisioning-metrics")
+def get_provisioning_metrics(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    if not current_user.is_superuser:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required"
+        )
+    
+    rows = db.query(
+        ProvisioningMetric.db_method,
+        func.count(ProvisioningMetric.id),
+        func.avg(ProvisioningMetric.db_create_seconds),
+        func.avg(ProvisioningMetric.time_to_login_seconds),
+        func.count(ProvisioningMetric.time_to_login_seconds)
+    ).group_by(ProvisioningMetric.db_method).all()
+    
+    return {
+        method: {
+            "clients": count,
+            "avg_db_create_seconds": round(avg_create, 2) if avg_create is not None else None,
+            "avg_time_to_login_seconds": round(avg_login, 2) if avg_login is not None else None,
+            "measured_logins": measured,
+        }
+        for method, count, avg_create, avg_login, measured in rows
+    }
+
+
+@router.post("/cleanup/expired-clients", status_code=status.HTTP_202_ACCEPTED)
 def cleanup_expired_clients(
     db: Session = Depends(get_db),
     admin_token: str = None
@@ -904,57 +1064,30 @@ def cleanup_expired_clients(
     
     now = datetime.utcnow()
     
-    expired_clients = db.query(Client).filter(
-        Client.status == ClientStatus.PENDING.value,
-        Client.payment_deadline < now
-    ).all()
+    # Clients an earlier, still pending cleanup job already covers are skipped
+    already_queued = pending_cleanup_ids(db)
     
-    scheduled_for_deletion = db.query(Client).filter(
-        Client.status == ClientStatus.SCHEDULED_FOR_DELETION.value,
-        Client.deletion_scheduled_at < now
-    ).all()
+    expired_ids = [client_id for (client_id,) in db.query(Client.id).filter(
+        unpaid_expired(now)
+    ).all() if client_id not in already_queued]
     
-    all_to_delete = expired_clients + scheduled_for_deletion
+    scheduled_ids = [client_id for (client_id,) in db.query(Client.id).filter(
+        deletion_due(now)
+    ).all() if client_id not in already_queued]
     
-    deleted_count = 0
-    for client in all_to_delete:
-        db_name = client.db_name
-        db_user = client.db_user
-        
-        try:
-            stop_client_stack(client.name)
-            remove_client_stack(client.name)
-        except Exception:
-            pass
-        
-        try:
-            delete_external_database(db_name, db_user)
-        except Exception:
-            pass
-        
-        nginx_config = f"/etc/nginx/sites-available/{client.name}.conf"
-        nginx_enabled = f"/etc/nginx/sites-enabled/{client.name}.conf"
-        for path in [nginx_config, nginx_enabled]:
-            if os.path.exists(path):
-                os.remove(path)
-        
-        try:
-            reload_nginx()
-        except Exception:
-            pass
-        
-        client.status = ClientStatus.DELETED.value
-        db.commit()
-        
-        log_activity(db, None, client.id, "cleanup", f"Auto-deleted client: {client.name}")
-        deleted_count += 1
+    client_ids = expired_ids + scheduled_ids
+    
+    job = None
+    if client_ids:
+        job = enqueue_job(db, CLEANUP_CLIENTS, payload={"client_ids": client_ids})
     
     return {
         "success": True,
-        "deleted": deleted_count,
-        "unpaid_expired": len(expired_clients),
-        "scheduled_deletions": len(scheduled_for_deletion),
-        "message": f"Cleaned up {deleted_count} clients"
+        "job_id": job.id if job else None,
+        "queued": len(client_ids),
+        "unpaid_expired": len(expired_ids),
+        "scheduled_deletions": len(scheduled_ids),
+        "message": f"Queued cleanup of {len(client_ids)} clients"
     }
 
 
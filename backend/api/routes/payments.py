@@ -1,18 +1,20 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from pydantic import BaseModel
 from datetime import datetime, timedelta
 import uuid
 
-from backend.core.database import get_db
+from backend.core.database import get_db, get_async_db
 from backend.core.config import get_settings
 from backend.api.models.models import User, Client
 from backend.api.models.payment_models import Payment, Subscription
 from backend.api.services.paystack_service import (
     get_paystack_service, get_plan_price, PLAN_PRICES
 )
-from backend.api.routes.clients import get_current_user
+from backend.api.routes.clients import get_current_user, get_current_user_async
 
 router = APIRouter()
 
@@ -194,25 +196,25 @@ def verify_payment(
 
 
 @router.get("/history", response_model=List[PaymentResponse])
-def get_payment_history(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+async def get_payment_history(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async)
 ):
-    payments = db.query(Payment).filter(
-        Payment.user_id == current_user.id
-    ).order_by(Payment.created_at.desc()).all()
+    payments = await db.execute(
+        select(Payment).where(Payment.user_id == current_user.id).order_by(Payment.created_at.desc())
+    )
     
-    return payments
+    return payments.scalars().all()
 
 
 @router.get("/subscription")
-def get_subscription(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+async def get_subscription(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async)
 ):
-    subscription = db.query(Subscription).filter(
-        Subscription.user_id == current_user.id
-    ).first()
+    subscription = (await db.execute(
+        select(Subscription).where(Subscription.user_id == current_user.id)
+    )).scalars().first()
     
     if not subscription:
         return {
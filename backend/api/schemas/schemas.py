@@ -73,6 +73,7 @@ class ClientDetailResponse(ClientResponse):
     backup_retention_monthly: int
     suspended_at: Optional[datetime] = None
     updated_at: datetime
+    job_id: Optional[int] = None
 
 
 class ClientStats(BaseModel):
@@ -136,10 +137,20 @@ class BackupResponse(BackupBase):
     client_name: str
     filename: str
     size_mb: float
+    size_bytes: Optional[int] = None
+    checksum: Optional[str] = None
+    format: Optional[str] = "custom"
+    codec: Optional[str] = None
+    encrypted: Optional[bool] = False
     status: str
     error_message: Optional[str] = None
     created_at: datetime
     completed_at: Optional[datetime] = None
+    verify_status: Optional[str] = None
+    verified_at: Optional[datetime] = None
+    verify_seconds: Optional[float] = None
+    verify_mbps: Optional[float] = None
+    verify_error: Optional[str] = None
     
     class Config:
         from_attributes = True
@@ -162,6 +173,24 @@ class ActivityLogResponse(BaseModel):
         from_attributes = True
 
 
+class JobResponse(BaseModel):
+    id: int
+    job_type: str
+    status: str
+    client_id: Optional[int] = None
+    result: Optional[str] = None
+    error_message: Optional[str] = None
+    attempts: int = 0
+    progress_done: Optional[int] = 0
+    progress_total: Optional[int] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
+
+
 class ContainerStats(BaseModel):
     container_name: str
     status: str
@@ -0,0 +1,311 @@
+import base64
+import os
+import struct
+import zlib
+from typing import Optional
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+try:
+    import lz4.frame
+    LZ4_AVAILABLE = True
+except ImportError:
+    LZ4_AVAILABLE = False
+
+try:
+    from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+    from cryptography.exceptions import InvalidTag
+    CRYPTOGRAPHY_AVAILABLE = True
+except ImportError:
+    CRYPTOGRAPHY_AVAILABLE = False
+
+from backend.core.config import get_settings
+
+settings = get_settings()
+
+CODEC_NONE = "none"
+CODEC_GZIP = "gzip"
+CODEC_ZSTD = "zstd"
+CODEC_LZ4 = "lz4"
+
+CODECS = (CODEC_NONE, CODEC_GZIP, CODEC_ZSTD, CODEC_LZ4)
+EXTENSIONS = {CODEC_NONE: "", CODEC_GZIP: ".gz", CODEC_ZSTD: ".zst", CODEC_LZ4: ".lz4"}
+DEFAULT_LEVELS = {CODEC_NONE: 0, CODEC_GZIP: 6, CODEC_ZSTD: 3, CODEC_LZ4: 0}
+
+ENCRYPTED_EXTENSION = ".enc"
+MAGIC = b"OCB1"
+FRAME_SIZE = 1024 * 1024
+NONCE_PREFIX_SIZE = 8
+LAST_FRAME = b"\x01"
+MORE_FRAMES = b"\x00"
+
+
+class CodecError(Exception):
+    pass
+
+
+def codec_available(codec: str) -> bool:
+    if codec == CODEC_ZSTD:
+        return ZSTD_AVAILABLE
+    if codec == CODEC_LZ4:
+        return LZ4_AVAILABLE
+    return codec in CODECS
+
+
+def backup_extension(codec: Optional[str], encrypted: bool) -> str:
+    return EXTENSIONS.get(codec or CODEC_NONE, "") + (ENCRYPTED_EXTENSION if encrypted else "")
+
+
+def encryption_key() -> Optional[bytes]:
+    """The BACKUP_ENCRYPTION_KEY as 32 raw bytes, or None when backups are not encrypted"""
+    if not settings.BACKUP_ENCRYPTION_KEY:
+        return None
+    if not CRYPTOGRAPHY_AVAILABLE:
+        raise CodecError("Backup encryption needs the cryptography package")
+    key = base64.urlsafe_b64decode(settings.BACKUP_ENCRYPTION_KEY)
+    if len(key) != 32:
+        raise CodecError("BACKUP_ENCRYPTION_KEY must be 32 bytes, urlsafe base64 encoded")
+    return key
+
+
+class _Passthrough:
+    def compress(self, data: bytes) -> bytes:
+        return data
+    
+    decompress = compress
+    
+    def flush(self) -> bytes:
+        return b""
+
+
+class _Lz4Compressor:
+    def __init__(self, level: int):
+        self._compressor = lz4.frame.LZ4FrameCompressor(compression_level=level)
+        self._header = self._compressor.begin()
+    
+    def compress(self, data: bytes) -> bytes:
+        out = self._header + self._compressor.compress(data)
+        self._header = b""
+        return out
+    
+    def flush(self) -> bytes:
+        return self._header + self._compressor.flush()
+
+
+class _Lz4Decompressor:
+    def __init__(self):
+        self._decompressor = lz4.frame.LZ4FrameDecompressor()
+    
+    def decompress(self, data: bytes) -> bytes:
+        return self._decompressor.decompress(data)
+    
+    def flush(self) -> bytes:
+        return b""
+
+
+class _ZstdDecompressor:
+    def __init__(self):
+        self._decompressor = zstandard.ZstdDecompressor().decompressobj()
+    
+    def decompress(self, data: bytes) -> bytes:
+        return self._decompressor.decompress(data)
+    
+    def flush(self) -> bytes:
+        return b""
+
+
+def compressor(codec: str, level: int = None):
+    if not codec_available(codec):
+        raise CodecError(f"Codec {codec} is not available")
+    level = DEFAULT_LEVELS[codec] if level is None else level
+    
+    if codec == CODEC_GZIP:
+        return zlib.compressobj(level, zlib.DEFLATED, 31)
+    if codec == CODEC_ZSTD:
+        # threads=-1 compresses on every core; zstd splits the stream into
+        # jobs internally, so the output is still one ordinary frame
+        return zstandard.ZstdCompressor(level=level, threads=settings.BACKUP_ZSTD_THREADS).compressobj()
+    if codec == CODEC_LZ4:
+        return _Lz4Compressor(level)
+    return _Passthrough()
+
+
+def decompressor(codec: Optional[str]):
+    codec = codec or CODEC_NONE
+    if not codec_available(codec):
+        raise CodecError(f"Codec {codec} is not available")
+    
+    if codec == CODEC_GZIP:
+        return zlib.decompressobj(31)
+    if codec == CODEC_ZSTD:
+        return _ZstdDecompressor()
+    if codec == CODEC_LZ4:
+        return _Lz4Decompressor()
+    return _Passthrough()
+
+
+class _Encryptor:
+    """AES-256-GCM over fixed-size frames, so a stream of any length encrypts in one pass.
+
+    Layout: MAGIC, an 8 byte random nonce prefix, then frames of
+    (4 byte length, ciphertext+tag). Each frame's nonce is the prefix plus
+    its 4 byte index, and its associated data says whether it is the last
+    frame, so reordered, dropped or truncated frames fail authentication.
+    """
+    
+    def __init__(self, key: bytes):
+        self._aead = AESGCM(key)
+        self._prefix = os.urandom(NONCE_PREFIX_SIZE)
+        self._index = 0
+        self._buffer = bytearray()
+        self._header = MAGIC + self._prefix
+    
+    def _frame(self, plaintext: bytes, last: bool) -> bytes:
+        nonce = self._prefix + struct.pack(">I", self._index)
+        self._index += 1
+        sealed = self._aead.encrypt(nonce, plaintext, LAST_FRAME if last else MORE_FRAMES)
+        return struct.pack(">I", len(sealed)) + sealed
+    
+    def update(self, data: bytes) -> bytes:
+        self._buffer += data
+        out = [self._header]
+        self._header = b""
+        # Keep at least one byte back so the final frame is never empty
+        while len(self._buffer) > FRAME_SIZE:
+            out.append(self._frame(bytes(self._buffer[:FRAME_SIZE]), False))
+            del self._buffer[:FRAME_SIZE]
+        return b"".join(out)
+    
+    def finalize(self) -> bytes:
+        out = self._header + self._frame(bytes(self._buffer), True)
+        self._header = b""
+        self._buffer = bytearray()
+        return out
+
+
+class _Decryptor:
+    def __init__(self, key: bytes):
+        self._aead = AESGCM(key)
+        self._prefix: Optional[bytes] = None
+        self._index = 0
+        self._buffer = bytearray()
+        self._done = False
+    
+    def update(self, data: bytes) -> bytes:
+        self._buffer += data
+        out = []
+        
+        if self._prefix is None:
+            if len(self._buffer) < len(MAGIC) + NONCE_PREFIX_SIZE:
+                return b""
+            if self._buffer[:len(MAGIC)] != MAGIC:
+                raise CodecError("Not an encrypted backup")
+            self._prefix = bytes(self._buffer[len(MAGIC):len(MAGIC) + NONCE_PREFIX_SIZE])
+            del self._buffer[:len(MAGIC) + NONCE_PREFIX_SIZE]
+        
+        while len(self._buffer) >= 4:
+            size = struct.unpack(">I", self._buffer[:4])[0]
+            if len(self._buffer) < 4 + size:
+                break
+            sealed = bytes(self._buffer[4:4 + size])
+            del self._buffer[:4 + size]
+            out.append(self._open(sealed))
+        
+        return b"".join(out)
+    
+    def _open(self, sealed: bytes) -> bytes:
+        if self._done:
+            raise CodecError("Data after the final encrypted frame")
+        nonce = self._prefix + struct.pack(">I", self._index)
+        self._index += 1
+        try:
+            return self._aead.decrypt(nonce, sealed, MORE_FRAMES)
+        except InvalidTag:
+            pass
+        try:
+            plaintext = self._aead.decrypt(nonce, sealed, LAST_FRAME)
+        except InvalidTag:
+            raise CodecError("Backup failed authentication; wrong key or corrupted data")
+        self._done = True
+        return plaintext
+    
+    def finalize(self) -> bytes:
+        if not self._done or self._buffer:
+            raise CodecError("Encrypted backup is truncated")
+        return b""
+
+
+class EncodingWriter:
+    """Write-only wrapper that compresses and optionally encrypts into a sink in one pass.
+
+    finish() flushes the codec and the last encrypted frame but leaves the
+    sink open, so the caller still decides whether to close or abort it.
+    bytes_in counts what was written before encoding.
+    """
+    
+    def __init__(self, sink, codec: str, level: int = None, key: bytes = None):
+        self.sink = sink
+        self.bytes_in = 0
+        self._compressor = compressor(codec, level)
+        self._encryptor = _Encryptor(key) if key else None
+    
+    def writable(self) -> bool:
+        return True
+    
+    def _emit(self, data: bytes, final: bool = False) -> None:
+        if self._encryptor:
+            data = self._encryptor.update(data)
+            if final:
+                data += self._encryptor.finalize()
+        if data:
+            self.sink.write(data)
+    
+    def write(self, data: bytes) -> int:
+        self.bytes_in += len(data)
+        self._emit(self._compressor.compress(data))
+        return len(data)
+    
+    def finish(self) -> None:
+        self._emit(self._compressor.flush(), final=True)
+
+
+class DecodingWriter:
+    """Inverse of EncodingWriter: decrypts if given a key, then decompresses, into a sink"""
+    
+    def __init__(self, sink, codec: Optional[str], key: bytes = None):
+        self.sink = sink
+        self._decompressor = decompressor(codec)
+        self._decryptor = _Decryptor(key) if key else None
+    
+    def writable(self) -> bool:
+        return True
+    
+    def write(self, data: bytes) -> int:
+        plain = self._decryptor.update(data) if self._decryptor else data
+        out = self._decompressor.decompress(plain)
+        if out:
+            self.sink.write(out)
+        return len(data)
+    
+    def finish(self) -> None:
+        if self._decryptor:
+            self._decryptor.finalize()
+        out = self._decompressor.flush()
+        if out:
+            self.sink.write(out)
+
+
+def decode_file(source_path: str, dest_path: str, codec: Optional[str], key: bytes = None) -> int:
+    with open(source_path, "rb") as source, open(dest_path, "wb") as dest:
+        decoder = DecodingWriter(dest, codec, key)
+        while True:
+            block = source.read(FRAME_SIZE)
+            if not block:
+                break
+            decoder.write(block)
+        decoder.finish()
+        return dest.tell()
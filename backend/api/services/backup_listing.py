@@ -0,0 +1,189 @@
+import base64
+import json
+import logging
+import threading
+import time
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import func, literal, text, tuple_
+from sqlalchemy.orm import Session
+
+from backend.core.config import get_settings
+from backend.api.models.models import Backup
+from backend.api.schemas.schemas import BackupResponse
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+
+SQLITE_TIMESTAMP = "%Y-%m-%d %H:%M:%f"
+
+
+class CursorError(ValueError):
+    pass
+
+
+def encode_cursor(backup: Backup) -> str:
+    payload = json.dumps([backup.created_at.isoformat(), backup.id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, backup_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(created_at), int(backup_id)
+    except (ValueError, TypeError) as e:
+        raise CursorError(f"Invalid cursor: {e}")
+
+
+def _created_key(db: Session, value=None):
+    """created_at as compared and ordered by the keyset.
+
+    SQLite keeps timestamps as text, with or without microseconds depending
+    on whether the row got the server default, so there both sides are
+    normalised first; the dev database is small enough to skip the index.
+    """
+    column = Backup.created_at if value is None else literal(value, Backup.created_at.type)
+    if db.get_bind().dialect.name == "sqlite":
+        return func.strftime(SQLITE_TIMESTAMP, column)
+    return column
+
+
+def _backups_query(db: Session, client_name: str = None, after: Tuple[datetime, int] = None):
+    """Newest first, keyed on (created_at, id) so every page is an index range scan.
+    
+    With a client filter this walks idx_backup_client_created_id, without
+    one idx_backup_created_id; id breaks ties between backups that share a
+    timestamp, so a page boundary never skips or repeats a row.
+    """
+    created = _created_key(db)
+    query = db.query(Backup)
+    if client_name:
+        query = query.filter(Backup.client_name == client_name)
+    if after:
+        query = query.filter(tuple_(created, Backup.id) < tuple_(_created_key(db, after[0]), after[1]))
+    return query.order_by(created.desc(), Backup.id.desc())
+
+
+def page_backups(
+    db: Session,
+    client_name: str = None,
+    cursor: str = None,
+    limit: int = 50
+) -> Tuple[List[Backup], Optional[str]]:
+    """One page of backups and the cursor for the next, or None on the last page"""
+    limit = max(1, min(limit, settings.BACKUP_LIST_MAX_LIMIT))
+    after = decode_cursor(cursor) if cursor else None
+    
+    # One extra row tells us whether there is a next page without a count
+    rows = _backups_query(db, client_name, after).limit(limit + 1).all()
+    if len(rows) > limit:
+        return rows[:limit], encode_cursor(rows[limit - 1])
+    return rows, None
+
+
+def iter_backups(db: Session, client_name: str = None, batch_size: int = None) -> Iterator[Backup]:
+    """Every matching backup, newest first, fetched in keyset batches.
+
+    Each batch is its own short query, so a long export neither holds a
+    transaction open nor keeps more than one batch of rows in memory.
+    """
+    batch_size = batch_size or settings.BACKUP_EXPORT_BATCH
+    after = None
+    while True:
+        rows = _backups_query(db, client_name, after).limit(batch_size).all()
+        for row in rows:
+            yield row
+        if len(rows) < batch_size:
+            return
+        after = (rows[-1].created_at, rows[-1].id)
+        db.expunge_all()
+
+
+def export_backups_ndjson(session_factory, client_name: str = None) -> Iterator[str]:
+    """NDJSON lines for every matching backup, on a session owned by the generator.
+
+    The request's session is closed before a streaming body finishes, so
+    the export opens and closes its own.
+    """
+    db = session_factory()
+    try:
+        for backup in iter_backups(db, client_name):
+            yield BackupResponse.model_validate(backup).model_dump_json() + "\n"
+    finally:
+        db.close()
+
+
+class BackupCountCache:
+    """Totals for the backup listing, cached for BACKUP_COUNT_CACHE_TTL seconds.
+
+    A per-client count is exact and cheap on the composite index. The
+    unfiltered total on PostgreSQL comes from the planner's row estimate in
+    pg_class once the table is past BACKUP_COUNT_ESTIMATE_THRESHOLD rows,
+    since an exact count(*) there scans millions of rows.
+    """
+    
+    def __init__(self, ttl: float = None):
+        self.ttl = settings.BACKUP_COUNT_CACHE_TTL if ttl is None else ttl
+        self._lock = threading.Lock()
+        self._totals: Dict[Optional[str], Tuple[float, int, bool]] = {}
+    
+    def _estimate(self, db: Session) -> Optional[int]:
+        if db.get_bind().dialect.name != "postgresql":
+            return None
+        estimate = db.execute(
+            text("SELECT reltuples::bigint FROM pg_class WHERE oid = 'backups'::regclass")
+        ).scalar()
+        if estimate is None or estimate < settings.BACKUP_COUNT_ESTIMATE_THRESHOLD:
+            return None
+        return int(estimate)
+    
+    def total(self, db: Session, client_name: str = None) -> Tuple[int, bool]:
+        """(total, estimated) for the listing, computing it at most once per TTL"""
+        now = time.monotonic()
+        with self._lock:
+            cached = self._totals.get(client_name)
+        if cached and cached[0] > now:
+            return cached[1], cached[2]
+        
+        estimate = None if client_name else self._estimate(db)
+        if estimate is not None:
+            total, estimated = estimate, True
+        else:
+            query = db.query(Backup.id)
+            if client_name:
+                query = query.filter(Backup.client_name == client_name)
+            total, estimated = query.count(), False
+        
+        with self._lock:
+            self._totals[client_name] = (now + self.ttl, total, estimated)
+        return total, estimated
+    
+    def invalidate(self, client_name: str = None) -> None:
+        with self._lock:
+            self._totals.pop(client_name, None)
+            self._totals.pop(None, None)
+
+
+@lru_cache()
+def get_count_cache() -> BackupCountCache:
+    return BackupCountCache()
+
+
+def list_backups(
+    db: Session,
+    client_name: str = None,
+    cursor: str = None,
+    limit: int = 50
+) -> Dict[str, Any]:
+    backups, next_cursor = page_backups(db, client_name, cursor, limit)
+    total, estimated = get_count_cache().total(db, client_name)
+    return {
+        "backups": [BackupResponse.model_validate(b) for b in backups],
+        "next_cursor": next_cursor,
+        "total": total,
+        "total_estimated": estimated
+    }
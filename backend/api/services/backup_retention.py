@@ -0,0 +1,187 @@
+import logging
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import and_, case, func
+from sqlalchemy.orm import Session
+
+from backend.core.config import get_settings
+from backend.api.models.models import Backup, Client
+from backend.api.services.backup_service import BACKUP_FORMAT_DIRECTORY, BACKUP_FORMAT_CHUNKED
+from backend.api.services.chunk_store import read_manifest, release_manifests, collect_garbage
+from backend.api.services.s3_transfer import get_s3_client, get_part_executor, list_keys, delete_keys
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+DAILY = "daily"
+WEEKLY = "weekly"
+MONTHLY = "monthly"
+
+# Column defaults on Client, used for backups whose client row is gone
+DEFAULT_RETENTION = {DAILY: 7, WEEKLY: 4, MONTHLY: 3}
+
+PERIODS = {DAILY: "day", WEEKLY: "week", MONTHLY: "month"}
+SQLITE_PERIOD_FORMATS = {"day": "%Y-%m-%d", "week": "%Y-%W", "month": "%Y-%m"}
+SQL_BATCH = 500
+
+
+def _period_start(column, period: str, dialect: str):
+    if dialect == "sqlite":
+        return func.strftime(SQLITE_PERIOD_FORMATS[period], column)
+    return func.date_trunc(period, column)
+
+
+def classify_backups(db: Session, client_name: str = None) -> list:
+    """Every completed backup with the retention bucket that keeps it, or None if it should be pruned.
+
+    A backup is kept as daily if it is the newest backup of its day and that
+    day is among the client's backup_retention_daily most recent days with
+    a backup; weekly and monthly work the same way on weeks and months.
+    Everything is ranked with window functions in a single query.
+    """
+    dialect = db.get_bind().dialect.name
+    ranks = []
+    for bucket, period in PERIODS.items():
+        start = _period_start(Backup.created_at, period, dialect)
+        ranks.append(func.row_number().over(
+            partition_by=(Backup.client_name, start),
+            order_by=(Backup.created_at.desc(), Backup.id.desc())
+        ).label(f"{bucket}_position"))
+        ranks.append(func.dense_rank().over(
+            partition_by=Backup.client_name,
+            order_by=start.desc()
+        ).label(f"{bucket}_rank"))
+    
+    query = db.query(Backup.id, *ranks).filter(
+        Backup.status == "completed",
+        Backup.created_at.isnot(None)
+    )
+    if client_name:
+        query = query.filter(Backup.client_name == client_name)
+    ranked = query.subquery()
+    
+    limits = {
+        DAILY: func.coalesce(Client.backup_retention_daily, DEFAULT_RETENTION[DAILY]),
+        WEEKLY: func.coalesce(Client.backup_retention_weekly, DEFAULT_RETENTION[WEEKLY]),
+        MONTHLY: func.coalesce(Client.backup_retention_monthly, DEFAULT_RETENTION[MONTHLY]),
+    }
+    keep = case(
+        *[
+            (and_(
+                getattr(ranked.c, f"{bucket}_position") == 1,
+                getattr(ranked.c, f"{bucket}_rank") <= limits[bucket]
+            ), bucket)
+            for bucket in PERIODS
+        ],
+        else_=None
+    )
+    
+    return db.query(
+        Backup.id,
+        Backup.client_name,
+        Backup.filename,
+        Backup.s3_key,
+        Backup.format,
+        Backup.size_bytes,
+        Backup.created_at,
+        keep.label("bucket")
+    ).join(
+        ranked, ranked.c.id == Backup.id
+    ).outerjoin(
+        Client, Client.name == Backup.client_name
+    ).order_by(Backup.client_name, Backup.created_at.desc()).all()
+
+
+def _read_manifest_or_none(s3, key: str) -> Optional[dict]:
+    try:
+        return read_manifest(s3, key)
+    except s3.exceptions.NoSuchKey:
+        logger.warning(f"Manifest {key} is missing, its chunk references cannot be released")
+        return None
+
+
+def _object_keys(s3, backups: list) -> List[str]:
+    keys = []
+    for backup in backups:
+        if not backup.s3_key:
+            continue
+        if backup.format == BACKUP_FORMAT_DIRECTORY:
+            keys.extend(list_keys(backup.s3_key, s3=s3))
+        else:
+            keys.append(backup.s3_key)
+    return keys
+
+
+def prune_backups(db: Session, s3=None, client_name: str = None, dry_run: bool = False) -> Dict[str, Any]:
+    """Apply retention to one client or the whole fleet and report what was (or would be) pruned.
+
+    Chunk references are released and the rows deleted in one transaction
+    before any object is removed, so a failure part way leaves at worst
+    orphaned objects in S3, never a backup row without its data.
+    """
+    rows = classify_backups(db, client_name)
+    pruned = [row for row in rows if row.bucket is None]
+    
+    clients: Dict[str, Dict[str, Any]] = defaultdict(lambda: {
+        "kept": {DAILY: 0, WEEKLY: 0, MONTHLY: 0}, "pruned": 0, "pruned_bytes": 0
+    })
+    for row in rows:
+        summary = clients[row.client_name]
+        if row.bucket:
+            summary["kept"][row.bucket] += 1
+            continue
+        summary["pruned"] += 1
+        summary["pruned_bytes"] += row.size_bytes or 0
+        if dry_run:
+            summary.setdefault("backups", []).append({
+                "filename": row.filename,
+                "created_at": row.created_at.isoformat(),
+                "size_bytes": row.size_bytes,
+            })
+    
+    report = {
+        "dry_run": dry_run,
+        "backups": len(rows),
+        "pruned": len(pruned),
+        "pruned_bytes": sum(row.size_bytes or 0 for row in pruned),
+        "deleted_objects": 0,
+        "errors": [],
+        "clients": dict(clients),
+    }
+    if dry_run or not pruned:
+        return report
+    
+    s3 = s3 or get_s3_client()
+    if not s3:
+        report["errors"].append("S3 not available")
+        return report
+    
+    chunked = [row.s3_key for row in pruned if row.format == BACKUP_FORMAT_CHUNKED and row.s3_key]
+    manifests = [m for m in get_part_executor().map(lambda key: _read_manifest_or_none(s3, key), chunked) if m]
+    keys = _object_keys(s3, pruned)
+    
+    ids = [row.id for row in pruned]
+    try:
+        release_manifests(db, manifests)
+        for i in range(0, len(ids), SQL_BATCH):
+            db.query(Backup).filter(Backup.id.in_(ids[i:i + SQL_BATCH])).delete(synchronize_session=False)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    
+    errors = delete_keys(keys, s3=s3)
+    report["deleted_objects"] = len(keys) - len(errors)
+    report["errors"] = [f"{e.get('Key')}: {e.get('Message')}" for e in errors]
+    for error in report["errors"]:
+        logger.warning(f"Could not delete backup object {error}")
+    
+    if manifests:
+        collect_garbage(db, s3)
+    
+    logger.info(
+        f"Retention pruned {len(pruned)} of {len(rows)} backups "
+        f"({report['pruned_bytes']} bytes, {report['deleted_objects']} objects)"
+    )
+    return report
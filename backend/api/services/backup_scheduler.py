@@ -0,0 +1,382 @@
+import logging
+import random
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import func, or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from backend.core.config import get_settings
+from backend.core.database import WorkerSessionLocal
+from backend.api.models.models import BackupSlot, Client, ClientStatus
+from backend.api.services.backup_service import trigger_backup
+from backend.api.services.backup_retention import prune_backups
+from backend.api.services.provisioning import get_plan_resources
+from backend.api.services.s3_transfer import BandwidthLimiter, MB
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+SCHEDULED_BACKUP = "scheduled"
+GLOBAL_SLOTS = "all"
+
+BACKUP_INTERVALS = {
+    "hourly": timedelta(hours=1),
+    "daily": timedelta(days=1),
+    "weekly": timedelta(weeks=1),
+}
+
+
+def backup_interval(plan: str) -> timedelta:
+    frequency = get_plan_resources(plan or "basic").get("backup_frequency")
+    return BACKUP_INTERVALS.get(frequency, BACKUP_INTERVALS["daily"])
+
+
+def db_host(client: Client) -> str:
+    """Host serving the client's database; every tenant currently shares the external server"""
+    return settings.EXTERNAL_DB_HOST
+
+
+def host_slots(host: str) -> str:
+    return f"host:{host}"
+
+
+def next_backup_after(start: datetime, interval: timedelta) -> datetime:
+    """One interval after start, moved by up to BACKUP_SCHEDULE_JITTER of it either way"""
+    jitter = interval.total_seconds() * settings.BACKUP_SCHEDULE_JITTER
+    return start + interval + timedelta(seconds=random.uniform(-jitter, jitter))
+
+
+class DurationStats:
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.last: Optional[float] = None
+    
+    def record(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.last = seconds
+    
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "avg_seconds": round(self.total / self.count, 2) if self.count else None,
+            "max_seconds": round(self.max, 2),
+            "last_seconds": round(self.last, 2) if self.last is not None else None,
+        }
+
+
+class BackupScheduler:
+    """Runs each active client's backup on its plan's frequency, spread across the fleet.
+
+    New clients get a first slot at a random point within one interval, and
+    every later slot is one interval after the previous start, plus or minus
+    the jitter, so backups never line up on a shared wall-clock time.
+
+    Due backups start oldest-first. The limits hold across every API process:
+    a backup must claim one of BACKUP_MAX_CONCURRENT rows in backup_slots and
+    one of BACKUP_MAX_CONCURRENT_PER_DB_HOST for its database server, in the
+    same transaction as moving the client's next_backup forward. Each claim
+    is a conditional update, so two processes never get the same slot or the
+    same client. Claims are leased for BACKUP_CLAIM_LEASE seconds and
+    renewed on every pass while the dump runs, so a crashed process frees
+    its slots and clients once the lease lapses. The dumps in this process
+    share one BandwidthLimiter, set each pass to this process's share of
+    BACKUP_MAX_MB_PER_SEC by the backups it runs.
+    """
+    
+    def __init__(self):
+        self.limiter = BandwidthLimiter(settings.BACKUP_MAX_MB_PER_SEC * MB)
+        self.completed = 0
+        self.failed = 0
+        self.queue_wait = DurationStats()
+        self.run_time = DurationStats()
+        self._running: Dict[int, str] = {}
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._retention_due = 0.0
+        self._slot_scopes: Set[Tuple[str, int]] = set()
+        self.last_retention: Optional[Dict[str, Any]] = None
+    
+    @property
+    def busy(self) -> bool:
+        with self._lock:
+            return bool(self._running)
+    
+    def _schedule_new(self, db: Session, now: datetime) -> int:
+        clients = db.query(Client).filter(
+            Client.status == ClientStatus.ACTIVE.value,
+            Client.next_backup.is_(None)
+        ).all()
+        
+        for client in clients:
+            interval = backup_interval(client.plan)
+            client.next_backup = now + timedelta(seconds=random.uniform(0, interval.total_seconds()))
+        db.commit()
+        return len(clients)
+    
+    def _ensure_slots(self, db: Session, scope: str, count: int) -> None:
+        if (scope, count) in self._slot_scopes:
+            return
+        existing = {slot for (slot,) in db.query(BackupSlot.slot).filter(BackupSlot.scope == scope).all()}
+        missing = [{"scope": scope, "slot": slot} for slot in range(count) if slot not in existing]
+        if missing:
+            try:
+                db.bulk_insert_mappings(BackupSlot, missing)
+                db.commit()
+            except IntegrityError:
+                # Another process created them first
+                db.rollback()
+        self._slot_scopes.add((scope, count))
+    
+    @staticmethod
+    def _free(now: datetime):
+        return or_(BackupSlot.client_id.is_(None), BackupSlot.lease_until < now)
+    
+    def _free_slots(self, db: Session, scope: str, count: int, now: datetime) -> List[int]:
+        self._ensure_slots(db, scope, count)
+        return [slot_id for (slot_id,) in db.query(BackupSlot.id).filter(
+            BackupSlot.scope == scope,
+            BackupSlot.slot < count,
+            self._free(now)
+        ).order_by(BackupSlot.slot).all()]
+    
+    def _claim_slot(self, db: Session, scope: str, count: int, client_id: int, now: datetime, lease: datetime) -> bool:
+        for slot_id in self._free_slots(db, scope, count, now):
+            claimed = db.query(BackupSlot).filter(
+                BackupSlot.id == slot_id,
+                self._free(now)
+            ).update({
+                BackupSlot.client_id: client_id,
+                BackupSlot.lease_until: lease,
+            }, synchronize_session=False)
+            if claimed:
+                return True
+        return False
+    
+    def _claim(self, db: Session, client: Client, host: str, now: datetime) -> bool:
+        """Claim a slot in total, one on the client's database host and the client itself, or nothing"""
+        lease = now + timedelta(seconds=settings.BACKUP_CLAIM_LEASE)
+        claimed = (
+            self._claim_slot(db, GLOBAL_SLOTS, settings.BACKUP_MAX_CONCURRENT, client.id, now, lease)
+            and self._claim_slot(db, host_slots(host), settings.BACKUP_MAX_CONCURRENT_PER_DB_HOST, client.id, now, lease)
+            and db.query(Client).filter(
+                Client.id == client.id,
+                Client.next_backup == client.next_backup
+            ).update({Client.next_backup: lease}, synchronize_session=False)
+        )
+        if claimed:
+            db.commit()
+        else:
+            db.rollback()
+        return bool(claimed)
+    
+    def _renew_leases(self, db: Session, now: datetime) -> None:
+        """Extend the claims of the backups running here and rebalance this process's bandwidth share"""
+        with self._lock:
+            running = list(self._running)
+        
+        if running:
+            lease = now + timedelta(seconds=settings.BACKUP_CLAIM_LEASE)
+            db.query(BackupSlot).filter(BackupSlot.client_id.in_(running)).update(
+                {BackupSlot.lease_until: lease}, synchronize_session=False
+            )
+            db.query(Client).filter(Client.id.in_(running)).update(
+                {Client.next_backup: lease}, synchronize_session=False
+            )
+            db.commit()
+        
+        total = settings.BACKUP_MAX_MB_PER_SEC * MB
+        if total > 0 and running:
+            held = db.query(func.count(BackupSlot.id)).filter(
+                BackupSlot.scope == GLOBAL_SLOTS,
+                BackupSlot.client_id.isnot(None),
+                BackupSlot.lease_until >= now
+            ).scalar()
+            self.limiter.bytes_per_sec = total * len(running) / max(held, len(running))
+        else:
+            self.limiter.bytes_per_sec = total
+    
+    def dispatch(self, db: Session) -> int:
+        """Start as many due backups as the cluster-wide concurrency limits allow"""
+        now = datetime.utcnow()
+        self._schedule_new(db, now)
+        
+        free = len(self._free_slots(db, GLOBAL_SLOTS, settings.BACKUP_MAX_CONCURRENT, now))
+        if free <= 0:
+            return 0
+        
+        due = db.query(Client).filter(
+            Client.status == ClientStatus.ACTIVE.value,
+            Client.next_backup <= now
+        ).order_by(Client.next_backup).limit(free * 4).all()
+        
+        started = 0
+        for client in due:
+            with self._lock:
+                if client.id in self._running:
+                    continue
+            
+            host = db_host(client)
+            due_at = client.next_backup
+            if not self._claim(db, client, host, now):
+                continue
+            
+            with self._lock:
+                self._running[client.id] = host
+            self._executor.submit(self._run_backup, client.id, client.name, client.plan, due_at)
+            started += 1
+            if started >= free:
+                break
+        
+        if started:
+            self._renew_leases(db, now)
+        return started
+    
+    def _run_backup(self, client_id: int, client_name: str, plan: str, due_at: datetime) -> None:
+        started = datetime.utcnow()
+        wait = max((started - due_at).total_seconds(), 0.0)
+        result = {"success": False, "message": "not run"}
+        db = WorkerSessionLocal()
+        
+        try:
+            result = trigger_backup(client_name, SCHEDULED_BACKUP, db, limiter=self.limiter)
+        except Exception as e:
+            result = {"success": False, "message": str(e)}
+        finally:
+            finished = datetime.utcnow()
+            try:
+                self._finish(db, client_id, plan, started, finished, result["success"])
+            except Exception as e:
+                db.rollback()
+                logger.error(f"Could not reschedule backup for {client_name}: {e}")
+            finally:
+                db.close()
+            
+            with self._lock:
+                self._running.pop(client_id, None)
+                self.queue_wait.record(wait)
+                self.run_time.record((finished - started).total_seconds())
+                if result["success"]:
+                    self.completed += 1
+                else:
+                    self.failed += 1
+            self._wakeup.set()
+        
+        if result["success"]:
+            logger.info(f"Scheduled backup of {client_name} done after {wait:.0f}s in queue")
+        else:
+            logger.error(f"Scheduled backup of {client_name} failed: {result['message']}")
+    
+    def _finish(
+        self, db: Session, client_id: int, plan: str, started: datetime, finished: datetime, success: bool
+    ) -> None:
+        values = {}
+        if success:
+            values[Client.last_backup] = finished
+            values[Client.next_backup] = next_backup_after(started, backup_interval(plan))
+        else:
+            values[Client.next_backup] = finished + timedelta(seconds=settings.BACKUP_RETRY_DELAY)
+        
+        db.query(Client).filter(Client.id == client_id).update(values, synchronize_session=False)
+        db.query(BackupSlot).filter(BackupSlot.client_id == client_id).update({
+            BackupSlot.client_id: None,
+            BackupSlot.lease_until: None,
+        }, synchronize_session=False)
+        db.commit()
+    
+    def status(self, db: Session) -> Dict[str, Any]:
+        now = datetime.utcnow()
+        overdue = db.query(func.count(Client.id)).filter(
+            Client.status == ClientStatus.ACTIVE.value,
+            Client.next_backup <= now
+        ).scalar()
+        running_cluster = db.query(func.count(BackupSlot.id)).filter(
+            BackupSlot.scope == GLOBAL_SLOTS,
+            BackupSlot.client_id.isnot(None),
+            BackupSlot.lease_until >= now
+        ).scalar()
+        
+        with self._lock:
+            per_host = defaultdict(int)
+            for host in self._running.values():
+                per_host[host] += 1
+            return {
+                "enabled": settings.BACKUP_SCHEDULER_ENABLED,
+                "running": len(self._running),
+                "running_cluster": running_cluster,
+                "running_per_db_host": dict(per_host),
+                "overdue": overdue,
+                "completed": self.completed,
+                "failed": self.failed,
+                "queue_wait": self.queue_wait.snapshot(),
+                "run_time": self.run_time.snapshot(),
+                "bandwidth_limit_mbps": settings.BACKUP_MAX_MB_PER_SEC or None,
+                "bandwidth_share_mbps": round(self.limiter.bytes_per_sec / MB, 2) or None,
+                "throttled_seconds": round(self.limiter.throttled_seconds, 2),
+                "last_retention": self.last_retention,
+            }
+    
+    def _apply_retention(self, db: Session) -> None:
+        if not settings.BACKUP_RETENTION_ENABLED or time.monotonic() < self._retention_due:
+            return
+        self._retention_due = time.monotonic() + settings.BACKUP_RETENTION_INTERVAL
+        
+        report = prune_backups(db)
+        self.last_retention = {
+            "at": datetime.utcnow().isoformat(),
+            **{k: report[k] for k in ("backups", "pruned", "pruned_bytes", "deleted_objects", "errors")},
+        }
+    
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            db = WorkerSessionLocal()
+            try:
+                self._renew_leases(db, datetime.utcnow())
+                self.dispatch(db)
+                self._apply_retention(db)
+            except Exception as e:
+                logger.error(f"Backup dispatch failed: {e}")
+            finally:
+                db.close()
+            
+            self._wakeup.wait(settings.BACKUP_SCHEDULER_INTERVAL)
+            self._wakeup.clear()
+    
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(settings.BACKUP_MAX_CONCURRENT, 1), thread_name_prefix="backup"
+        )
+        self._thread = threading.Thread(target=self._run, name="backup-scheduler", daemon=True)
+        self._thread.start()
+    
+    def stop(self, timeout: float = 10.0) -> None:
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+        if self._executor:
+            # Running dumps are left to finish; if the process exits first
+            # their leases lapse and the clients are retried elsewhere
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+@lru_cache()
+def get_backup_scheduler() -> BackupScheduler:
+    return BackupScheduler()
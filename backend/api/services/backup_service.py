@@ -1,117 +1,354 @@
-import subprocess
 import os
+import hashlib
+import json
 import logging
-try:
-    import boto3
-    BOTO3_AVAILABLE = True
-except ImportError:
-    BOTO3_AVAILABLE = False
+import math
+import shutil
+import subprocess
+import tarfile
+import tempfile
+import time
+import httpx
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import List
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 from backend.core.config import get_settings
-from backend.api.models.models import Backup
+from backend.api.models.models import Backup, Client
 from backend.api.schemas.schemas import BackupResponse
+from backend.api.services.docker_client import get_docker_client, IterStream
+from backend.api.services.backup_codecs import (
+    EncodingWriter, decode_file, encryption_key, codec_available, backup_extension, CodecError, CODEC_NONE
+)
+from backend.api.services.backup_listing import page_backups, get_count_cache
+from backend.api.services.chunk_store import (
+    ChunkedBackupWriter, read_manifest, iter_chunks, release_chunks, collect_garbage
+)
+from backend.api.services.external_db import admin_server
+from backend.api.services.provisioning import (
+    create_staging_database, drop_staging_database, replace_external_database
+)
+from backend.api.services.s3_transfer import (
+    get_s3_client, download_file, delete_prefix, S3MultipartWriter, BandwidthLimiter, ThrottledWriter
+)
 from sqlalchemy.orm import Session
 
 settings = get_settings()
 logger = logging.getLogger(__name__)
 
+BACKUP_FORMAT_CUSTOM = "custom"
+BACKUP_FORMAT_DIRECTORY = "directory"
+BACKUP_FORMAT_CHUNKED = "chunked"
+MANIFEST_NAME = "manifest.json"
 
-def get_s3_client():
-    if not BOTO3_AVAILABLE:
-        logger.warning("boto3 not available, S3 operations will fail")
-        return None
-    return boto3.client(
-        's3',
-        endpoint_url=settings.S3_ENDPOINT,
-        aws_access_key_id=settings.S3_ACCESS_KEY,
-        aws_secret_access_key=settings.S3_SECRET_KEY,
-        region_name=settings.S3_REGION
-    )
+RESTORE_BLOCK = 1024 * 1024
+STDERR_TAIL = 2000
 
 
-def list_client_backups(client_name: str, db: Session) -> List[BackupResponse]:
-    backups = db.query(Backup).filter(
-        Backup.client_name == client_name
-    ).order_by(Backup.created_at.desc()).all()
+class BackupError(Exception):
+    pass
+
+
+def pg_restore_command(server: Dict[str, Any], args: List[str], volume: str = None, image: str = None) -> List[str]:
+    """pg_restore against server, run in a throwaway container so the host needs no client tools.
+
+    The archive comes in on stdin, or for directory format from volume
+    mounted at /dump. The bare -e copies PGPASSWORD from the environment
+    run_fed is given (see pg_env), so the password never shows up in the
+    process list.
+    """
+    cmd = ["docker", "run", "--rm", "-i", "--network", "host", "-e", "PGPASSWORD"]
+    if volume:
+        cmd += ["-v", f"{volume}:/dump:ro"]
+    return cmd + [
+        image or settings.BACKUP_RESTORE_IMAGE, "pg_restore",
+        "-h", server["host"], "-p", str(server["port"]), "-U", server["user"],
+        *args
+    ]
+
+
+def pg_env(server: Dict[str, Any]) -> Dict[str, str]:
+    return {**os.environ, "PGPASSWORD": server["password"] or ""}
+
+
+def run_fed(
+    cmd: List[str], source: Optional[Iterator[bytes]], timeout: float, env: Dict[str, str] = None
+) -> Tuple[int, str, str, int]:
+    """Run cmd with source streamed to its stdin; returns exit code, stdout, stderr and bytes fed.
+
+    Output goes to temporary files so a chatty process can never block on a
+    full pipe while we are still writing its input. If the process exits
+    before reading everything (pg_restore --list stops after the TOC), the
+    rest of the source is never fetched.
+    """
+    fed = 0
+    deadline = time.monotonic() + timeout
+    with tempfile.TemporaryFile() as out, tempfile.TemporaryFile() as err:
+        proc = subprocess.Popen(
+            cmd, stdin=subprocess.PIPE if source else subprocess.DEVNULL, stdout=out, stderr=err, env=env
+        )
+        try:
+            if source:
+                try:
+                    for block in source:
+                        if time.monotonic() > deadline:
+                            raise subprocess.TimeoutExpired(cmd, timeout)
+                        proc.stdin.write(block)
+                        fed += len(block)
+                except BrokenPipeError:
+                    pass
+                finally:
+                    if hasattr(source, "close"):
+                        source.close()
+                    try:
+                        proc.stdin.close()
+                    except BrokenPipeError:
+                        pass
+            proc.wait(max(deadline - time.monotonic(), 1))
+        except BaseException:
+            proc.kill()
+            proc.wait()
+            raise
+        
+        out.seek(0)
+        err.seek(0)
+        return proc.returncode, out.read().decode(errors="replace"), err.read().decode(errors="replace"), fed
+
+
+
+
+def list_client_backups(
+    client_name: str,
+    db: Session,
+    cursor: str = None,
+    limit: int = 50
+) -> Tuple[List[BackupResponse], Optional[str]]:
+    backups, next_cursor = page_backups(db, client_name, cursor, limit)
+    return [BackupResponse.model_validate(b) for b in backups], next_cursor
+
+
+def _parallel_jobs(client_name: str, db: Session = None) -> int:
+    """pg_dump/pg_restore worker count, one per CPU the client's plan allows"""
+    cpu_limit = None
+    if db:
+        cpu_limit = db.query(Client.cpu_limit).filter(Client.name == client_name).scalar()
+    cpu_limit = cpu_limit or settings.DEFAULT_CPU_LIMIT
+    return max(1, min(settings.BACKUP_MAX_PARALLEL_JOBS, math.ceil(cpu_limit)))
+
+
+def _record_backup(
+    db: Session,
+    client_name: str,
+    backup_type: str,
+    filename: str,
+    s3_key: str,
+    size_bytes: int,
+    checksum: str,
+    backup_format: str,
+    codec: str = None,
+    encrypted: bool = False
+) -> None:
+    if not db:
+        return
     
-    return [BackupResponse.model_validate(b) for b in backups]
+    db.add(Backup(
+        client_id=0,
+        client_name=client_name,
+        backup_type=backup_type,
+        filename=filename,
+        s3_key=s3_key,
+        size_mb=round(size_bytes / (1024 * 1024), 2),
+        size_bytes=size_bytes,
+        checksum=checksum,
+        format=backup_format,
+        codec=codec,
+        encrypted=encrypted,
+        status="completed",
+        completed_at=datetime.utcnow()
+    ))
+    db.commit()
+    get_count_cache().invalidate(client_name)
 
 
-def trigger_backup(client_name: str, backup_type: str = "manual", db: Session = None) -> dict:
-    timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
-    filename = f"{client_name}_{backup_type}_{timestamp}.sql.gz"
-    s3_key = f"{settings.S3_PREFIX}{client_name}/{filename}"
-    local_path = f"{settings.BACKUP_DIR}/{client_name}/{filename}"
+def _throttled(upload, limiter: Optional[BandwidthLimiter]):
+    return ThrottledWriter(upload, limiter) if limiter else upload
+
+
+def _encoder(upload, limiter: Optional[BandwidthLimiter], codec: str, key: Optional[bytes]) -> EncodingWriter:
+    # Throttling sits after the codec so the budget is spent on bytes sent
+    return EncodingWriter(_throttled(upload, limiter), codec, settings.BACKUP_CODEC_LEVEL, key)
+
+
+def _dump_custom(
+    docker, s3, client_name: str, s3_key: str, limiter: BandwidthLimiter = None,
+    codec: str = CODEC_NONE, key: bytes = None
+) -> Tuple[int, str]:
+    """pg_dump -Fc -Z0, compressed and encrypted by the codec pipeline on its way to S3"""
+    upload = S3MultipartWriter(s3, settings.S3_BUCKET, s3_key)
+    return _dump_stream(docker, client_name, upload, ["-Z0"], _encoder(upload, limiter, codec, key))
+
+
+def _dump_chunked(
+    docker, s3, db: Session, client_name: str, s3_key: str, limiter: BandwidthLimiter = None
+) -> Tuple[int, str]:
+    """pg_dump -Fc into content-defined chunks, uploading only chunks no earlier backup stored.
+
+    The dump is taken uncompressed (-Z0) so unchanged table data produces
+    identical bytes from one night to the next; each chunk is compressed on
+    its own before upload instead.
+    """
+    if not db:
+        raise BackupError("Chunked backups need a database session for chunk references")
+    upload = ChunkedBackupWriter(s3, db, s3_key)
+    return _dump_stream(docker, client_name, upload, ["-Z0"], _encoder(upload, limiter, CODEC_NONE, None))
+
+
+def _dump_stream(docker, client_name: str, upload, extra_args: List[str], encoder: EncodingWriter) -> Tuple[int, str]:
+    # pg_dump's stdout goes straight into the upload, so the dump never
+    # touches disk in the container or on the host
+    try:
+        exit_code, stderr = docker.exec_stream(
+            f"db_{client_name}",
+            ["pg_dump", "-U", f"odoo_{client_name.replace('-', '_')}", "-Fc", *extra_args],
+            encoder,
+            timeout=settings.BACKUP_DUMP_TIMEOUT
+        )
+        if exit_code != 0:
+            raise BackupError(f"Database dump failed: {stderr}")
+        encoder.finish()
+        upload.close()
+    except Exception:
+        upload.abort()
+        raise
     
-    os.makedirs(f"{settings.BACKUP_DIR}/{client_name}", exist_ok=True)
+    return upload.bytes_written, upload.checksum
+
+
+def _dump_directory(
+    docker, s3, client_name: str, s3_prefix: str, jobs: int, limiter: BandwidthLimiter = None,
+    codec: str = CODEC_NONE, key: bytes = None
+) -> Tuple[int, str]:
+    """pg_dump -Fd -j into the container, then ship each table file to its own S3 object.
+
+    Directory format cannot be written to stdout, so the dump lands in the
+    container's /tmp and is streamed back out as a tar archive, one member
+    (one table) per object under s3_prefix, plus a manifest. Each file goes
+    through the codec pipeline separately, so restore can decode them in
+    parallel.
+    """
+    container = f"db_{client_name}"
+    dump_dir = f"/tmp/{os.path.basename(s3_prefix.rstrip('/'))}"
     
     try:
-        dump_result = subprocess.run(
-            [
-                "docker", "exec", f"db_{client_name}",
-                "pg_dump", "-U", f"odoo_{client_name.replace('-', '_')}",
-                "-Fc", "-f", f"/var/lib/postgresql/data/{filename}"
-            ],
-            capture_output=True,
-            text=True,
-            timeout=300
+        exit_code, _, stderr = docker.exec_run(
+            container,
+            ["pg_dump", "-U", f"odoo_{client_name.replace('-', '_')}", "-Fd", "-Z0", "-j", str(jobs), "-f", dump_dir],
+            timeout=settings.BACKUP_DUMP_TIMEOUT
         )
+        if exit_code != 0:
+            raise BackupError(f"Database dump failed: {stderr}")
         
-        if dump_result.returncode != 0:
-            logger.error(f"Failed to dump database: {dump_result.stderr}")
-            return {"success": False, "message": f"Database dump failed: {dump_result.stderr}"}
-        
-        copy_result = subprocess.run(
-            [
-                "docker", "cp", f"db_{client_name}:/var/lib/postgresql/data/{filename}", local_path
-            ],
-            capture_output=True,
-            text=True,
-            timeout=120
-        )
-        
-        if copy_result.returncode != 0:
-            logger.error(f"Failed to copy backup: {copy_result.stderr}")
-            return {"success": False, "message": f"Copy failed: {copy_result.stderr}"}
-        
-        subprocess.run(
-            [
-                "docker", "exec", f"db_{client_name}", "rm", f"/var/lib/postgresql/data/{filename}"
-            ],
-            capture_output=True,
-            text=True
-        )
-        
-        s3 = get_s3_client()
-        if s3:
-            s3.upload_file(
-                local_path,
-                settings.S3_BUCKET,
-                s3_key
+        files = []
+        with tarfile.open(fileobj=IterStream(docker.get_archive(container, dump_dir)), mode="r|") as tar:
+            for member in tar:
+                if not member.isfile():
+                    continue
+                name = os.path.basename(member.name)
+                with S3MultipartWriter(s3, settings.S3_BUCKET, s3_prefix + name) as upload:
+                    encoder = _encoder(upload, limiter, codec, key)
+                    shutil.copyfileobj(tar.extractfile(member), encoder, 1024 * 1024)
+                    encoder.finish()
+                files.append({
+                    "name": name,
+                    "size": upload.bytes_written,
+                    "raw_size": encoder.bytes_in,
+                    "sha256": upload.checksum
+                })
+    finally:
+        docker.exec_run(container, ["rm", "-rf", dump_dir])
+    
+    manifest = json.dumps({
+        "format": BACKUP_FORMAT_DIRECTORY,
+        "jobs": jobs,
+        "codec": codec,
+        "encrypted": key is not None,
+        "files": files
+    }).encode()
+    s3.put_object(Bucket=settings.S3_BUCKET, Key=s3_prefix + MANIFEST_NAME, Body=manifest)
+    
+    return sum(f["size"] for f in files), hashlib.sha256(manifest).hexdigest()
+
+
+def trigger_backup(
+    client_name: str,
+    backup_type: str = "manual",
+    db: Session = None,
+    backup_format: str = None,
+    limiter: BandwidthLimiter = None
+) -> dict:
+    backup_format = backup_format or settings.BACKUP_FORMAT
+    timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
+    
+    # Chunks are compressed one by one in the chunk store and must stay
+    # unencrypted to deduplicate, so the pipeline only applies to the others
+    if backup_format == BACKUP_FORMAT_CHUNKED:
+        codec, key = None, None
+    else:
+        codec = settings.BACKUP_CODEC
+        if not codec_available(codec):
+            return {"success": False, "message": f"Backup codec {codec} is not available"}
+        try:
+            key = encryption_key()
+        except CodecError as e:
+            return {"success": False, "message": str(e)}
+    
+    if backup_format == BACKUP_FORMAT_DIRECTORY:
+        filename = f"{client_name}_{backup_type}_{timestamp}.dir"
+        s3_key = f"{settings.S3_PREFIX}{client_name}/{filename}/"
+    elif backup_format == BACKUP_FORMAT_CHUNKED:
+        filename = f"{client_name}_{backup_type}_{timestamp}.manifest.json"
+        s3_key = f"{settings.S3_PREFIX}{client_name}/{filename}"
+    else:
+        filename = f"{client_name}_{backup_type}_{timestamp}.dump{backup_extension(codec, key is not None)}"
+        s3_key = f"{settings.S3_PREFIX}{client_name}/{filename}"
+    
+    s3 = get_s3_client()
+    if not s3:
+        return {"success": False, "message": "S3 not available"}
+    
+    docker = get_docker_client()
+    
+    try:
+        if backup_format == BACKUP_FORMAT_DIRECTORY:
+            size_bytes, checksum = _dump_directory(
+                docker, s3, client_name, s3_key, _parallel_jobs(client_name, db), limiter, codec, key
             )
-            logger.info(f"Uploaded backup to S3: {s3_key}")
+        elif backup_format == BACKUP_FORMAT_CHUNKED:
+            size_bytes, checksum = _dump_chunked(docker, s3, db, client_name, s3_key, limiter)
+        else:
+            size_bytes, checksum = _dump_custom(docker, s3, client_name, s3_key, limiter, codec, key)
         
-        backup = Backup(
-            client_id=0,
-            client_name=client_name,
-            backup_type=backup_type,
-            filename=filename,
-            s3_key=s3_key,
-            size_mb=int(os.path.getsize(local_path) / (1024 * 1024)),
-            status="completed"
+        logger.info(f"Uploaded backup to S3: {s3_key} ({size_bytes} bytes)")
+        _record_backup(
+            db, client_name, backup_type, filename, s3_key, size_bytes, checksum, backup_format,
+            codec, key is not None
         )
         
-        if db:
-            db.add(backup)
-            db.commit()
-        
-        os.remove(local_path)
-        
         logger.info(f"Backup completed for {client_name}")
-        return {"success": True, "message": "Backup completed successfully", "filename": filename}
-        
-    except subprocess.TimeoutExpired:
+        return {
+            "success": True,
+            "message": "Backup completed successfully",
+            "filename": filename,
+            "format": backup_format,
+            "codec": codec,
+            "encrypted": key is not None,
+            "size_bytes": size_bytes,
+            "checksum": checksum
+        }
+    
+    except BackupError as e:
+        logger.error(f"Backup failed for {client_name}: {e}")
+        return {"success": False, "message": str(e)}
+    except httpx.TimeoutException:
         logger.error(f"Backup timed out for {client_name}")
         return {"success": False, "message": "Backup timed out"}
     except Exception as e:
@@ -119,6 +356,56 @@ def trigger_backup(client_name: str, backup_type: str = "manual", db: Session =
         return {"success": False, "message": str(e)}
 
 
+def decryption_key(encrypted: bool) -> Optional[bytes]:
+    if not encrypted:
+        return None
+    key = encryption_key()
+    if not key:
+        raise BackupError("Backup is encrypted but BACKUP_ENCRYPTION_KEY is not set")
+    return key
+
+
+def _download_decoded(s3, key: str, local_path: str, codec: Optional[str], encrypted: bool) -> None:
+    if (codec or CODEC_NONE) == CODEC_NONE and not encrypted:
+        download_file(key, local_path, s3=s3)
+        return
+    
+    encoded_path = local_path + ".download"
+    try:
+        download_file(key, encoded_path, s3=s3)
+        decode_file(encoded_path, local_path, codec, decryption_key(encrypted))
+    finally:
+        if os.path.exists(encoded_path):
+            os.remove(encoded_path)
+
+
+def download_directory(s3, s3_prefix: str, local_dir: str) -> dict:
+    manifest = json.loads(
+        s3.get_object(Bucket=settings.S3_BUCKET, Key=s3_prefix + MANIFEST_NAME)["Body"].read()
+    )
+    codec, encrypted = manifest.get("codec"), manifest.get("encrypted", False)
+    
+    # One object per table, so the largest table bounds the download time
+    with ThreadPoolExecutor(max_workers=settings.S3_MAX_CONCURRENCY) as pool:
+        list(pool.map(
+            lambda f: _download_decoded(
+                s3, s3_prefix + f["name"], os.path.join(local_dir, f["name"]), codec, encrypted
+            ),
+            manifest["files"]
+        ))
+    
+    return manifest
+
+
+def _read_blocks(path: str) -> Iterator[bytes]:
+    with open(path, "rb") as f:
+        while True:
+            block = f.read(RESTORE_BLOCK)
+            if not block:
+                break
+            yield block
+
+
 def restore_backup(client_name: str, backup_filename: str, db: Session) -> dict:
     backup = db.query(Backup).filter(
         Backup.filename == backup_filename,
@@ -128,60 +415,79 @@ def restore_backup(client_name: str, backup_filename: str, db: Session) -> dict:
     if not backup:
         return {"success": False, "message": "Backup record not found"}
     
+    client = db.query(Client).filter(Client.name == client_name).first()
+    if not client:
+        return {"success": False, "message": "Client not found"}
+    
     s3 = get_s3_client()
     if not s3:
         return {"success": False, "message": "S3 not available"}
     
+    is_directory = backup.format == BACKUP_FORMAT_DIRECTORY
+    local_path = os.path.join(tempfile.gettempdir(), backup_filename)
+    # pg_restore logs in as the tenant on the cluster its Odoo runs against,
+    # the same one the admin pool stages and swaps the database on, so
+    # everything it creates is owned by the tenant
+    server = {**admin_server(), "user": client.db_user, "password": client.db_password}
+    staging = None
+    
     try:
-        local_path = f"/tmp/{backup_filename}"
-        
-        s3.download_file(
-            settings.S3_BUCKET,
-            backup.s3_key,
-            local_path
-        )
-        
-        subprocess.run(
-            [
-                "docker", "exec", f"db_{client_name}",
-                "psql", "-U", f"odoo_{client_name.replace('-', '_')}",
-                "-c", f"DROP DATABASE IF EXISTS {f'odoo_{client_name.replace('-', '_')}'}"
-            ],
-            capture_output=True,
-            text=True
-        )
-        
-        subprocess.run(
-            [
-                "docker", "exec", f"db_{client_name}",
-                "createdb", "-U", f"odoo_{client_name.replace('-', '_')}",
-                f"odoo_{client_name.replace('-', '_')}"
-            ],
-            capture_output=True,
-            text=True
-        )
+        # The dump is restored into a staging database that only replaces the
+        # live one once pg_restore succeeds; a missing object, a corrupt dump
+        # or a failed restore leaves the client's data untouched
+        if backup.format == BACKUP_FORMAT_CHUNKED:
+            with open(local_path, "wb") as f:
+                for chunk in iter_chunks(s3, read_manifest(s3, backup.s3_key)):
+                    f.write(chunk)
+        elif is_directory:
+            os.makedirs(local_path, exist_ok=True)
+            download_directory(s3, backup.s3_key, local_path)
+        else:
+            _download_decoded(s3, backup.s3_key, local_path, backup.codec, backup.encrypted)
         
-        subprocess.run(
-            [
-                "docker", "exec", "-i", f"db_{client_name}",
-                "pg_restore", "-U", f"odoo_{client_name.replace('-', '_')}",
-                "-d", f"odoo_{client_name.replace('-', '_')}"
-            ],
-            stdin=open(local_path, 'rb'),
-            capture_output=True,
-            text=True,
-            timeout=600
-        )
+        staging = create_staging_database(client.db_name, client.db_user)
+        restore_args = ["--no-owner", "-d", staging]
+        if is_directory:
+            jobs = _parallel_jobs(client_name, db)
+            cmd = pg_restore_command(server, [*restore_args, "-Fd", "-j", str(jobs), "/dump"], local_path)
+            source = None
+        else:
+            cmd = pg_restore_command(server, restore_args)
+            source = _read_blocks(local_path)
         
-        if os.path.exists(local_path):
-            os.remove(local_path)
+        exit_code, _, stderr, _ = run_fed(cmd, source, settings.BACKUP_RESTORE_TIMEOUT, pg_env(server))
+        if exit_code != 0:
+            logger.error(f"pg_restore failed for {client_name}: {stderr[-STDERR_TAIL:]}")
+            return {"success": False, "message": f"pg_restore failed: {stderr[-STDERR_TAIL:]}"}
         
+        replace_external_database(client.db_name, staging)
+        staging = None
         logger.info(f"Restore completed for {client_name}")
         return {"success": True, "message": "Restore completed successfully"}
-        
+    
     except Exception as e:
         logger.error(f"Restore failed for {client_name}: {str(e)}")
         return {"success": False, "message": str(e)}
+    finally:
+        if staging:
+            drop_staging_database(staging)
+        if os.path.isdir(local_path):
+            shutil.rmtree(local_path, ignore_errors=True)
+        elif os.path.exists(local_path):
+            os.remove(local_path)
+
+
+def _release_chunked(db: Session, s3, s3_key: str) -> None:
+    """Drop a chunked backup's chunk references and its manifest, then collect unreferenced chunks"""
+    try:
+        manifest = read_manifest(s3, s3_key)
+    except s3.exceptions.NoSuchKey:
+        logger.warning(f"Manifest {s3_key} already gone, chunk references not released")
+        return
+    
+    release_chunks(db, [chunk_hash for chunk_hash, _ in manifest["chunks"]])
+    s3.delete_object(Bucket=settings.S3_BUCKET, Key=s3_key)
+    collect_garbage(db, s3)
 
 
 def delete_backup(backup_id: int, db: Session) -> dict:
@@ -193,7 +499,11 @@ def delete_backup(backup_id: int, db: Session) -> dict:
     try:
         if backup.s3_key:
             s3 = get_s3_client()
-            if s3:
+            if s3 and backup.format == BACKUP_FORMAT_DIRECTORY:
+                delete_prefix(backup.s3_key, s3=s3)
+            elif s3 and backup.format == BACKUP_FORMAT_CHUNKED:
+                _release_chunked(db, s3, backup.s3_key)
+            elif s3:
                 s3.delete_object(
                     Bucket=settings.S3_BUCKET,
                     Key=backup.s3_key
@@ -201,10 +511,11 @@ def delete_backup(backup_id: int, db: Session) -> dict:
         
         db.delete(backup)
         db.commit()
+        get_count_cache().invalidate(backup.client_name)
         
         logger.info(f"Deleted backup {backup_id}")
         return {"success": True, "message": "Backup deleted"}
-        
+    
     except Exception as e:
         db.rollback()
         logger.error(f"Failed to delete backup {backup_id}: {str(e)}")
@@ -213,15 +524,10 @@ def delete_backup(backup_id: int, db: Session) -> dict:
 
 def get_backup_status(client_name: str) -> dict:
     try:
-        result = subprocess.run(
-            ["docker", "ps", "--filter", f"name=odoo_{client_name}", "--format", "{{.Status}}"],
-            capture_output=True,
-            text=True,
-            check=True
-        )
+        containers = get_docker_client().list_containers(name=f"odoo_{client_name}")
         
         return {
-            "container_status": result.stdout.strip() or "not running",
+            "container_status": "\n".join(c.get("Status", "") for c in containers) or "not running",
             "last_backup": None,
             "next_scheduled": None
         }
@@ -0,0 +1,384 @@
+import logging
+import os
+import secrets
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+try:
+    from psycopg2 import sql
+except ImportError:
+    sql = None
+
+from backend.core.config import get_settings
+from backend.core.database import WorkerSessionLocal
+from backend.api.models.models import Backup
+from backend.api.services.backup_codecs import DecodingWriter
+from backend.api.services.backup_scheduler import get_backup_scheduler
+from backend.api.services.backup_service import (
+    BACKUP_FORMAT_CHUNKED, BACKUP_FORMAT_DIRECTORY, STDERR_TAIL, decryption_key, download_directory,
+    pg_env, pg_restore_command, run_fed
+)
+from backend.api.services.chunk_store import read_manifest, iter_chunks
+from backend.api.services.external_db import ExternalDBError, connect, scratch_server
+from backend.api.services.s3_transfer import get_s3_client, BandwidthLimiter, MB
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+VERIFY_RUNNING = "running"
+VERIFY_PASSED = "passed"
+VERIFY_FAILED = "failed"
+
+STREAM_BLOCK = MB
+
+
+class VerificationError(Exception):
+    pass
+
+
+class _Blocks:
+    def __init__(self):
+        self.blocks: List[bytes] = []
+    
+    def write(self, data: bytes) -> int:
+        self.blocks.append(data)
+        return len(data)
+    
+    def drain(self) -> List[bytes]:
+        blocks, self.blocks = self.blocks, []
+        return blocks
+
+
+def _object_stream(s3, backup: Backup, limiter: BandwidthLimiter) -> Iterator[bytes]:
+    """The decoded archive of a custom-format backup, read from S3 as it is consumed"""
+    body = s3.get_object(Bucket=settings.S3_BUCKET, Key=backup.s3_key)["Body"]
+    sink = _Blocks()
+    decoder = DecodingWriter(sink, backup.codec, decryption_key(backup.encrypted))
+    try:
+        for block in body.iter_chunks(STREAM_BLOCK):
+            limiter.consume(len(block))
+            decoder.write(block)
+            yield from sink.drain()
+        decoder.finish()
+        yield from sink.drain()
+    finally:
+        body.close()
+
+
+def _chunked_stream(s3, backup: Backup, limiter: BandwidthLimiter) -> Iterator[bytes]:
+    for chunk in iter_chunks(s3, read_manifest(s3, backup.s3_key), prefetch=2):
+        limiter.consume(len(chunk))
+        yield chunk
+
+
+def _pg_restore(args: List[str], volume: str = None) -> List[str]:
+    return pg_restore_command(scratch_server(), args, volume, settings.BACKUP_VERIFY_IMAGE)
+
+
+def _run_scratch(cmd: List[str], source: Optional[Iterator[bytes]]) -> Tuple[int, str, str, int]:
+    return run_fed(cmd, source, settings.BACKUP_VERIFY_TIMEOUT, pg_env(scratch_server()))
+
+
+def parse_toc(listing: str) -> Set[Tuple[str, str]]:
+    """(schema, table) of every TABLE DATA entry in pg_restore --list output"""
+    tables = set()
+    for line in listing.splitlines():
+        if line.startswith(";") or " TABLE DATA " not in line:
+            continue
+        parts = line.split(" TABLE DATA ", 1)[1].split()
+        if len(parts) >= 2:
+            tables.add((parts[0], parts[1]))
+    return tables
+
+
+def _create_scratch_database(name: str) -> None:
+    conn = connect(server=scratch_server())
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(sql.SQL("CREATE DATABASE {}").format(sql.Identifier(name)))
+    finally:
+        conn.close()
+
+
+def _drop_scratch_database(name: str) -> None:
+    try:
+        conn = connect(server=scratch_server())
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(
+                    "SELECT pg_terminate_backend(pid) FROM pg_stat_activity "
+                    "WHERE datname = %s AND pid <> pg_backend_pid()",
+                    [name]
+                )
+                cursor.execute(sql.SQL("DROP DATABASE IF EXISTS {}").format(sql.Identifier(name)))
+        finally:
+            conn.close()
+    except Exception as e:
+        logger.warning(f"Could not drop scratch database {name}: {e}")
+
+
+def _check_tables(name: str, toc: Set[Tuple[str, str]]) -> Dict[str, int]:
+    """Every table in the TOC exists, and every required table is there and has rows"""
+    conn = connect(name, server=scratch_server())
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT schemaname, tablename FROM pg_tables")
+            restored = set(cursor.fetchall())
+            missing = sorted(f"{schema}.{table}" for schema, table in toc - restored)
+            if missing:
+                raise VerificationError(f"{len(missing)} tables missing after restore: {', '.join(missing[:10])}")
+            
+            counts = {}
+            for table in filter(None, (t.strip() for t in settings.BACKUP_VERIFY_REQUIRED_TABLES.split(","))):
+                if ("public", table) not in toc:
+                    raise VerificationError(f"Required table {table} is not in the archive")
+                cursor.execute(sql.SQL("SELECT count(*) FROM {}").format(sql.Identifier("public", table)))
+                counts[table] = cursor.fetchone()[0]
+                if not counts[table]:
+                    raise VerificationError(f"Required table {table} is empty")
+            return counts
+    finally:
+        conn.close()
+
+
+class BackupVerifier:
+    """Test-restores a sample of recent completed backups into throwaway databases.
+
+    Each cycle picks unverified backups younger than BACKUP_VERIFY_MAX_AGE_DAYS
+    at random, claims them with a conditional update, and for each one:
+    reads the archive's TOC with pg_restore --list, streams the archive into
+    a fresh database on the scratch server, and checks that every table in
+    the TOC was restored and that the required Odoo tables have rows. The
+    verdict, duration and restore throughput go on the Backup row.
+
+    It runs at most BACKUP_VERIFY_MAX_CONCURRENT restores, reads from S3
+    through its own BandwidthLimiter, and starts nothing while scheduled
+    backups are running, so it only uses capacity the dumps leave idle.
+    """
+    
+    def __init__(self):
+        self.limiter = BandwidthLimiter(settings.BACKUP_VERIFY_MAX_MB_PER_SEC * MB)
+        self.passed = 0
+        self.failed = 0
+        self.deferred = 0
+        self._running: Set[int] = set()
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    def _claim(self, db: Session, backup_id: int) -> bool:
+        claimed = db.query(Backup).filter(
+            Backup.id == backup_id,
+            Backup.verify_status.is_(None)
+        ).update({
+            Backup.verify_status: VERIFY_RUNNING,
+            Backup.verified_at: datetime.utcnow(),
+        }, synchronize_session=False)
+        db.commit()
+        return bool(claimed)
+    
+    def _release_stale(self, db: Session) -> None:
+        # Claims left behind by a process that died mid-restore
+        cutoff = datetime.utcnow() - timedelta(seconds=2 * settings.BACKUP_VERIFY_TIMEOUT)
+        db.query(Backup).filter(
+            Backup.verify_status == VERIFY_RUNNING,
+            Backup.verified_at < cutoff
+        ).update({Backup.verify_status: None}, synchronize_session=False)
+        db.commit()
+    
+    def dispatch(self, db: Session) -> int:
+        self._release_stale(db)
+        if get_backup_scheduler().busy:
+            self.deferred += 1
+            return 0
+        
+        with self._lock:
+            free = settings.BACKUP_VERIFY_MAX_CONCURRENT - len(self._running)
+        if free <= 0:
+            return 0
+        
+        since = datetime.utcnow() - timedelta(days=settings.BACKUP_VERIFY_MAX_AGE_DAYS)
+        candidates = db.query(Backup.id).filter(
+            Backup.status == "completed",
+            Backup.verify_status.is_(None),
+            Backup.s3_key.isnot(None),
+            Backup.created_at >= since
+        ).order_by(func.random()).limit(free).all()
+        
+        started = 0
+        for (backup_id,) in candidates:
+            if not self._claim(db, backup_id):
+                continue
+            with self._lock:
+                self._running.add(backup_id)
+            self._executor.submit(self._verify_job, backup_id)
+            started += 1
+        return started
+    
+    def verify(self, db: Session, backup: Backup, s3=None) -> Dict[str, Any]:
+        """Restore one backup into a scratch database and record the outcome on it"""
+        s3 = s3 or get_s3_client()
+        scratch_db = f"verify_{backup.id}_{secrets.token_hex(4)}"
+        started = time.monotonic()
+        restored_bytes = 0
+        local_dir = None
+        result: Dict[str, Any] = {"backup_id": backup.id, "filename": backup.filename}
+        
+        try:
+            if backup.format == BACKUP_FORMAT_DIRECTORY:
+                local_dir = tempfile.mkdtemp(prefix="verify_")
+                download_directory(s3, backup.s3_key, local_dir)
+                restored_bytes = sum(
+                    os.path.getsize(os.path.join(local_dir, f)) for f in os.listdir(local_dir)
+                )
+                list_cmd, list_source = _pg_restore(["--list", "/dump"], local_dir), None
+                restore_args = ["-Fd", "-j", str(max(settings.BACKUP_VERIFY_PARALLEL_JOBS, 1)), "/dump"]
+                restore_source = None
+            else:
+                stream = _chunked_stream if backup.format == BACKUP_FORMAT_CHUNKED else _object_stream
+                list_cmd, list_source = _pg_restore(["--list"]), stream(s3, backup, self.limiter)
+                restore_args = []
+                restore_source = stream(s3, backup, self.limiter)
+            
+            code, listing, stderr, _ = _run_scratch(list_cmd, list_source)
+            if code != 0:
+                raise VerificationError(f"pg_restore --list failed: {stderr[-STDERR_TAIL:]}")
+            toc = parse_toc(listing)
+            if not toc:
+                raise VerificationError("Archive contains no table data")
+            
+            _create_scratch_database(scratch_db)
+            code, _, stderr, fed = _run_scratch(
+                _pg_restore(["--no-owner", "--no-privileges", "-d", scratch_db, *restore_args], local_dir),
+                restore_source
+            )
+            restored_bytes = restored_bytes or fed
+            if code != 0:
+                raise VerificationError(f"pg_restore failed: {stderr[-STDERR_TAIL:]}")
+            
+            result["row_counts"] = _check_tables(scratch_db, toc)
+            result["tables"] = len(toc)
+            status, error = VERIFY_PASSED, None
+        except Exception as e:
+            status, error = VERIFY_FAILED, str(e)
+        finally:
+            if local_dir:
+                shutil.rmtree(local_dir, ignore_errors=True)
+            _drop_scratch_database(scratch_db)
+        
+        seconds = time.monotonic() - started
+        backup.verify_status = status
+        backup.verify_error = error
+        backup.verified_at = datetime.utcnow()
+        backup.verify_seconds = round(seconds, 2)
+        backup.verify_mbps = round(restored_bytes / MB / seconds, 2) if seconds and restored_bytes else None
+        db.commit()
+        
+        result.update({
+            "status": status,
+            "error": error,
+            "seconds": backup.verify_seconds,
+            "throughput_mbps": backup.verify_mbps,
+        })
+        return result
+    
+    def _verify_job(self, backup_id: int) -> None:
+        db = WorkerSessionLocal()
+        try:
+            backup = db.query(Backup).filter(Backup.id == backup_id).first()
+            result = self.verify(db, backup)
+            with self._lock:
+                if result["status"] == VERIFY_PASSED:
+                    self.passed += 1
+                else:
+                    self.failed += 1
+            if result["status"] == VERIFY_PASSED:
+                logger.info(f"Backup {backup.filename} verified in {result['seconds']}s")
+            else:
+                logger.error(f"Backup {backup.filename} failed verification: {result['error']}")
+        except Exception as e:
+            db.rollback()
+            db.query(Backup).filter(Backup.id == backup_id).update(
+                {Backup.verify_status: None}, synchronize_session=False
+            )
+            db.commit()
+            logger.error(f"Verification of backup {backup_id} did not run: {e}")
+        finally:
+            db.close()
+            with self._lock:
+                self._running.discard(backup_id)
+    
+    def status(self, db: Session) -> Dict[str, Any]:
+        counts = dict(db.query(Backup.verify_status, func.count(Backup.id)).filter(
+            Backup.verify_status.isnot(None)
+        ).group_by(Backup.verify_status).all())
+        averages = db.query(func.avg(Backup.verify_seconds), func.avg(Backup.verify_mbps)).filter(
+            Backup.verify_status == VERIFY_PASSED
+        ).one()
+        
+        with self._lock:
+            return {
+                "enabled": settings.BACKUP_VERIFY_ENABLED,
+                "running": len(self._running),
+                "passed": counts.get(VERIFY_PASSED, 0),
+                "failed": counts.get(VERIFY_FAILED, 0),
+                "passed_since_start": self.passed,
+                "failed_since_start": self.failed,
+                "deferred_cycles": self.deferred,
+                "avg_seconds": round(averages[0], 2) if averages[0] else None,
+                "avg_throughput_mbps": round(averages[1], 2) if averages[1] else None,
+            }
+    
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            db = WorkerSessionLocal()
+            try:
+                self.dispatch(db)
+            except Exception as e:
+                logger.error(f"Backup verification dispatch failed: {e}")
+            finally:
+                db.close()
+            
+            self._wakeup.wait(settings.BACKUP_VERIFY_INTERVAL)
+            self._wakeup.clear()
+    
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        try:
+            scratch_server()
+        except ExternalDBError as e:
+            logger.error(f"Backup verification not started: {e}")
+            return
+        self._stop.clear()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(settings.BACKUP_VERIFY_MAX_CONCURRENT, 1), thread_name_prefix="backup-verify"
+        )
+        self._thread = threading.Thread(target=self._run, name="backup-verifier", daemon=True)
+        self._thread.start()
+    
+    def stop(self, timeout: float = 10.0) -> None:
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+        if self._executor:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+@lru_cache()
+def get_backup_verifier() -> BackupVerifier:
+    return BackupVerifier()
@@ -0,0 +1,455 @@
+import hashlib
+import json
+import logging
+import random
+import time
+import zlib
+from collections import Counter, defaultdict, deque
+from concurrent.futures import Future
+from datetime import datetime, timedelta
+from typing import Deque, Dict, Iterable, Iterator, List, Set, Tuple
+
+from sqlalchemy import delete, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+try:
+    import numpy
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+from backend.core.config import get_settings
+from backend.api.models.models import BackupChunk
+from backend.api.services.s3_transfer import get_part_executor, get_transfer_metrics, delete_keys, UPLOAD
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+MANIFEST_FORMAT = "chunked"
+SQL_BATCH = 500
+
+# Gear table for the rolling hash; fixed seed so boundaries are stable across runs
+_gear_random = random.Random(0x6f646f6f)
+_GEAR = [_gear_random.getrandbits(64) for _ in range(256)]
+_MASK64 = (1 << 64) - 1
+_GEAR_ARRAY = numpy.array(_GEAR, dtype=numpy.uint64) if NUMPY_AVAILABLE else None
+
+# A byte's gear value is shifted out of the 64-bit hash 64 bytes later
+GEAR_WINDOW = 64
+SCAN_BLOCK = 32 * 1024
+
+
+class ChunkStoreError(Exception):
+    pass
+
+
+def chunk_key(chunk_hash: str) -> str:
+    return f"{settings.BACKUP_CHUNK_PREFIX}{chunk_hash[:2]}/{chunk_hash}"
+
+
+def _batches(items: list, size: int = SQL_BATCH) -> Iterator[list]:
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def _gear_hashes(data: bytes) -> "numpy.ndarray":
+    """The rolling hash after each byte of data, as if hashing started at data[0].
+
+    Each hash is the sum of the last 64 gear values, each shifted by its
+    distance from the current byte. Doubling the summed window six times
+    gives every position at once, instead of stepping byte by byte.
+    """
+    hashes = _GEAR_ARRAY.take(numpy.frombuffer(data, dtype=numpy.uint8))
+    width = 1
+    while width < GEAR_WINDOW:
+        hashes[width:] += hashes[:-width] << numpy.uint64(width)
+        width *= 2
+    return hashes
+
+
+class Chunker:
+    """Content-defined chunking with a gear rolling hash (FastCDC-style).
+
+    A boundary is cut where the high bits of the hash are all zero, so an
+    insert or delete early in a dump only changes the chunks around it and
+    later chunks keep their hashes. Bytes before min_size are not hashed
+    (cut-point skipping) and chunks never exceed max_size. With numpy the
+    buffer is hashed SCAN_BLOCK bytes at a time; the cut points are the
+    same as those of the byte-by-byte loop.
+    """
+    
+    def __init__(self, avg_size: int = None):
+        avg_size = avg_size or settings.BACKUP_CHUNK_AVG_KB * 1024
+        bits = max(avg_size.bit_length() - 1, 8)
+        self.avg_size = 1 << bits
+        self.min_size = self.avg_size // 4
+        self.max_size = self.avg_size * 4
+        self._mask = (self.avg_size - 1) << (64 - bits)
+        self._buffer = bytearray()
+        self._scanned = 0
+        self._hash = 0
+    
+    def _find_cut(self) -> int:
+        if NUMPY_AVAILABLE:
+            return self._find_cut_blocks()
+        
+        buffer = self._buffer
+        end = min(len(buffer), self.max_size)
+        position = max(self._scanned, self.min_size)
+        h, mask, gear = self._hash, self._mask, _GEAR
+        
+        while position < end:
+            h = ((h << 1) + gear[buffer[position]]) & _MASK64
+            position += 1
+            if not h & mask:
+                self._hash, self._scanned = 0, 0
+                return position
+        
+        if end == self.max_size:
+            self._hash, self._scanned = 0, 0
+            return end
+        
+        self._hash, self._scanned = h, position
+        return 0
+    
+    def _find_cut_blocks(self) -> int:
+        buffer = self._buffer
+        end = min(len(buffer), self.max_size)
+        position = max(self._scanned, self.min_size)
+        mask = numpy.uint64(self._mask)
+        
+        while position < end:
+            # Hashing restarts at min_size, so the window reaches back no
+            # further; past that, 63 bytes of context make each hash exact
+            start = max(position - (GEAR_WINDOW - 1), self.min_size)
+            stop = min(position + SCAN_BLOCK, end)
+            hashes = _gear_hashes(bytes(buffer[start:stop]))[position - start:]
+            hits = numpy.flatnonzero((hashes & mask) == 0)
+            if len(hits):
+                self._scanned = 0
+                return position + int(hits[0]) + 1
+            position = stop
+        
+        if end == self.max_size:
+            self._scanned = 0
+            return end
+        
+        self._scanned = position
+        return 0
+    
+    def feed(self, data: bytes) -> Iterator[bytes]:
+        self._buffer += data
+        while True:
+            cut = self._find_cut()
+            if not cut:
+                return
+            chunk = bytes(self._buffer[:cut])
+            del self._buffer[:cut]
+            yield chunk
+    
+    def finish(self) -> Iterator[bytes]:
+        yield from self.feed(b"")
+        if self._buffer:
+            yield bytes(self._buffer)
+            self._buffer = bytearray()
+
+
+class ChunkedBackupWriter:
+    """File-like sink that stores a dump as deduplicated chunks plus a manifest.
+
+    Each chunk is addressed by its SHA-256. Chunks still referenced in
+    backup_chunks are only referenced again, on close. Others are claimed
+    (their row created, or revived from a refcount of zero) before they are
+    compressed and uploaded on the shared part executor, with bounded
+    in-flight uploads. collect_garbage holds a chunk's row until its object
+    is gone, so an upload can never be followed by GC deleting it. The
+    manifest is written last. A failure releases every reference taken, so
+    a manifest never points at a chunk that garbage collection may remove.
+    """
+    
+    def __init__(self, s3, db: Session, manifest_key: str, bucket: str = None, max_in_flight: int = None):
+        self.s3 = s3
+        self.db = db
+        self.bucket = bucket or settings.S3_BUCKET
+        self.manifest_key = manifest_key
+        self.max_in_flight = max(max_in_flight or settings.S3_MAX_CONCURRENCY, 1)
+        self.bytes_written = 0
+        self.bytes_uploaded = 0
+        self._hash = hashlib.sha256()
+        self._chunker = Chunker()
+        self._chunks: List[Tuple[str, int]] = []
+        self._known: Set[str] = set()
+        self._new: Dict[str, Tuple[int, int]] = {}
+        self._referenced: List[str] = []
+        self._pending: Deque[Future] = deque()
+        self._started = time.monotonic()
+        self.closed = False
+    
+    @property
+    def checksum(self) -> str:
+        return self._hash.hexdigest()
+    
+    @property
+    def new_chunks(self) -> int:
+        return len(self._new)
+    
+    def writable(self) -> bool:
+        return True
+    
+    def write(self, data: bytes) -> int:
+        self._hash.update(data)
+        self.bytes_written += len(data)
+        for chunk in self._chunker.feed(data):
+            self._add_chunk(chunk)
+        return len(data)
+    
+    def _exists(self, chunk_hash: str) -> bool:
+        if chunk_hash in self._known or chunk_hash in self._new:
+            return True
+        # A released chunk may be collected at any moment, so it counts as
+        # absent and is claimed and uploaded again
+        if self.db.query(BackupChunk.hash).filter(
+            BackupChunk.hash == chunk_hash,
+            BackupChunk.refcount > 0
+        ).first():
+            self._known.add(chunk_hash)
+            return True
+        return False
+    
+    def _claim(self, chunk_hash: str, size: int, stored_size: int) -> None:
+        for _ in range(3):
+            try:
+                revived = self.db.query(BackupChunk).filter(BackupChunk.hash == chunk_hash).update({
+                    BackupChunk.refcount: BackupChunk.refcount + 1,
+                    BackupChunk.stored_size: stored_size,
+                    BackupChunk.released_at: None,
+                }, synchronize_session=False)
+                if not revived:
+                    self.db.add(BackupChunk(hash=chunk_hash, size=size, stored_size=stored_size, refcount=1))
+                self.db.commit()
+                self._referenced.append(chunk_hash)
+                return
+            except IntegrityError:
+                # Another backup recorded the chunk first; the retry increments its row
+                self.db.rollback()
+        raise ChunkStoreError(f"Could not claim backup chunk {chunk_hash}")
+    
+    def _upload(self, chunk_hash: str, payload: bytes) -> None:
+        self.s3.put_object(Bucket=self.bucket, Key=chunk_key(chunk_hash), Body=payload)
+    
+    def _add_chunk(self, chunk: bytes) -> None:
+        chunk_hash = hashlib.sha256(chunk).hexdigest()
+        self._chunks.append((chunk_hash, len(chunk)))
+        if self._exists(chunk_hash):
+            return
+        
+        payload = zlib.compress(chunk, settings.BACKUP_CHUNK_COMPRESSION_LEVEL)
+        self._claim(chunk_hash, len(chunk), len(payload))
+        self._new[chunk_hash] = (len(chunk), len(payload))
+        self.bytes_uploaded += len(payload)
+        
+        while len(self._pending) >= self.max_in_flight:
+            self._pending.popleft().result()
+        self._pending.append(get_part_executor().submit(self._upload, chunk_hash, payload))
+    
+    def _add_references(self) -> None:
+        """Reference the chunks shared with earlier backups; those uploaded here were claimed already"""
+        hashes = sorted({chunk_hash for chunk_hash, _ in self._chunks} - set(self._new))
+        
+        for batch in _batches(hashes):
+            referenced = [chunk_hash for (chunk_hash,) in self.db.execute(
+                update(BackupChunk).where(BackupChunk.hash.in_(batch)).values(
+                    refcount=BackupChunk.refcount + 1,
+                    released_at=None
+                ).returning(BackupChunk.hash).execution_options(synchronize_session=False)
+            )]
+            self.db.commit()
+            self._referenced.extend(referenced)
+            if len(referenced) < len(batch):
+                raise ChunkStoreError(
+                    f"{len(batch) - len(referenced)} chunks of {self.manifest_key} were garbage "
+                    "collected while the backup ran"
+                )
+    
+    def close(self) -> None:
+        if self.closed:
+            return
+        
+        try:
+            for chunk in self._chunker.finish():
+                self._add_chunk(chunk)
+            while self._pending:
+                self._pending.popleft().result()
+            
+            self._add_references()
+            manifest = {
+                "format": MANIFEST_FORMAT,
+                "compression": "zlib",
+                "size": self.bytes_written,
+                "sha256": self.checksum,
+                "chunks": self._chunks,
+            }
+            self.s3.put_object(Bucket=self.bucket, Key=self.manifest_key, Body=json.dumps(manifest).encode())
+        except Exception:
+            self.abort()
+            raise
+        
+        self.closed = True
+        seconds = time.monotonic() - self._started
+        get_transfer_metrics().record(UPLOAD, self.bytes_uploaded, seconds)
+        logger.info(
+            f"Stored {self.manifest_key}: {len(self._chunks)} chunks, {len(self._new)} new, "
+            f"{self.bytes_written} bytes dumped, {self.bytes_uploaded} uploaded"
+        )
+    
+    def abort(self) -> None:
+        if self.closed:
+            return
+        self.closed = True
+        for future in self._pending:
+            future.cancel()
+        self._pending.clear()
+        get_transfer_metrics().record(UPLOAD, 0, 0, success=False)
+        
+        # Chunks uploaded here lose their only reference and are collected
+        # once the grace period has passed
+        if self._referenced:
+            try:
+                self.db.rollback()
+                release_chunks(self.db, self._referenced)
+            except Exception as e:
+                logger.warning(f"Could not release chunk references of {self.manifest_key}: {e}")
+            self._referenced = []
+    
+    def __enter__(self) -> "ChunkedBackupWriter":
+        return self
+    
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def read_manifest(s3, manifest_key: str, bucket: str = None) -> dict:
+    body = s3.get_object(Bucket=bucket or settings.S3_BUCKET, Key=manifest_key)["Body"].read()
+    return json.loads(body)
+
+
+def iter_chunks(s3, manifest: dict, bucket: str = None, prefetch: int = None) -> Iterator[bytes]:
+    """Yield a manifest's chunks in order, fetching up to prefetch ahead.
+
+    Each chunk is checked against its hash, and the whole stream against the
+    manifest's size and checksum once the last chunk has been handed over.
+    """
+    bucket = bucket or settings.S3_BUCKET
+    prefetch = max(prefetch or settings.S3_MAX_CONCURRENCY, 1)
+    chunks = iter(manifest["chunks"])
+    pending: Deque[Tuple[str, Future]] = deque()
+    whole = hashlib.sha256()
+    size = 0
+    
+    def fetch(chunk_hash: str) -> bytes:
+        data = zlib.decompress(s3.get_object(Bucket=bucket, Key=chunk_key(chunk_hash))["Body"].read())
+        if hashlib.sha256(data).hexdigest() != chunk_hash:
+            raise ValueError(f"Chunk {chunk_hash} is corrupt")
+        return data
+    
+    try:
+        while True:
+            while len(pending) < prefetch:
+                entry = next(chunks, None)
+                if entry is None:
+                    break
+                pending.append((entry[0], get_part_executor().submit(fetch, entry[0])))
+            if not pending:
+                if size != manifest["size"] or whole.hexdigest() != manifest["sha256"]:
+                    raise ValueError("Reassembled dump does not match its manifest")
+                return
+            data = pending.popleft()[1].result()
+            whole.update(data)
+            size += len(data)
+            yield data
+    finally:
+        for _, future in pending:
+            future.cancel()
+
+
+def _drop_references(db: Session, hashes: List[str], references: int, now: datetime) -> None:
+    for batch in _batches(hashes):
+        db.query(BackupChunk).filter(BackupChunk.hash.in_(batch)).update({
+            BackupChunk.refcount: BackupChunk.refcount - references,
+        }, synchronize_session=False)
+        db.query(BackupChunk).filter(
+            BackupChunk.hash.in_(batch),
+            BackupChunk.refcount <= 0,
+            BackupChunk.released_at.is_(None)
+        ).update({BackupChunk.released_at: now}, synchronize_session=False)
+
+
+def release_chunks(db: Session, hashes: Iterable[str]) -> None:
+    """Drop one reference per distinct hash, marking chunks that reach zero as released"""
+    _drop_references(db, sorted(set(hashes)), 1, datetime.utcnow())
+    db.commit()
+
+
+def release_manifests(db: Session, manifests: Iterable[dict]) -> None:
+    """Drop the references held by several manifests at once, without committing.
+
+    Chunks shared by n of the manifests lose n references in one update, so
+    the caller can commit this together with deleting the backup rows.
+    """
+    references = Counter()
+    for manifest in manifests:
+        references.update({chunk_hash for chunk_hash, _ in manifest["chunks"]})
+    
+    by_count: Dict[int, List[str]] = defaultdict(list)
+    for chunk_hash, count in references.items():
+        by_count[count].append(chunk_hash)
+    
+    now = datetime.utcnow()
+    for count, hashes in by_count.items():
+        _drop_references(db, sorted(hashes), count, now)
+
+
+def collect_garbage(db: Session, s3, bucket: str = None) -> int:
+    """Delete chunks that have been unreferenced for longer than the grace period.
+
+    The grace period covers backups still running: they may have decided a
+    chunk exists before its last reference was dropped. Each batch of rows
+    is deleted first and stays locked until the objects are gone, so a
+    backup claiming one of those chunks waits, finds no row and uploads the
+    chunk afresh.
+    """
+    bucket = bucket or settings.S3_BUCKET
+    cutoff = datetime.utcnow() - timedelta(hours=settings.BACKUP_CHUNK_GC_GRACE_HOURS)
+    hashes = [h for (h,) in db.query(BackupChunk.hash).filter(
+        BackupChunk.refcount <= 0,
+        BackupChunk.released_at < cutoff
+    ).all()]
+    collected = 0
+    
+    for batch in _batches(hashes, 1000):
+        deleted = []
+        for rows in _batches(batch):
+            deleted += [h for (h,) in db.execute(
+                delete(BackupChunk).where(
+                    BackupChunk.hash.in_(rows),
+                    BackupChunk.refcount <= 0,
+                    BackupChunk.released_at < cutoff
+                ).returning(BackupChunk.hash).execution_options(synchronize_session=False)
+            )]
+        try:
+            errors = delete_keys([chunk_key(h) for h in deleted], bucket=bucket, s3=s3)
+            if errors:
+                logger.warning(f"Could not delete {len(errors)} backup chunk objects: {errors[:3]}")
+        finally:
+            # Committed even if S3 failed part-way: an object without a row
+            # only wastes space, a row without its object loses data
+            db.commit()
+        collected += len(deleted)
+    
+    if collected:
+        logger.info(f"Garbage collected {collected} backup chunks")
+    return collected
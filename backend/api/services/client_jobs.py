@@ -0,0 +1,235 @@
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from typing import Set
+
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session
+
+from backend.core.config import get_settings
+from backend.api.models.models import Client, ClientStatus, ActivityLog, Job, JobStatus, ProvisioningMetric
+from backend.api.services.login_probe import get_login_prober
+from backend.api.services.job_queue import job_handler, update_job_progress, enqueue_job
+from backend.api.services.db_templates import (
+    find_template, DB_METHOD_TEMPLATE, DB_METHOD_EMPTY, DB_METHOD_STANDBY
+)
+from backend.api.services.warm_pool import get_warm_pool
+from backend.api.services.port_allocator import release_ports
+from backend.api.services.provisioning import (
+    create_external_database, create_client_directories, create_docker_compose,
+    create_env_file, create_nginx_config, start_client_stack, reload_nginx,
+    request_ssl_certificate, stop_client_stack, remove_client_stack,
+    remove_nginx_config, delete_external_databases
+)
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+PROVISION_CLIENT = "provision_client"
+ACTIVATE_CLIENT = "activate_client"
+RESUME_CLIENT = "resume_client"
+CLEANUP_CLIENTS = "cleanup_clients"
+PROBE_FIRST_LOGIN = "probe_first_login"
+
+PROGRESS_EVERY = 10
+
+
+def _get_client(db: Session, job: Job) -> Client:
+    client = db.query(Client).filter(Client.id == job.client_id).first()
+    if not client:
+        raise RuntimeError(f"Client {job.client_id} not found")
+    return client
+
+
+def _log(db: Session, job: Job, client: Client, action: str, details: str) -> None:
+    db.add(ActivityLog(
+        user_id=job.user_id,
+        client_id=client.id,
+        action=action,
+        details=details
+    ))
+
+
+@job_handler(PROVISION_CLIENT)
+def provision_client(db: Session, job: Job, payload: dict) -> dict:
+    client = _get_client(db, job)
+    
+    started = time.monotonic()
+    standby = get_warm_pool().claim(db, client)
+    if standby:
+        db_created, template, db_method = True, standby.template_name, DB_METHOD_STANDBY
+    else:
+        template = find_template(client.plan)
+        db_method = DB_METHOD_TEMPLATE if template else DB_METHOD_EMPTY
+        db_created = create_external_database(client.db_name, client.db_user, client.db_password, template)
+        if not db_created:
+            logger.warning(f"Could not create external database for {client.name}")
+    
+    db.add(ProvisioningMetric(
+        client_id=client.id,
+        db_method=db_method,
+        template_name=template,
+        db_create_seconds=round(time.monotonic() - started, 3)
+    ))
+    
+    create_client_directories(client.name)
+    create_docker_compose(client, client.db_password)
+    create_env_file(client, client.db_password, settings.S3_ACCESS_KEY, settings.S3_SECRET_KEY)
+    
+    _log(db, job, client, "create", f"Created pending client {client.name} - awaiting payment")
+    db.commit()
+    
+    return {"client": client.name, "database_created": db_created, "db_method": db_method}
+
+
+@job_handler(ACTIVATE_CLIENT)
+def activate_client(db: Session, job: Job, payload: dict) -> dict:
+    client = _get_client(db, job)
+    
+    if client.status == ClientStatus.ACTIVE.value:
+        return {"client": client.name, "message": "Client is already active"}
+    
+    started_at = time.time()
+    if not start_client_stack(client.name):
+        raise RuntimeError("Failed to start client services")
+    
+    client.status = ClientStatus.ACTIVE.value
+    client.activated_at = datetime.utcnow()
+    
+    create_nginx_config(client)
+    reload_nginx(f"activate {client.name}")
+    
+    ssl_issued = False
+    try:
+        ssl_issued = request_ssl_certificate(client.domain, settings.SMTP_FROM)
+        reload_nginx(f"ssl {client.domain}")
+    except Exception as e:
+        logger.warning(f"SSL certificate not ready: {e}")
+    
+    _log(db, job, client, "activate", f"Activated client {client.name}")
+    db.commit()
+    
+    enqueue_job(db, PROBE_FIRST_LOGIN, client_id=client.id, payload={"started_at": started_at})
+    
+    return {"client": client.name, "ssl_issued": ssl_issued}
+
+
+@job_handler(PROBE_FIRST_LOGIN)
+def probe_first_login(db: Session, job: Job, payload: dict) -> dict:
+    """Hand a newly started client to the login prober, which waits off the job pool"""
+    client = _get_client(db, job)
+    get_login_prober().watch(client.id, client.name, client.odoo_port, payload["started_at"])
+    return {"client": client.name, "watching": True}
+
+
+@job_handler(RESUME_CLIENT)
+def resume_client(db: Session, job: Job, payload: dict) -> dict:
+    client = _get_client(db, job)
+    
+    if not start_client_stack(client.name):
+        raise RuntimeError("Failed to resume client")
+    
+    client.status = ClientStatus.ACTIVE.value
+    client.suspended_at = None
+    
+    _log(db, job, client, "resume", f"Resumed client {client.name}")
+    db.commit()
+    
+    return {"client": client.name}
+
+
+def unpaid_expired(now: datetime):
+    return and_(Client.status == ClientStatus.PENDING.value, Client.payment_deadline < now)
+
+
+def deletion_due(now: datetime):
+    return and_(Client.status == ClientStatus.SCHEDULED_FOR_DELETION.value, Client.deletion_scheduled_at < now)
+
+
+def pending_cleanup_ids(db: Session) -> Set[int]:
+    """Client ids already named by a queued or running cleanup job"""
+    ids: Set[int] = set()
+    for (payload,) in db.query(Job.payload).filter(
+        Job.job_type == CLEANUP_CLIENTS,
+        Job.status.in_([JobStatus.QUEUED.value, JobStatus.RUNNING.value])
+    ).all():
+        ids.update(json.loads(payload or "{}").get("client_ids") or [])
+    return ids
+
+
+def _teardown_client(client_name: str) -> None:
+    # Removal is forced, so it is tried even if the stop failed; the nginx
+    # config stays until the containers are really gone
+    stopped = stop_client_stack(client_name)
+    if not remove_client_stack(client_name):
+        raise RuntimeError("containers not removed")
+    if not stopped:
+        raise RuntimeError("containers not stopped cleanly before removal")
+    remove_nginx_config(client_name)
+
+
+@job_handler(CLEANUP_CLIENTS)
+def cleanup_clients(db: Session, job: Job, payload: dict) -> dict:
+    """Tear down a batch of clients that are still due for cleanup.
+
+    The expiry predicates are checked again here, so a client who paid or
+    cancelled the deletion after the job was queued is left alone. Container
+    stacks are removed in parallel on CLEANUP_WORKERS threads, then databases
+    are dropped over one admin connection, ports are released and client
+    rows are marked deleted in bulk, and nginx is reloaded once. A client
+    whose stack could not be torn down keeps its database, ports and status,
+    so the next cleanup run tries it again.
+    """
+    now = datetime.utcnow()
+    clients = db.query(Client.id, Client.name, Client.db_name, Client.db_user).filter(
+        Client.id.in_(payload.get("client_ids") or []),
+        or_(unpaid_expired(now), deletion_due(now))
+    ).all()
+    
+    update_job_progress(db, job, 0, len(clients))
+    errors = {}
+    torn_down = []
+    
+    with ThreadPoolExecutor(max_workers=max(settings.CLEANUP_WORKERS, 1)) as pool:
+        futures = {pool.submit(_teardown_client, client.name): client for client in clients}
+        for done, future in enumerate(as_completed(futures), 1):
+            client = futures[future]
+            try:
+                future.result()
+                torn_down.append(client)
+            except Exception as e:
+                logger.warning(f"Teardown of {client.name} failed: {e}")
+                errors[client.name] = str(e)
+            if done % PROGRESS_EVERY == 0:
+                update_job_progress(db, job, done)
+    
+    dropped = delete_external_databases([(client.db_name, client.db_user) for client in torn_down])
+    for client in torn_down:
+        if not dropped.get(client.db_name):
+            errors.setdefault(client.name, "database not dropped")
+    
+    names = [client.name for client in torn_down]
+    release_ports(db, names)
+    
+    if torn_down:
+        reload_nginx(f"cleanup {len(torn_down)} clients")
+    
+    db.query(Client).filter(Client.id.in_([client.id for client in torn_down])).update(
+        {Client.status: ClientStatus.DELETED.value}, synchronize_session=False
+    )
+    db.bulk_insert_mappings(ActivityLog, [{
+        "user_id": job.user_id,
+        "client_id": client.id,
+        "action": "cleanup",
+        "details": f"Auto-deleted client: {client.name}",
+    } for client in torn_down])
+    job.progress_done = len(clients)
+    db.commit()
+    
+    return {
+        "deleted": len(torn_down),
+        "clients": names,
+        "errors": errors,
+    }
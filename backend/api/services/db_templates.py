@@ -0,0 +1,243 @@
+import argparse
+import json
+import logging
+import os
+import secrets
+import subprocess
+import time
+import uuid
+from typing import Optional
+
+try:
+    from psycopg2 import sql
+except ImportError:
+    sql = None
+
+from backend.core.config import get_settings
+from backend.api.models.models import PlanType
+from backend.api.services.external_db import get_admin_pool, database_connection
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+DB_METHOD_TEMPLATE = "template"
+DB_METHOD_EMPTY = "empty"
+DB_METHOD_STANDBY = "standby"
+
+
+def template_name(plan: str, version: str = None) -> str:
+    version = (version or settings.ODOO_VERSION).replace(".", "_")
+    return f"odoo_tpl_{version}_{plan}"
+
+
+def _database_exists(cursor, name: str, template_only: bool = False) -> bool:
+    query = "SELECT 1 FROM pg_database WHERE datname = %s"
+    if template_only:
+        query += " AND datistemplate"
+    cursor.execute(query, [name])
+    return cursor.fetchone() is not None
+
+
+def _drop_database(cursor, name: str) -> None:
+    if not _database_exists(cursor, name):
+        return
+    cursor.execute(sql.SQL("ALTER DATABASE {} WITH IS_TEMPLATE false ALLOW_CONNECTIONS true").format(
+        sql.Identifier(name)
+    ))
+    cursor.execute(
+        "SELECT pg_terminate_backend(pid) FROM pg_stat_activity "
+        "WHERE datname = %s AND pid <> pg_backend_pid()",
+        [name]
+    )
+    cursor.execute(sql.SQL("DROP DATABASE {}").format(sql.Identifier(name)))
+
+
+def find_template(plan: str, version: str = None) -> Optional[str]:
+    """Name of the golden template for a plan, or None to create an empty database"""
+    if not settings.ODOO_TEMPLATE_DB_ENABLED or sql is None:
+        return None
+    
+    name = template_name(plan, version)
+    try:
+        with get_admin_pool().cursor() as cursor:
+            if _database_exists(cursor, name, template_only=True):
+                return name
+    except Exception as e:
+        logger.warning(f"Could not look up template {name}: {e}")
+    return None
+
+
+# Objects inside the current database owned by a role, as (kind, quoted
+# name) pairs for ALTER ... OWNER. Indexes and column-owned sequences follow
+# their table and cannot be altered on their own.
+_OWNED_OBJECTS = """
+WITH owner AS (SELECT oid FROM pg_roles WHERE rolname = %(owner)s)
+SELECT 'SCHEMA', quote_ident(n.nspname)
+FROM pg_namespace n, owner WHERE n.nspowner = owner.oid
+UNION ALL
+SELECT CASE c.relkind
+           WHEN 'S' THEN 'SEQUENCE' WHEN 'v' THEN 'VIEW'
+           WHEN 'm' THEN 'MATERIALIZED VIEW' WHEN 'f' THEN 'FOREIGN TABLE' ELSE 'TABLE'
+       END,
+       format('%%I.%%I', n.nspname, c.relname)
+FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace, owner
+WHERE c.relowner = owner.oid
+  AND c.relkind IN ('r', 'p', 'S', 'v', 'm', 'f')
+  AND NOT EXISTS (
+      SELECT 1 FROM pg_depend d
+      WHERE d.classid = 'pg_class'::regclass AND d.objid = c.oid AND d.deptype IN ('a', 'i')
+  )
+UNION ALL
+SELECT CASE p.prokind WHEN 'p' THEN 'PROCEDURE' WHEN 'a' THEN 'AGGREGATE' ELSE 'FUNCTION' END,
+       p.oid::regprocedure::text
+FROM pg_proc p, owner WHERE p.proowner = owner.oid
+UNION ALL
+SELECT CASE t.typtype WHEN 'd' THEN 'DOMAIN' ELSE 'TYPE' END, t.oid::regtype::text
+FROM pg_type t, owner WHERE t.typowner = owner.oid AND t.typtype IN ('d', 'e', 'r')
+"""
+
+
+def finalize_clone(db_name: str, db_user: str) -> None:
+    """Hand a cloned database to its tenant and give it its own identity.
+
+    Objects in the template belong to ODOO_TEMPLATE_OWNER, and Odoo keys
+    sessions and the publisher warranty on database.uuid/secret, which would
+    otherwise be shared by every tenant cloned from the same template.
+    Ownership moves object by object rather than with REASSIGN OWNED, which
+    would also hand the tenant every template database that role owns.
+    
+    The template's filestore was thrown away with the container that built
+    it, so attachments stored as files are deleted; Odoo regenerates the
+    asset bundles among them on first request.
+    """
+    with database_connection(db_name) as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("BEGIN")
+            try:
+                cursor.execute(_OWNED_OBJECTS, {"owner": settings.ODOO_TEMPLATE_OWNER})
+                for kind, name in cursor.fetchall():
+                    cursor.execute(sql.SQL("ALTER {} {} OWNER TO {}").format(
+                        sql.SQL(kind),
+                        sql.SQL(name),
+                        sql.Identifier(db_user)
+                    ))
+                for key, value in [
+                    ("database.uuid", str(uuid.uuid1())),
+                    ("database.secret", str(uuid.uuid4())),
+                    ("database.create_date", time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime())),
+                ]:
+                    cursor.execute(
+                        "UPDATE ir_config_parameter SET value = %s WHERE key = %s",
+                        [value, key]
+                    )
+                cursor.execute("SELECT to_regclass('ir_attachment') IS NOT NULL")
+                if cursor.fetchone()[0]:
+                    cursor.execute("DELETE FROM ir_attachment WHERE store_fname IS NOT NULL")
+                cursor.execute("COMMIT")
+            except Exception:
+                cursor.execute("ROLLBACK")
+                raise
+
+
+def _run_odoo_init(db_name: str, password: str, modules: str, version: str) -> None:
+    subprocess.run(
+        [
+            "docker", "run", "--rm", "--network", "host",
+            "-e", f"HOST={settings.EXTERNAL_DB_HOST}",
+            "-e", f"PORT={settings.EXTERNAL_DB_PORT}",
+            "-e", f"USER={settings.ODOO_TEMPLATE_OWNER}",
+            # Bare -e copies PASSWORD from env below, keeping it out of argv
+            "-e", "PASSWORD",
+            f"odoo:{version}", "--",
+            "-d", db_name, "-i", modules,
+            "--without-demo=all", "--stop-after-init"
+        ],
+        check=True,
+        capture_output=True,
+        timeout=settings.ODOO_TEMPLATE_BUILD_TIMEOUT,
+        env={**os.environ, "PASSWORD": password}
+    )
+
+
+def build_template(plan: str, modules: str = None, version: str = None) -> dict:
+    """Initialize Odoo into a scratch database and swap it in as the plan's template.
+
+    The previous template stays usable until the new one is fully built, so a
+    failed refresh never leaves signups without a template.
+    """
+    version = version or settings.ODOO_VERSION
+    modules = modules or settings.ODOO_TEMPLATE_MODULES
+    name = template_name(plan, version)
+    build_name = f"{name}_build"
+    owner = settings.ODOO_TEMPLATE_OWNER
+    password = secrets.token_urlsafe(24)
+    
+    with get_admin_pool().cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_roles WHERE rolname = %s", [owner])
+        verb = "ALTER" if cursor.fetchone() else "CREATE"
+        cursor.execute(sql.SQL(verb + " ROLE {} WITH LOGIN PASSWORD %s").format(
+            sql.Identifier(owner)
+        ), [password])
+        _drop_database(cursor, build_name)
+        cursor.execute(sql.SQL("CREATE DATABASE {} OWNER {}").format(
+            sql.Identifier(build_name),
+            sql.Identifier(owner)
+        ))
+    
+    started = time.monotonic()
+    try:
+        _run_odoo_init(build_name, password, modules, version)
+    except Exception:
+        with get_admin_pool().cursor() as cursor:
+            _drop_database(cursor, build_name)
+        raise
+    finally:
+        with get_admin_pool().cursor() as cursor:
+            cursor.execute(sql.SQL("ALTER ROLE {} WITH NOLOGIN").format(sql.Identifier(owner)))
+    init_seconds = time.monotonic() - started
+    
+    with get_admin_pool().cursor() as cursor:
+        _drop_database(cursor, name)
+        cursor.execute(sql.SQL("ALTER DATABASE {} RENAME TO {}").format(
+            sql.Identifier(build_name),
+            sql.Identifier(name)
+        ))
+        cursor.execute(sql.SQL("ALTER DATABASE {} WITH IS_TEMPLATE true ALLOW_CONNECTIONS false").format(
+            sql.Identifier(name)
+        ))
+    
+    logger.info(f"Built template {name} ({modules}) in {init_seconds:.1f}s")
+    return {
+        "template": name,
+        "plan": plan,
+        "version": version,
+        "modules": modules,
+        "init_seconds": round(init_seconds, 2),
+    }
+
+
+def drop_template(plan: str, version: str = None) -> None:
+    with get_admin_pool().cursor() as cursor:
+        _drop_database(cursor, template_name(plan, version))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build or refresh golden Odoo template databases")
+    parser.add_argument("action", choices=["build", "drop", "list"])
+    parser.add_argument("--plan", action="append", choices=[p.value for p in PlanType],
+                        help="Plan to act on (repeatable, default: all plans)")
+    parser.add_argument("--modules", help=f"Modules to install (default: {settings.ODOO_TEMPLATE_MODULES})")
+    parser.add_argument("--version", help=f"Odoo version (default: {settings.ODOO_VERSION})")
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.INFO)
+    plans = args.plan or [p.value for p in PlanType]
+    
+    for plan in plans:
+        if args.action == "build":
+            print(json.dumps(build_template(plan, args.modules, args.version)))
+        elif args.action == "drop":
+            drop_template(plan, args.version)
+            print(f"Dropped {template_name(plan, args.version)}")
+        else:
+            print(f"{template_name(plan, args.version)}: {'ready' if find_template(plan, args.version) else 'missing'}")
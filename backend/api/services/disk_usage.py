@@ -0,0 +1,166 @@
+import logging
+import os
+import threading
+import time
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from backend.core.config import get_settings
+from backend.core.database import WorkerSessionLocal
+from backend.api.models.models import Client, ClientStatus
+from backend.api.services.docker_client import get_docker_client
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+
+def _allocated_bytes(st: os.stat_result) -> int:
+    # Match du, which counts allocated blocks rather than apparent size
+    blocks = getattr(st, "st_blocks", None)
+    return blocks * 512 if blocks is not None else st.st_size
+
+
+class DiskUsageIndexer:
+    """Per-client disk usage, rescanned incrementally with os.scandir.
+
+    Each directory is cached with its mtime, the bytes of the files directly
+    in it and its subdirectories. On an incremental pass a directory whose
+    mtime has not changed is not listed again, so only new or removed entries
+    cost a scandir. Every DISK_USAGE_FULL_SCAN_EVERY passes everything is
+    re-listed to pick up files that grew in place.
+    """
+    
+    def __init__(self):
+        self._dirs: Dict[str, Tuple[int, int, List[str]]] = {}
+        self._usage: Dict[str, Tuple[int, float]] = {}
+        self._volume_paths: Dict[str, Optional[str]] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._passes = 0
+    
+    def _scan_tree(self, root: str, full: bool) -> int:
+        total = 0
+        stack = [root]
+        
+        while stack:
+            path = stack.pop()
+            try:
+                mtime = os.stat(path, follow_symlinks=False).st_mtime_ns
+            except OSError:
+                self._dirs.pop(path, None)
+                continue
+            
+            cached = self._dirs.get(path)
+            if cached and not full and cached[0] == mtime:
+                file_bytes, subdirs = cached[1], cached[2]
+            else:
+                file_bytes, subdirs = 0, []
+                try:
+                    with os.scandir(path) as entries:
+                        for entry in entries:
+                            try:
+                                if entry.is_dir(follow_symlinks=False):
+                                    subdirs.append(entry.path)
+                                elif entry.is_file(follow_symlinks=False):
+                                    file_bytes += _allocated_bytes(entry.stat(follow_symlinks=False))
+                            except OSError:
+                                continue
+                except OSError as e:
+                    logger.debug(f"Cannot scan {path}: {e}")
+                self._dirs[path] = (mtime, file_bytes, subdirs)
+            
+            total += file_bytes
+            stack.extend(subdirs)
+        
+        return total
+    
+    def _volume_path(self, client_name: str) -> Optional[str]:
+        if client_name not in self._volume_paths:
+            try:
+                volume = get_docker_client().inspect_volume(f"odoo_{client_name}_data")
+            except Exception:
+                return None
+            self._volume_paths[client_name] = volume.get("Mountpoint")
+        return self._volume_paths[client_name]
+    
+    def client_paths(self, client_name: str) -> List[str]:
+        paths = [os.path.join(settings.ODOO_DATA_DIR, client_name)]
+        volume_path = self._volume_path(client_name)
+        if volume_path:
+            paths.append(volume_path)
+        return [p for p in paths if os.path.isdir(p)]
+    
+    def scan_client(self, client_name: str, full: bool = False) -> int:
+        with self._lock:
+            total = sum(self._scan_tree(path, full) for path in self.client_paths(client_name))
+            usage_mb = int(total / (1024 * 1024))
+            self._usage[client_name] = (usage_mb, time.time())
+            return usage_mb
+    
+    def cached_usage(self, client_name: str) -> Optional[Tuple[int, float]]:
+        return self._usage.get(client_name)
+    
+    def forget(self, client_name: str) -> None:
+        with self._lock:
+            self._usage.pop(client_name, None)
+            roots = [os.path.join(settings.ODOO_DATA_DIR, client_name), self._volume_paths.pop(client_name, None)]
+            for root in filter(None, roots):
+                for path in [p for p in self._dirs if p == root or p.startswith(root + os.sep)]:
+                    del self._dirs[path]
+    
+    def scan_all(self, db: Session, full: bool = False) -> int:
+        clients = db.query(Client.id, Client.name, Client.disk_usage_mb).filter(
+            Client.status != ClientStatus.DELETED.value
+        ).all()
+        
+        updates = []
+        for client_id, client_name, current_mb in clients:
+            usage_mb = self.scan_client(client_name, full)
+            if usage_mb != current_mb:
+                updates.append({"id": client_id, "disk_usage_mb": usage_mb})
+        
+        if updates:
+            db.bulk_update_mappings(Client, updates)
+            db.commit()
+        
+        self._passes += 1
+        return len(updates)
+    
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            full = self._passes % max(settings.DISK_USAGE_FULL_SCAN_EVERY, 1) == 0
+            started = time.time()
+            db = WorkerSessionLocal()
+            try:
+                updated = self.scan_all(db, full)
+                logger.info(
+                    f"Disk usage {'full' if full else 'incremental'} scan updated {updated} clients "
+                    f"in {time.time() - started:.2f}s"
+                )
+            except Exception as e:
+                logger.error(f"Disk usage scan failed: {e}")
+            finally:
+                db.close()
+            
+            self._stop.wait(settings.DISK_USAGE_SCAN_INTERVAL)
+    
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="disk-usage-indexer", daemon=True)
+        self._thread.start()
+    
+    def stop(self, timeout: float = 10.0) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+
+@lru_cache()
+def get_disk_usage_indexer() -> DiskUsageIndexer:
+    return DiskUsageIndexer()
@@ -0,0 +1,506 @@
+import io
+import json
+import logging
+import os
+import tarfile
+import time
+from functools import lru_cache
+from typing import Any, AsyncIterator, BinaryIO, Dict, Iterable, Iterator, List, Tuple
+
+import httpx
+
+from backend.core.config import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+CLIENT_LABEL = "com.odoo-cloud.client"
+COMPOSE_PROJECT_LABEL = "com.docker.compose.project"
+
+STDOUT = 1
+STDERR = 2
+
+EXEC_POLL_INTERVAL = 0.1
+
+
+class DockerError(Exception):
+    def __init__(self, status_code: int, message: str):
+        super().__init__(f"Docker API error {status_code}: {message}")
+        self.status_code = status_code
+        self.message = message
+
+
+def _raise_for_status(response: httpx.Response) -> None:
+    if response.status_code < 400:
+        return
+    try:
+        message = response.json().get("message", response.text)
+    except Exception:
+        # Streamed responses may not have been read yet
+        try:
+            message = response.text
+        except Exception:
+            message = response.reason_phrase
+    raise DockerError(response.status_code, message)
+
+
+def _filters(**filters) -> str:
+    return json.dumps({
+        key: value if isinstance(value, list) else [value]
+        for key, value in filters.items()
+        if value is not None
+    })
+
+
+def _base_url() -> str:
+    return f"http://docker/{settings.DOCKER_API_VERSION}"
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=settings.DOCKER_POOL_SIZE,
+        max_keepalive_connections=settings.DOCKER_POOL_SIZE,
+        keepalive_expiry=60
+    )
+
+
+def compose_project_name(client_name: str) -> str:
+    return "".join(c for c in client_name.lower() if c.isalnum() or c in "-_")
+
+
+def demux_stream(chunks: Iterable[bytes]) -> Iterator[Tuple[int, bytes]]:
+    """Split Docker's multiplexed exec/attach stream into (stream, payload) frames"""
+    buffer = b""
+    for chunk in chunks:
+        buffer += chunk
+        while len(buffer) >= 8:
+            size = int.from_bytes(buffer[4:8], "big")
+            if len(buffer) < 8 + size:
+                break
+            yield buffer[0], buffer[8:8 + size]
+            buffer = buffer[8 + size:]
+
+
+def _read_chunks(path: str, chunk_size: int) -> Iterator[bytes]:
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+
+
+def _tar_entry(arcname: str, size: int, chunks: Iterable[bytes]) -> Iterator[bytes]:
+    info = tarfile.TarInfo(arcname)
+    info.size = size
+    info.mtime = int(time.time())
+    info.mode = 0o644
+    yield info.tobuf(format=tarfile.GNU_FORMAT)
+    
+    written = 0
+    for chunk in chunks:
+        written += len(chunk)
+        yield chunk
+    if written != size:
+        raise ValueError(f"{arcname}: expected {size} bytes, got {written}")
+    
+    yield b"\0" * ((512 - size % 512) % 512)
+
+
+def _tar_member(path: str, arcname: str, chunk_size: int) -> Iterator[bytes]:
+    return _tar_entry(arcname, os.path.getsize(path), _read_chunks(path, chunk_size))
+
+
+def tar_stream(path: str, arcname: str, chunk_size: int = 1024 * 1024) -> Iterator[bytes]:
+    """Stream a file, or a flat directory of files, as a tar archive without writing the archive to disk"""
+    if os.path.isdir(path):
+        info = tarfile.TarInfo(arcname)
+        info.type = tarfile.DIRTYPE
+        info.mtime = int(time.time())
+        info.mode = 0o755
+        yield info.tobuf(format=tarfile.GNU_FORMAT)
+        for name in sorted(os.listdir(path)):
+            yield from _tar_member(os.path.join(path, name), f"{arcname}/{name}", chunk_size)
+    else:
+        yield from _tar_member(path, arcname, chunk_size)
+    
+    yield b"\0" * 1024
+
+
+def tar_stream_chunks(arcname: str, size: int, chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """Stream a single file of known size, produced on the fly, as a tar archive"""
+    yield from _tar_entry(arcname, size, chunks)
+    yield b"\0" * 1024
+
+
+class IterStream(io.RawIOBase):
+    """Read-only file object over an iterator of byte chunks, e.g. for tarfile's stream mode"""
+    
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks = iter(chunks)
+        self._pending = b""
+    
+    def readable(self) -> bool:
+        return True
+    
+    def readinto(self, buffer) -> int:
+        while not self._pending:
+            try:
+                self._pending = next(self._chunks)
+            except StopIteration:
+                return 0
+        size = min(len(buffer), len(self._pending))
+        buffer[:size] = self._pending[:size]
+        self._pending = self._pending[size:]
+        return size
+
+
+def _format_bytes(value: float, binary: bool) -> str:
+    base = 1024.0 if binary else 1000.0
+    units = ["B", "KiB", "MiB", "GiB", "TiB"] if binary else ["B", "kB", "MB", "GB", "TB"]
+    for unit in units[:-1]:
+        if value < base:
+            return f"{value:.4g}{unit}"
+        value /= base
+    return f"{value:.4g}{units[-1]}"
+
+
+def parse_stats(stats: Dict[str, Any]) -> Dict[str, float]:
+    cpu_stats = stats.get("cpu_stats") or {}
+    precpu_stats = stats.get("precpu_stats") or {}
+    
+    cpu_delta = (cpu_stats.get("cpu_usage", {}).get("total_usage", 0)
+                 - precpu_stats.get("cpu_usage", {}).get("total_usage", 0))
+    system_delta = cpu_stats.get("system_cpu_usage", 0) - precpu_stats.get("system_cpu_usage", 0)
+    online_cpus = (cpu_stats.get("online_cpus")
+                   or len(cpu_stats.get("cpu_usage", {}).get("percpu_usage") or [])
+                   or 1)
+    cpu_percent = 0.0
+    # The first frame of a stats stream has no previous sample to diff against
+    if precpu_stats.get("system_cpu_usage") and system_delta > 0 and cpu_delta > 0:
+        cpu_percent = (cpu_delta / system_delta) * online_cpus * 100.0
+    
+    memory_stats = stats.get("memory_stats") or {}
+    inner = memory_stats.get("stats") or {}
+    memory_usage = memory_stats.get("usage", 0) - inner.get("inactive_file", inner.get("cache", 0))
+    memory_limit = memory_stats.get("limit", 0)
+    memory_percent = memory_usage / memory_limit * 100.0 if memory_limit else 0.0
+    
+    rx_bytes = sum(n.get("rx_bytes", 0) for n in (stats.get("networks") or {}).values())
+    tx_bytes = sum(n.get("tx_bytes", 0) for n in (stats.get("networks") or {}).values())
+    
+    return {
+        "cpu_percent": cpu_percent,
+        "memory_usage": max(memory_usage, 0),
+        "memory_limit": memory_limit,
+        "memory_percent": memory_percent,
+        "rx_bytes": rx_bytes,
+        "tx_bytes": tx_bytes,
+        "pids": (stats.get("pids_stats") or {}).get("current", 0),
+    }
+
+
+def format_container_stats(container: Dict[str, Any], stats: Dict[str, Any]) -> dict:
+    """Render Engine API stats in the same shape `docker stats` used to produce"""
+    return format_parsed_stats(container, parse_stats(stats))
+
+
+def format_parsed_stats(container: Dict[str, Any], parsed: Dict[str, float]) -> dict:
+    names = container.get("Names") or [""]
+    
+    return {
+        "container_id": container.get("Id", "")[:12],
+        "name": names[0].lstrip("/"),
+        "status": container.get("Status", ""),
+        "cpu_percent": f"{parsed['cpu_percent']:.2f}%",
+        "memory_usage": f"{_format_bytes(parsed['memory_usage'], True)} / {_format_bytes(parsed['memory_limit'], True)}",
+        "memory_percent": f"{parsed['memory_percent']:.2f}%",
+        "network_io": f"{_format_bytes(parsed['rx_bytes'], False)} / {_format_bytes(parsed['tx_bytes'], False)}",
+        "pids": str(parsed["pids"]),
+    }
+
+
+class DockerClient:
+    """Docker Engine API client over the unix socket with a keep-alive connection pool"""
+    
+    def __init__(self, socket_path: str = None, timeout: float = None):
+        self._client = httpx.Client(
+            transport=httpx.HTTPTransport(
+                uds=socket_path or settings.DOCKER_SOCKET_PATH,
+                limits=_limits(),
+                retries=1
+            ),
+            base_url=_base_url(),
+            timeout=timeout or settings.DOCKER_TIMEOUT
+        )
+    
+    def close(self) -> None:
+        self._client.close()
+    
+    def _request(self, method: str, path: str, **kwargs) -> httpx.Response:
+        response = self._client.request(method, path, **kwargs)
+        _raise_for_status(response)
+        return response
+    
+    def ping(self) -> bool:
+        try:
+            return self._request("GET", "/_ping").text == "OK"
+        except Exception:
+            return False
+    
+    def list_containers(self, all: bool = False, **filters) -> List[Dict[str, Any]]:
+        params = {"all": "true" if all else "false"}
+        if filters:
+            params["filters"] = _filters(**filters)
+        return self._request("GET", "/containers/json", params=params).json()
+    
+    def client_containers(self, client_name: str, all: bool = False) -> List[Dict[str, Any]]:
+        return self.list_containers(all=all, label=f"{CLIENT_LABEL}={client_name}")
+    
+    def inspect_container(self, container: str) -> Dict[str, Any]:
+        return self._request("GET", f"/containers/{container}/json").json()
+    
+    def container_stats(self, container: str) -> Dict[str, Any]:
+        return self._request("GET", f"/containers/{container}/stats", params={"stream": "false"}).json()
+    
+    def start_container(self, container: str) -> None:
+        response = self._client.post(f"/containers/{container}/start")
+        if response.status_code != 304:
+            _raise_for_status(response)
+    
+    def stop_container(self, container: str, timeout: int = 10) -> None:
+        response = self._client.post(
+            f"/containers/{container}/stop",
+            params={"t": timeout},
+            timeout=settings.DOCKER_TIMEOUT + timeout
+        )
+        if response.status_code != 304:
+            _raise_for_status(response)
+    
+    def remove_container(self, container: str, force: bool = True, volumes: bool = True) -> None:
+        self._request("DELETE", f"/containers/{container}", params={
+            "force": "true" if force else "false",
+            "v": "true" if volumes else "false",
+        })
+    
+    def list_networks(self, **filters) -> List[Dict[str, Any]]:
+        return self._request("GET", "/networks", params={"filters": _filters(**filters)}).json()
+    
+    def remove_network(self, network: str) -> None:
+        self._request("DELETE", f"/networks/{network}")
+    
+    def list_volumes(self, **filters) -> List[Dict[str, Any]]:
+        return self._request("GET", "/volumes", params={"filters": _filters(**filters)}).json().get("Volumes") or []
+    
+    def inspect_volume(self, volume: str) -> Dict[str, Any]:
+        return self._request("GET", f"/volumes/{volume}").json()
+    
+    def remove_volume(self, volume: str, force: bool = False) -> None:
+        self._request("DELETE", f"/volumes/{volume}", params={"force": "true" if force else "false"})
+    
+    def image_exists(self, image: str) -> bool:
+        response = self._client.get(f"/images/{image}/json")
+        if response.status_code == 404:
+            return False
+        _raise_for_status(response)
+        return True
+    
+    def pull_image(self, image: str) -> None:
+        name, _, tag = image.partition(":")
+        with self._client.stream(
+            "POST", "/images/create",
+            params={"fromImage": name, "tag": tag or "latest"},
+            timeout=httpx.Timeout(settings.DOCKER_TIMEOUT, read=None)
+        ) as response:
+            _raise_for_status(response)
+            # Pull failures arrive as an error line in a 200 progress stream
+            for line in response.iter_lines():
+                if line and '"error"' in line:
+                    raise DockerError(500, json.loads(line).get("error", line))
+    
+    def _create_exec(self, container: str, cmd: List[str], user: str = None, env: List[str] = None) -> str:
+        body = {"Cmd": cmd, "AttachStdout": True, "AttachStderr": True}
+        if user:
+            body["User"] = user
+        if env:
+            body["Env"] = env
+        return self._request("POST", f"/containers/{container}/exec", json=body).json()["Id"]
+    
+    def _exec_exit_code(self, exec_id: str) -> int:
+        """Exit code of a finished exec, or -1 if Docker never reports one.
+
+        The output stream can close a moment before the daemon records the
+        exit, so the exec is polled until it is no longer running. A null
+        ExitCode is never taken as success.
+        """
+        deadline = time.monotonic() + settings.DOCKER_TIMEOUT
+        while True:
+            info = self._request("GET", f"/exec/{exec_id}/json").json()
+            if not info.get("Running"):
+                exit_code = info.get("ExitCode")
+                if exit_code is None:
+                    logger.warning(f"Exec {exec_id[:12]} stopped without an exit code")
+                    return -1
+                return exit_code
+            if time.monotonic() >= deadline:
+                logger.warning(f"Exec {exec_id[:12]} still running after its output closed")
+                return -1
+            time.sleep(EXEC_POLL_INTERVAL)
+    
+    def exec_stream(
+        self,
+        container: str,
+        cmd: List[str],
+        stdout: BinaryIO,
+        user: str = None,
+        env: List[str] = None,
+        timeout: float = None
+    ) -> Tuple[int, str]:
+        """Run a command in a container, writing stdout to a file object as it arrives"""
+        exec_id = self._create_exec(container, cmd, user, env)
+        stderr = b""
+        
+        with self._client.stream(
+            "POST", f"/exec/{exec_id}/start",
+            json={"Detach": False, "Tty": False},
+            timeout=httpx.Timeout(settings.DOCKER_TIMEOUT, read=timeout)
+        ) as response:
+            _raise_for_status(response)
+            for stream, payload in demux_stream(response.iter_bytes()):
+                if stream == STDERR:
+                    stderr += payload
+                else:
+                    stdout.write(payload)
+        
+        return self._exec_exit_code(exec_id), stderr.decode(errors="replace")
+    
+    def exec_run(
+        self,
+        container: str,
+        cmd: List[str],
+        user: str = None,
+        env: List[str] = None,
+        timeout: float = None
+    ) -> Tuple[int, str, str]:
+        output = io.BytesIO()
+        exit_code, stderr = self.exec_stream(container, cmd, output, user, env, timeout)
+        return exit_code, output.getvalue().decode(errors="replace"), stderr
+    
+    def get_archive(self, container: str, path: str) -> Iterator[bytes]:
+        """Stream a path out of a container as a tar archive"""
+        with self._client.stream(
+            "GET", f"/containers/{container}/archive",
+            params={"path": path},
+            timeout=httpx.Timeout(settings.DOCKER_TIMEOUT, read=None)
+        ) as response:
+            _raise_for_status(response)
+            yield from response.iter_bytes()
+    
+    def put_file(self, container: str, local_path: str, dest_dir: str, arcname: str = None) -> None:
+        self._request(
+            "PUT", f"/containers/{container}/archive",
+            params={"path": dest_dir},
+            content=tar_stream(local_path, arcname or os.path.basename(local_path)),
+            headers={"Content-Type": "application/x-tar"},
+            timeout=httpx.Timeout(settings.DOCKER_TIMEOUT, write=None)
+        )
+    
+    def put_stream(self, container: str, dest_dir: str, arcname: str, size: int, chunks: Iterable[bytes]) -> None:
+        self._request(
+            "PUT", f"/containers/{container}/archive",
+            params={"path": dest_dir},
+            content=tar_stream_chunks(arcname, size, chunks),
+            headers={"Content-Type": "application/x-tar"},
+            timeout=httpx.Timeout(settings.DOCKER_TIMEOUT, write=None)
+        )
+
+
+class AsyncDockerClient:
+    """Async counterpart of DockerClient for use from the event loop"""
+    
+    def __init__(self, socket_path: str = None, timeout: float = None, limits: httpx.Limits = None):
+        self._client = httpx.AsyncClient(
+            transport=httpx.AsyncHTTPTransport(
+                uds=socket_path or settings.DOCKER_SOCKET_PATH,
+                limits=limits or _limits(),
+                retries=1
+            ),
+            base_url=_base_url(),
+            timeout=timeout or settings.DOCKER_TIMEOUT
+        )
+    
+    async def aclose(self) -> None:
+        await self._client.aclose()
+    
+    async def _request(self, method: str, path: str, **kwargs) -> httpx.Response:
+        response = await self._client.request(method, path, **kwargs)
+        _raise_for_status(response)
+        return response
+    
+    async def ping(self) -> bool:
+        try:
+            return (await self._request("GET", "/_ping")).text == "OK"
+        except Exception:
+            return False
+    
+    async def list_containers(self, all: bool = False, **filters) -> List[Dict[str, Any]]:
+        params = {"all": "true" if all else "false"}
+        if filters:
+            params["filters"] = _filters(**filters)
+        return (await self._request("GET", "/containers/json", params=params)).json()
+    
+    async def client_containers(self, client_name: str, all: bool = False) -> List[Dict[str, Any]]:
+        return await self.list_containers(all=all, label=f"{CLIENT_LABEL}={client_name}")
+    
+    async def inspect_container(self, container: str) -> Dict[str, Any]:
+        return (await self._request("GET", f"/containers/{container}/json")).json()
+    
+    async def container_stats(self, container: str) -> Dict[str, Any]:
+        return (await self._request("GET", f"/containers/{container}/stats", params={"stream": "false"})).json()
+    
+    async def stream_stats(self, container: str) -> AsyncIterator[Dict[str, Any]]:
+        """Yield one stats frame per second until the container stops"""
+        async with self._client.stream(
+            "GET", f"/containers/{container}/stats",
+            params={"stream": "true"},
+            timeout=httpx.Timeout(settings.DOCKER_TIMEOUT, read=None)
+        ) as response:
+            if response.status_code >= 400:
+                await response.aread()
+                _raise_for_status(response)
+            async for line in response.aiter_lines():
+                if line.strip():
+                    yield json.loads(line)
+    
+    async def start_container(self, container: str) -> None:
+        response = await self._client.post(f"/containers/{container}/start")
+        if response.status_code != 304:
+            _raise_for_status(response)
+    
+    async def stop_container(self, container: str, timeout: int = 10) -> None:
+        response = await self._client.post(
+            f"/containers/{container}/stop",
+            params={"t": timeout},
+            timeout=settings.DOCKER_TIMEOUT + timeout
+        )
+        if response.status_code != 304:
+            _raise_for_status(response)
+
+
+@lru_cache()
+def get_docker_client() -> DockerClient:
+    return DockerClient()
+
+
+@lru_cache()
+def get_async_docker_client() -> AsyncDockerClient:
+    return AsyncDockerClient()
+
+
+async def close_docker_clients() -> None:
+    if get_docker_client.cache_info().currsize:
+        get_docker_client().close()
+        get_docker_client.cache_clear()
+    if get_async_docker_client.cache_info().currsize:
+        await get_async_docker_client().aclose()
+        get_async_docker_client.cache_clear()
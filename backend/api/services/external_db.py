@@ -0,0 +1,193 @@
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Any, Deque, Dict, Iterator, Tuple
+
+try:
+    import psycopg2
+    PSYCOPG2_AVAILABLE = True
+except ImportError:
+    PSYCOPG2_AVAILABLE = False
+
+from backend.core.config import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+
+class ExternalDBError(Exception):
+    pass
+
+
+def admin_server() -> Dict[str, Any]:
+    """The client DB cluster, as the admin role"""
+    return {
+        "host": settings.EXTERNAL_DB_HOST,
+        "port": settings.EXTERNAL_DB_PORT,
+        "user": settings.EXTERNAL_DB_USER,
+        "password": settings.EXTERNAL_DB_PASSWORD,
+    }
+
+
+def scratch_server() -> Dict[str, Any]:
+    """Server that backups are test-restored on.
+
+    It must be configured on its own through BACKUP_VERIFY_DB_*; there is no
+    fallback to EXTERNAL_DB_*, so test restores never land on the production
+    cluster or receive its admin credentials.
+    """
+    if not (settings.BACKUP_VERIFY_DB_HOST and settings.BACKUP_VERIFY_DB_USER):
+        raise ExternalDBError("No scratch server configured; set BACKUP_VERIFY_DB_HOST and BACKUP_VERIFY_DB_USER")
+    return {
+        "host": settings.BACKUP_VERIFY_DB_HOST,
+        "port": settings.BACKUP_VERIFY_DB_PORT,
+        "user": settings.BACKUP_VERIFY_DB_USER,
+        "password": settings.BACKUP_VERIFY_DB_PASSWORD,
+    }
+
+
+def connect(database: str = None, server: Dict[str, Any] = None):
+    if not PSYCOPG2_AVAILABLE:
+        raise ExternalDBError("psycopg2 not installed")
+    
+    server = server or admin_server()
+    conn = psycopg2.connect(
+        **server,
+        database=database or settings.EXTERNAL_DB_NAME,
+        connect_timeout=settings.EXTERNAL_DB_CONNECT_TIMEOUT,
+        application_name="odoo-cloud-admin"
+    )
+    # CREATE/DROP DATABASE cannot run inside a transaction block
+    conn.autocommit = True
+    return conn
+
+
+@contextmanager
+def database_connection(database: str) -> Iterator[Any]:
+    """One-off admin connection to a specific tenant database.
+
+    The pool only holds connections to EXTERNAL_DB_NAME; work that has to run
+    inside a tenant database is rare enough not to warrant pooling.
+    """
+    conn = connect(database)
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+
+class AdminConnectionPool:
+    """Bounded pool of autocommit admin connections to the client DB cluster.
+
+    Connections are opened lazily up to max_size; further callers wait up to
+    timeout seconds for one to be returned. A connection that has been idle
+    longer than EXTERNAL_DB_HEALTHCHECK_INTERVAL is pinged before reuse, and
+    one that fails the ping or breaks while checked out is discarded.
+    """
+    
+    def __init__(self, max_size: int = None, timeout: float = None):
+        self.max_size = max(settings.EXTERNAL_DB_POOL_MAX if max_size is None else max_size, 1)
+        self.timeout = settings.EXTERNAL_DB_POOL_TIMEOUT if timeout is None else timeout
+        self._idle: Deque[Tuple[Any, float]] = deque()
+        self._slots = threading.BoundedSemaphore(self.max_size)
+        self._lock = threading.Lock()
+        self._opened = 0
+        self._discarded = 0
+    
+    def _connect(self):
+        conn = connect()
+        with self._lock:
+            self._opened += 1
+        return conn
+    
+    def _discard(self, conn) -> None:
+        with self._lock:
+            self._discarded += 1
+        try:
+            conn.close()
+        except Exception:
+            pass
+    
+    def _healthy(self, conn, idle_since: float) -> bool:
+        if conn.closed:
+            return False
+        if time.monotonic() - idle_since < settings.EXTERNAL_DB_HEALTHCHECK_INTERVAL:
+            return True
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            return True
+        except Exception as e:
+            logger.info(f"Dropping stale external DB connection: {e}")
+            return False
+    
+    def _checkout(self):
+        while True:
+            with self._lock:
+                if not self._idle:
+                    break
+                conn, idle_since = self._idle.pop()
+            if self._healthy(conn, idle_since):
+                return conn
+            self._discard(conn)
+        return self._connect()
+    
+    def _checkin(self, conn) -> None:
+        if conn.closed:
+            self._discard(conn)
+            return
+        with self._lock:
+            self._idle.append((conn, time.monotonic()))
+    
+    @contextmanager
+    def connection(self) -> Iterator[Any]:
+        if not self._slots.acquire(timeout=self.timeout):
+            raise ExternalDBError(f"Timed out waiting for an external DB connection ({self.max_size} in use)")
+        
+        conn = None
+        try:
+            conn = self._checkout()
+            yield conn
+        finally:
+            # psycopg2 marks a connection closed once the server side is lost,
+            # so broken connections are dropped here rather than pooled
+            if conn is not None:
+                self._checkin(conn)
+            self._slots.release()
+    
+    @contextmanager
+    def cursor(self) -> Iterator[Any]:
+        with self.connection() as conn:
+            with conn.cursor() as cursor:
+                yield cursor
+    
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            idle = len(self._idle)
+            return {
+                "max_size": self.max_size,
+                "idle": idle,
+                "opened": self._opened,
+                "discarded": self._discarded,
+                "open": self._opened - self._discarded,
+                "in_use": self._opened - self._discarded - idle,
+            }
+    
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = list(self._idle), deque()
+        for conn, _ in idle:
+            self._discard(conn)
+
+
+@lru_cache()
+def get_admin_pool() -> AdminConnectionPool:
+    return AdminConnectionPool()
+
+
+def close_admin_pool() -> None:
+    if get_admin_pool.cache_info().currsize:
+        get_admin_pool().close()
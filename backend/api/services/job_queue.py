@@ -0,0 +1,164 @@
+import json
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from backend.core.config import get_settings
+from backend.core.database import WorkerSessionLocal
+from backend.api.models.models import Job, JobStatus
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+_handlers: Dict[str, Callable] = {}
+_workers: List[threading.Thread] = []
+_wakeup = threading.Event()
+_stop = threading.Event()
+
+
+def job_handler(job_type: str):
+    """Register a handler, called as handler(db, job, payload) on a worker thread"""
+    def decorator(func: Callable) -> Callable:
+        _handlers[job_type] = func
+        return func
+    return decorator
+
+
+def enqueue_job(
+    db: Session,
+    job_type: str,
+    client_id: int = None,
+    user_id: int = None,
+    payload: dict = None
+) -> Job:
+    job = Job(
+        job_type=job_type,
+        status=JobStatus.QUEUED.value,
+        client_id=client_id,
+        user_id=user_id,
+        payload=json.dumps(payload or {})
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    
+    _wakeup.set()
+    logger.info(f"Queued job {job.id} ({job_type})")
+    return job
+
+
+def update_job_progress(db: Session, job: Job, done: int, total: int = None) -> None:
+    job.progress_done = done
+    if total is not None:
+        job.progress_total = total
+    db.commit()
+
+
+def claim_next_job(db: Session) -> Optional[Job]:
+    candidates = db.query(Job.id).filter(
+        Job.status == JobStatus.QUEUED.value
+    ).order_by(Job.id).limit(max(settings.JOB_WORKERS, 1)).all()
+    
+    for (job_id,) in candidates:
+        # Conditional update so only one worker (or process) wins the job
+        claimed = db.query(Job).filter(
+            Job.id == job_id,
+            Job.status == JobStatus.QUEUED.value
+        ).update({
+            Job.status: JobStatus.RUNNING.value,
+            Job.started_at: datetime.utcnow(),
+            Job.attempts: Job.attempts + 1,
+        }, synchronize_session=False)
+        db.commit()
+        
+        if claimed:
+            return db.query(Job).filter(Job.id == job_id).first()
+    
+    return None
+
+
+def run_job(db: Session, job: Job) -> None:
+    job_id = job.id
+    handler = _handlers.get(job.job_type)
+    
+    try:
+        if handler is None:
+            raise RuntimeError(f"No handler registered for job type {job.job_type}")
+        
+        result = handler(db, job, json.loads(job.payload or "{}"))
+        
+        job.status = JobStatus.COMPLETED.value
+        job.result = json.dumps(result or {}, default=str)
+        logger.info(f"Job {job_id} ({job.job_type}) completed")
+    except Exception as e:
+        db.rollback()
+        job = db.query(Job).filter(Job.id == job_id).first()
+        job.status = JobStatus.FAILED.value
+        job.error_message = str(e)
+        logger.error(f"Job {job_id} ({job.job_type}) failed: {e}")
+    
+    job.completed_at = datetime.utcnow()
+    db.commit()
+
+
+def requeue_stale_jobs(db: Session) -> int:
+    cutoff = datetime.utcnow() - timedelta(seconds=settings.JOB_STALE_SECONDS)
+    
+    count = db.query(Job).filter(
+        Job.status == JobStatus.RUNNING.value,
+        Job.started_at < cutoff
+    ).update({Job.status: JobStatus.QUEUED.value}, synchronize_session=False)
+    db.commit()
+    
+    if count:
+        logger.warning(f"Requeued {count} stale jobs")
+    return count
+
+
+def _worker_loop() -> None:
+    while not _stop.is_set():
+        job = None
+        db = WorkerSessionLocal()
+        try:
+            job = claim_next_job(db)
+            if job:
+                run_job(db, job)
+        except Exception as e:
+            logger.error(f"Job worker error: {e}")
+        finally:
+            db.close()
+        
+        if job is None:
+            _wakeup.wait(settings.JOB_POLL_INTERVAL)
+            _wakeup.clear()
+
+
+def start_job_workers() -> None:
+    if _workers:
+        return
+    
+    db = WorkerSessionLocal()
+    try:
+        requeue_stale_jobs(db)
+    finally:
+        db.close()
+    
+    _stop.clear()
+    for i in range(settings.JOB_WORKERS):
+        worker = threading.Thread(target=_worker_loop, name=f"job-worker-{i}", daemon=True)
+        worker.start()
+        _workers.append(worker)
+    
+    logger.info(f"Started {len(_workers)} job workers")
+
+
+def stop_job_workers(timeout: float = 10.0) -> None:
+    _stop.set()
+    _wakeup.set()
+    
+    for worker in _workers:
+        worker.join(timeout)
+    _workers.clear()
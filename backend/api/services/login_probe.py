@@ -0,0 +1,118 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+
+import httpx
+
+from backend.core.config import get_settings
+from backend.core.database import WorkerSessionLocal
+from backend.api.models.models import ProvisioningMetric
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+PROBE_REQUEST_TIMEOUT = 5.0
+PROBE_WORKERS = 8
+
+
+class LoginProber:
+    """Time from stack start until a new client's Odoo serves its login page.
+
+    Runs on its own thread rather than a job worker: a slow tenant can take
+    minutes to boot, and a worker waiting on it would hold up provisioning,
+    activation and cleanup jobs. Every ODOO_LOGIN_PROBE_INTERVAL seconds each
+    watched client gets one short request; the first 200 is recorded on its
+    ProvisioningMetric, and a client still down after ODOO_LOGIN_PROBE_TIMEOUT
+    is given up on. Watches live in memory, so a client activated just before
+    a restart gets no login time.
+    """
+    
+    def __init__(self):
+        self._pending: Dict[int, Tuple[str, int, float]] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    def watch(self, client_id: int, client_name: str, port: int, started_at: float) -> None:
+        with self._lock:
+            self._pending[client_id] = (client_name, port, started_at)
+    
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._pending)
+    
+    @staticmethod
+    def _serves_login(port: int) -> bool:
+        try:
+            return httpx.get(f"http://127.0.0.1:{port}/web/login", timeout=PROBE_REQUEST_TIMEOUT).status_code == 200
+        except httpx.HTTPError:
+            return False
+    
+    def _record(self, client_id: int, seconds: float) -> None:
+        db = WorkerSessionLocal()
+        try:
+            metric = db.query(ProvisioningMetric).filter(
+                ProvisioningMetric.client_id == client_id
+            ).order_by(ProvisioningMetric.id.desc()).first()
+            if metric:
+                metric.time_to_login_seconds = seconds
+                db.commit()
+        finally:
+            db.close()
+    
+    def probe_once(self, pool: ThreadPoolExecutor) -> None:
+        now = time.time()
+        with self._lock:
+            watched = list(self._pending.items())
+        
+        live = []
+        for client_id, (client_name, port, started_at) in watched:
+            if now - started_at > settings.ODOO_LOGIN_PROBE_TIMEOUT:
+                logger.warning(f"{client_name} did not serve /web/login within {settings.ODOO_LOGIN_PROBE_TIMEOUT}s")
+                with self._lock:
+                    self._pending.pop(client_id, None)
+            else:
+                live.append((client_id, client_name, port, started_at))
+        
+        ready = pool.map(lambda entry: self._serves_login(entry[2]), live)
+        for (client_id, client_name, _, started_at), serving in zip(live, ready):
+            if not serving:
+                continue
+            with self._lock:
+                self._pending.pop(client_id, None)
+            seconds = round(time.time() - started_at, 2)
+            try:
+                self._record(client_id, seconds)
+                logger.info(f"{client_name} served /web/login {seconds}s after start")
+            except Exception as e:
+                logger.error(f"Could not record login time for {client_name}: {e}")
+    
+    def _run(self) -> None:
+        with ThreadPoolExecutor(max_workers=PROBE_WORKERS, thread_name_prefix="login-probe") as pool:
+            while not self._stop.is_set():
+                try:
+                    self.probe_once(pool)
+                except Exception as e:
+                    logger.error(f"Login probe pass failed: {e}")
+                self._stop.wait(settings.ODOO_LOGIN_PROBE_INTERVAL)
+    
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="login-prober", daemon=True)
+        self._thread.start()
+    
+    def stop(self, timeout: float = 10.0) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+
+@lru_cache()
+def get_login_prober() -> LoginProber:
+    return LoginProber()
@@ -0,0 +1,107 @@
+import logging
+import subprocess
+import threading
+import time
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+from backend.core.config import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+
+def validate_and_reload_nginx() -> None:
+    subprocess.run(
+        ["nginx", "-t"],
+        check=True,
+        capture_output=True
+    )
+    subprocess.run(
+        ["systemctl", "reload", "nginx"],
+        check=True,
+        capture_output=True
+    )
+
+
+class NginxReloadCoordinator:
+    """Coalesces reload requests that arrive within a window into one reload.
+
+    The first caller in a window starts a flusher thread which waits
+    NGINX_RELOAD_WINDOW seconds, then validates and reloads once for every
+    request queued so far. Only one flusher runs at a time, so reloads are
+    serialized; requests that arrive mid-reload are picked up by the next
+    batch.
+    """
+    
+    def __init__(self, window: float = None):
+        self.window = settings.NGINX_RELOAD_WINDOW if window is None else window
+        self._cond = threading.Condition()
+        self._pending: List[str] = []
+        self._requested = 0
+        self._applied = 0
+        self._flushing = False
+        self._last_success = True
+        self.last_batch: Optional[Dict[str, Any]] = None
+    
+    def request_reload(self, reason: str = None, wait: bool = True, timeout: float = None) -> bool:
+        with self._cond:
+            self._requested += 1
+            ticket = self._requested
+            self._pending.append(reason or "reload")
+            
+            if not self._flushing:
+                self._flushing = True
+                threading.Thread(target=self._flush_loop, name="nginx-reload", daemon=True).start()
+            
+            if not wait:
+                return True
+            
+            deadline = time.monotonic() + timeout if timeout else None
+            while self._applied < ticket:
+                remaining = deadline - time.monotonic() if deadline else None
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+            
+            return self._last_success
+    
+    def _flush_loop(self) -> None:
+        while True:
+            time.sleep(self.window)
+            
+            with self._cond:
+                batch, self._pending = self._pending, []
+                upto = self._requested
+            
+            started = datetime.utcnow()
+            error = None
+            try:
+                validate_and_reload_nginx()
+                logger.info(f"Applied nginx reload for {len(batch)} requests")
+            except Exception as e:
+                error = str(e)
+                logger.error(f"Error reloading nginx: {e}")
+            
+            with self._cond:
+                self._applied = upto
+                self._last_success = error is None
+                self.last_batch = {
+                    "requests": len(batch),
+                    "reasons": batch,
+                    "success": error is None,
+                    "error": error,
+                    "started_at": started,
+                    "finished_at": datetime.utcnow(),
+                }
+                self._cond.notify_all()
+                
+                if not self._pending:
+                    self._flushing = False
+                    return
+
+
+@lru_cache()
+def get_nginx_reloader() -> NginxReloadCoordinator:
+    return NginxReloadCoordinator()
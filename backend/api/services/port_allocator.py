@@ -0,0 +1,226 @@
+import logging
+import os
+from datetime import datetime
+from typing import Dict, List, Set
+
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from backend.core.config import get_settings
+from backend.api.models.models import Client, ClientStatus, PortAllocation
+from backend.api.services.docker_client import get_docker_client, CLIENT_LABEL
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+PORT_ALLOCATED = "allocated"
+PORT_FREE = "free"
+
+MAX_ALLOCATION_ATTEMPTS = 10
+
+
+class PortAllocationError(Exception):
+    pass
+
+
+def _claim_free_port(db: Session, client_name: str) -> int:
+    """Claim the lowest free port, moving on to the next one whenever another signup wins the race"""
+    lost: Set[int] = set()
+    
+    while True:
+        query = db.query(PortAllocation.id, PortAllocation.port).filter(PortAllocation.status == PORT_FREE)
+        if lost:
+            query = query.filter(PortAllocation.port.notin_(lost))
+        free = query.order_by(PortAllocation.port).first()
+        
+        if not free:
+            return None
+        
+        claimed = db.query(PortAllocation).filter(
+            PortAllocation.id == free.id,
+            PortAllocation.status == PORT_FREE
+        ).update({
+            PortAllocation.status: PORT_ALLOCATED,
+            PortAllocation.client_name: client_name,
+            PortAllocation.allocated_at: datetime.utcnow(),
+            PortAllocation.released_at: None,
+        }, synchronize_session=False)
+        
+        if claimed:
+            return free.port
+        lost.add(free.port)
+
+
+def allocate_port(db: Session, client_name: str) -> int:
+    """Reserve an Odoo port for a client, reusing released ports first"""
+    existing = db.query(PortAllocation.port).filter(
+        PortAllocation.client_name == client_name
+    ).scalar()
+    if existing:
+        return existing
+    
+    for _ in range(MAX_ALLOCATION_ATTEMPTS):
+        try:
+            port = _claim_free_port(db, client_name)
+            if port is None:
+                highest = db.query(func.max(PortAllocation.port)).scalar()
+                port = highest + 1 if highest else settings.DEFAULT_ODOO_PORT_START
+                db.add(PortAllocation(
+                    port=port,
+                    client_name=client_name,
+                    status=PORT_ALLOCATED,
+                    allocated_at=datetime.utcnow()
+                ))
+            db.commit()
+            logger.info(f"Allocated port {port} to {client_name}")
+            return port
+        except IntegrityError:
+            # Another signup took the same port; try again with fresh state
+            db.rollback()
+    
+    raise PortAllocationError(f"Could not allocate a port for {client_name}")
+
+
+def release_port(db: Session, client_name: str) -> None:
+    """Return a client's port to the free list"""
+    db.query(PortAllocation).filter(
+        PortAllocation.client_name == client_name
+    ).update({
+        PortAllocation.status: PORT_FREE,
+        PortAllocation.client_name: None,
+        PortAllocation.released_at: datetime.utcnow(),
+    }, synchronize_session=False)
+    db.commit()
+
+
+def release_ports(db: Session, client_names: List[str]) -> int:
+    """Return several clients' ports to the free list in one UPDATE"""
+    if not client_names:
+        return 0
+    
+    count = db.query(PortAllocation).filter(
+        PortAllocation.client_name.in_(client_names)
+    ).update({
+        PortAllocation.status: PORT_FREE,
+        PortAllocation.client_name: None,
+        PortAllocation.released_at: datetime.utcnow(),
+    }, synchronize_session=False)
+    db.commit()
+    return count
+
+
+def scan_env_ports() -> Dict[int, str]:
+    ports = {}
+    clients_dir = settings.ODOO_DATA_DIR
+    
+    if not os.path.isdir(clients_dir):
+        return ports
+    
+    for entry in os.scandir(clients_dir):
+        env_file = os.path.join(entry.path, ".env")
+        if not entry.is_dir() or not os.path.exists(env_file):
+            continue
+        with open(env_file, 'r') as f:
+            for line in f:
+                if line.startswith("ODOO_PORT="):
+                    try:
+                        ports[int(line.split("=")[1].strip())] = entry.name
+                    except ValueError:
+                        pass
+    
+    return ports
+
+
+def scan_container_ports() -> Dict[int, str]:
+    ports = {}
+    try:
+        for container in get_docker_client().list_containers(all=True, label=CLIENT_LABEL):
+            client_name = (container.get("Labels") or {}).get(CLIENT_LABEL)
+            for mapping in container.get("Ports") or []:
+                if mapping.get("PrivatePort") == 8069 and mapping.get("PublicPort"):
+                    ports[mapping["PublicPort"]] = client_name
+    except Exception as e:
+        logger.warning(f"Could not read container ports: {e}")
+    return ports
+
+
+def reconcile_ports(db: Session) -> Dict[str, int]:
+    """Rebuild port_allocations from clients, .env files and running containers.
+
+    Ports in use are marked allocated to their client; every other port
+    between DEFAULT_ODOO_PORT_START and the highest port seen becomes free.
+    """
+    # Sources in rising order of authority: .env files on disk, then running
+    # containers, then the clients table. A later source moves a client to
+    # its port and takes the port from whoever an earlier source gave it to.
+    sources = [
+        scan_env_ports().items(),
+        scan_container_ports().items(),
+        db.query(Client.odoo_port, Client.name).filter(Client.status != ClientStatus.DELETED.value).all(),
+    ]
+    allocated: Dict[int, str] = {}
+    by_client: Dict[str, int] = {}
+    for source in sources:
+        for port, client_name in source:
+            previous = by_client.pop(client_name, None)
+            if previous is not None:
+                allocated.pop(previous, None)
+            displaced = allocated.get(port)
+            if displaced is not None:
+                by_client.pop(displaced, None)
+            allocated[port] = client_name
+            by_client[client_name] = port
+    
+    # Clear client names first so reassignment can't trip the unique constraint
+    db.query(PortAllocation).update({PortAllocation.client_name: None}, synchronize_session=False)
+    db.expire_all()
+    
+    existing = {row.port: row for row in db.query(PortAllocation).all()}
+    highest = max(list(allocated) + list(existing) + [settings.DEFAULT_ODOO_PORT_START - 1])
+    now = datetime.utcnow()
+    seen: Set[int] = set()
+    
+    for port in sorted(set(range(settings.DEFAULT_ODOO_PORT_START, highest + 1)) | set(allocated)):
+        seen.add(port)
+        row = existing.get(port)
+        if row is None:
+            row = PortAllocation(port=port)
+            db.add(row)
+        if port in allocated:
+            row.status = PORT_ALLOCATED
+            row.client_name = allocated[port]
+            row.allocated_at = row.allocated_at or now
+            row.released_at = None
+        else:
+            row.status = PORT_FREE
+            row.client_name = None
+            row.released_at = row.released_at or now
+    
+    db.commit()
+    
+    result = {
+        "allocated": len(allocated),
+        "free": len(seen) - len(allocated),
+        "highest_port": highest,
+    }
+    logger.info(f"Reconciled port allocations: {result}")
+    return result
+
+
+def ensure_port_allocations(db: Session) -> None:
+    if db.query(PortAllocation.id).first() is None:
+        reconcile_ports(db)
+
+
+if __name__ == "__main__":
+    from backend.core.database import SessionLocal, engine, Base
+    
+    logging.basicConfig(level=logging.INFO)
+    Base.metadata.create_all(bind=engine)
+    
+    session = SessionLocal()
+    try:
+        print(reconcile_ports(session))
+    finally:
+        session.close()
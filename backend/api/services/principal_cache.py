@@ -0,0 +1,192 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import event, inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from backend.core.config import get_settings
+from backend.api.models.models import User
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Changes to these columns alter what an authenticated request may do
+PRINCIPAL_FIELDS = ("username", "email", "is_active", "is_superuser")
+
+
+class Principal:
+    """The authenticated user as routes see it, detached from any session"""
+    
+    __slots__ = ("id", "username", "email", "is_active", "is_superuser")
+    
+    def __init__(self, id: int, username: str, email: str, is_active: bool, is_superuser: bool):
+        self.id = id
+        self.username = username
+        self.email = email
+        self.is_active = is_active
+        self.is_superuser = is_superuser
+    
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        return cls(user.id, user.username, user.email, bool(user.is_active), bool(user.is_superuser))
+    
+    @classmethod
+    def from_claims(cls, payload: Dict[str, Any]) -> Optional["Principal"]:
+        if payload.get("uid") is None or "su" not in payload:
+            return None
+        return cls(payload["uid"], payload["sub"], payload.get("email"), True, bool(payload["su"]))
+
+
+def principal_claims(user: User) -> Dict[str, Any]:
+    """Signed claims for create_access_token, so a cache miss can skip the users table"""
+    return {"sub": user.username, "uid": user.id, "email": user.email, "su": bool(user.is_superuser)}
+
+
+class PrincipalCache:
+    """Bounded LRU of principals keyed by (sub, jti), each entry living PRINCIPAL_CACHE_TTL seconds.
+
+    Keying on the token id means a fresh login always starts from the users
+    table. invalidate_user drops every entry for a user and, for the claims
+    path, rejects tokens issued before the change; the users table hooks
+    below call it whenever a principal field is updated or a user deleted.
+    """
+    
+    def __init__(self, size: int = None, ttl: float = None):
+        self.size = size or settings.PRINCIPAL_CACHE_SIZE
+        self.ttl = settings.PRINCIPAL_CACHE_TTL if ttl is None else ttl
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, Principal]]" = OrderedDict()
+        self._invalidated: Dict[str, float] = {}
+        self.hits = 0
+        self.misses = 0
+        self.claims = 0
+        self.invalidations = 0
+    
+    def get(self, sub: str, jti: str) -> Optional[Principal]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get((sub, jti))
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._entries[(sub, jti)]
+                self.misses += 1
+                return None
+            self._entries.move_to_end((sub, jti))
+            self.hits += 1
+            return entry[1]
+    
+    def put(self, sub: str, jti: str, principal: Principal, token_exp: float = None) -> None:
+        if self.ttl <= 0:
+            return
+        expires = time.monotonic() + self.ttl
+        if token_exp is not None:
+            # Never outlive the token itself
+            expires = min(expires, time.monotonic() + token_exp - time.time())
+        with self._lock:
+            self._entries[(sub, jti)] = (expires, principal)
+            self._entries.move_to_end((sub, jti))
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+    
+    def invalidate_user(self, username: str) -> None:
+        now = time.time()
+        horizon = now - settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == username]:
+                del self._entries[key]
+            self._invalidated[username] = now
+            # Tokens older than the access token lifetime are expired anyway
+            for name in [name for name, at in self._invalidated.items() if at < horizon]:
+                del self._invalidated[name]
+            self.invalidations += 1
+    
+    def claims_trusted(self, payload: Dict[str, Any]) -> bool:
+        if not settings.AUTH_TRUST_TOKEN_CLAIMS:
+            return False
+        with self._lock:
+            invalidated_at = self._invalidated.get(payload.get("sub"))
+        return invalidated_at is None or payload.get("iat", 0) > invalidated_at
+    
+    @staticmethod
+    def _key(payload: Dict[str, Any]) -> Tuple[str, str]:
+        # Tokens issued before access tokens carried a jti are keyed by expiry
+        return payload.get("sub"), payload.get("jti") or str(payload.get("exp"))
+    
+    def _known(self, payload: Dict[str, Any]) -> Optional[Principal]:
+        """The principal from the cache or from trusted token claims, without a query"""
+        sub, jti = self._key(payload)
+        principal = self.get(sub, jti)
+        if principal is None and self.claims_trusted(payload):
+            principal = Principal.from_claims(payload)
+            if principal is not None:
+                with self._lock:
+                    self.claims += 1
+                self.put(sub, jti, principal, payload.get("exp"))
+        return principal
+    
+    def _loaded(self, payload: Dict[str, Any], user: Optional[User]) -> Optional[Principal]:
+        if user is None:
+            return None
+        principal = Principal.from_user(user)
+        self.put(*self._key(payload), principal, payload.get("exp"))
+        return principal
+    
+    def resolve(self, payload: Dict[str, Any], db: Session) -> Optional[Principal]:
+        """The principal for a decoded access token, from cache, claims or the users table"""
+        principal = self._known(payload)
+        if principal is None:
+            principal = self._loaded(payload, db.query(User).filter(User.username == payload.get("sub")).first())
+        return principal
+    
+    async def resolve_async(self, payload: Dict[str, Any], db: AsyncSession) -> Optional[Principal]:
+        principal = self._known(payload)
+        if principal is None:
+            result = await db.execute(select(User).where(User.username == payload.get("sub")))
+            principal = self._loaded(payload, result.scalars().first())
+        return principal
+    
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_size": self.size,
+                "ttl_seconds": self.ttl,
+                "trust_token_claims": settings.AUTH_TRUST_TOKEN_CLAIMS,
+                "hits": self.hits,
+                "misses": self.misses,
+                "claims": self.claims,
+                "invalidations": self.invalidations
+            }
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._invalidated.clear()
+
+
+@lru_cache()
+def get_principal_cache() -> PrincipalCache:
+    return PrincipalCache()
+
+
+@event.listens_for(User, "after_update")
+def _invalidate_updated_user(mapper, connection, target: User) -> None:
+    state = inspect(target)
+    names = set()
+    for field in PRINCIPAL_FIELDS:
+        history = state.attrs[field].history
+        if history.has_changes():
+            names.update(history.deleted if field == "username" else ())
+            names.add(target.username)
+    for name in names:
+        get_principal_cache().invalidate_user(name)
+
+
+@event.listens_for(User, "after_delete")
+def _invalidate_deleted_user(mapper, connection, target: User) -> None:
+    get_principal_cache().invalidate_user(target.username)
@@ -5,10 +5,26 @@ import subprocess
 import json
 import logging
 
-from jinja2 import Template
+try:
+    import psycopg2
+    from psycopg2 import sql
+    PSYCOPG2_AVAILABLE = True
+except ImportError:
+    PSYCOPG2_AVAILABLE = False
 
 from backend.core.config import get_settings
 from backend.api.models.models import Client
+from backend.api.services.docker_client import (
+    get_docker_client, format_container_stats, compose_project_name, COMPOSE_PROJECT_LABEL
+)
+from backend.api.services.stats_collector import get_stats_collector
+from backend.api.services.disk_usage import get_disk_usage_indexer
+from backend.api.services.nginx_reload import get_nginx_reloader
+from backend.api.services.external_db import get_admin_pool
+from backend.api.services.db_templates import finalize_clone
+from backend.api.services.templates import (
+    render_template, render_many, COMPOSE_TEMPLATE, NGINX_TEMPLATE
+)
 
 settings = get_settings()
 logger = logging.getLogger(__name__)
@@ -33,40 +49,42 @@ def generate_db_user(client_name: str) -> str:
     return f"odoo_{client_name.replace('-', '_')}"
 
 
-def create_external_database(db_name: str, db_user: str, db_password: str) -> bool:
-    try:
-        import psycopg2
-        from psycopg2 import sql
-    except ImportError:
+def create_external_database(db_name: str, db_user: str, db_password: str, template: str = None) -> bool:
+    if not PSYCOPG2_AVAILABLE:
         logger.warning("psycopg2 not installed, skipping database creation")
         return False
     
     try:
-        conn = psycopg2.connect(
-            host=settings.EXTERNAL_DB_HOST,
-            port=settings.EXTERNAL_DB_PORT,
-            user=settings.EXTERNAL_DB_USER,
-            password=settings.EXTERNAL_DB_PASSWORD,
-            database=settings.EXTERNAL_DB_NAME
-        )
-        conn.autocommit = True
-        cursor = conn.cursor()
-        
-        cursor.execute(sql.SQL("CREATE USER {} WITH PASSWORD %s").format(
-            sql.Identifier(db_user)
-        ), [db_password])
-        
-        cursor.execute(sql.SQL("CREATE DATABASE {} OWNER {}").format(
-            sql.Identifier(db_name),
-            sql.Identifier(db_user)
-        ))
+        with get_admin_pool().cursor() as cursor:
+            cursor.execute(sql.SQL("CREATE USER {} WITH PASSWORD %s").format(
+                sql.Identifier(db_user)
+            ), [db_password])
+            
+            if template:
+                cursor.execute(sql.SQL("CREATE DATABASE {} OWNER {} TEMPLATE {}").format(
+                    sql.Identifier(db_name),
+                    sql.Identifier(db_user),
+                    sql.Identifier(template)
+                ))
+            else:
+                cursor.execute(sql.SQL("CREATE DATABASE {} OWNER {}").format(
+                    sql.Identifier(db_name),
+                    sql.Identifier(db_user)
+                ))
         
-        cursor.close()
-        conn.close()
+        if template:
+            try:
+                finalize_clone(db_name, db_user)
+            except Exception:
+                # A retry would stop at DuplicateObject and leave the clone
+                # with the template's identity, so start again from nothing
+                delete_external_database(db_name, db_user)
+                raise
         
-        logger.info(f"Created database {db_name} and user {db_user} on external PostgreSQL")
+        logger.info(f"Created database {db_name} and user {db_user} on external PostgreSQL"
+                    + (f" from template {template}" if template else ""))
         return True
-        
+    
     except psycopg2.errors.DuplicateDatabase:
         logger.info(f"Database {db_name} already exists")
         return True
@@ -78,78 +96,124 @@ def create_external_database(db_name: str, db_user: str, db_password: str) -> bo
         return False
 
 
+def adopt_external_database(standby_db: str, standby_user: str, db_name: str, db_user: str, db_password: str) -> None:
+    """Rename a standby database and its role to a tenant's names in one transaction"""
+    with get_admin_pool().cursor() as cursor:
+        cursor.execute("BEGIN")
+        try:
+            cursor.execute(sql.SQL("ALTER DATABASE {} RENAME TO {}").format(
+                sql.Identifier(standby_db),
+                sql.Identifier(db_name)
+            ))
+            cursor.execute(sql.SQL("ALTER ROLE {} RENAME TO {}").format(
+                sql.Identifier(standby_user),
+                sql.Identifier(db_user)
+            ))
+            cursor.execute(sql.SQL("ALTER ROLE {} WITH PASSWORD %s").format(
+                sql.Identifier(db_user)
+            ), [db_password])
+            cursor.execute("COMMIT")
+        except Exception:
+            cursor.execute("ROLLBACK")
+            raise
+
+
 def delete_external_database(db_name: str, db_user: str) -> bool:
-    try:
-        import psycopg2
-        from psycopg2 import sql
-    except ImportError:
+    return delete_external_databases([(db_name, db_user)]).get(db_name, False)
+
+
+def delete_external_databases(databases: list) -> dict:
+    """Drop many (db_name, db_user) pairs over a single pooled admin connection"""
+    results = {db_name: False for db_name, _ in databases}
+    
+    if not PSYCOPG2_AVAILABLE:
         logger.warning("psycopg2 not installed, skipping database deletion")
-        return False
+        return results
     
     try:
-        conn = psycopg2.connect(
-            host=settings.EXTERNAL_DB_HOST,
-            port=settings.EXTERNAL_DB_PORT,
-            user=settings.EXTERNAL_DB_USER,
-            password=settings.EXTERNAL_DB_PASSWORD,
-            database=settings.EXTERNAL_DB_NAME
-        )
-        conn.autocommit = True
-        cursor = conn.cursor()
-        
-        cursor.execute(sql.SQL("DROP DATABASE IF EXISTS {}").format(
-            sql.Identifier(db_name)
-        ))
-        
-        cursor.execute(sql.SQL("DROP USER IF EXISTS {}").format(
-            sql.Identifier(db_user)
-        ))
-        
-        cursor.close()
-        conn.close()
-        
-        logger.info(f"Deleted database {db_name} and user {db_user} from external PostgreSQL")
-        return True
-        
+        with get_admin_pool().cursor() as cursor:
+            # DROP DATABASE cannot run inside a transaction, so each statement
+            # is sent on its own over the same autocommit connection
+            for db_name, db_user in databases:
+                try:
+                    cursor.execute(sql.SQL("DROP DATABASE IF EXISTS {}").format(sql.Identifier(db_name)))
+                    cursor.execute(sql.SQL("DROP USER IF EXISTS {}").format(sql.Identifier(db_user)))
+                    results[db_name] = True
+                except Exception as e:
+                    logger.error(f"Error deleting database {db_name}: {e}")
     except Exception as e:
-        logger.error(f"Error deleting database: {e}")
-        return False
+        logger.error(f"Error connecting to external PostgreSQL: {e}")
+    
+    logger.info(f"Deleted {sum(results.values())}/{len(databases)} databases from external PostgreSQL")
+    return results
 
 
-def get_next_odoo_port() -> int:
-    clients_dir = settings.ODOO_DATA_DIR
-    
-    if not os.path.exists(clients_dir):
-        os.makedirs(clients_dir, exist_ok=True)
-        return settings.DEFAULT_ODOO_PORT_START
-    
-    used_ports = set()
-    for client_name in os.listdir(clients_dir):
-        client_path = os.path.join(clients_dir, client_name)
-        if os.path.isdir(client_path):
-            env_file = os.path.join(client_path, ".env")
-            if os.path.exists(env_file):
-                with open(env_file, 'r') as f:
-                    for line in f:
-                        if line.startswith("ODOO_PORT="):
-                            port = line.split("=")[1].strip()
-                            try:
-                                used_ports.add(int(port))
-                            except ValueError:
-                                pass
-    
-    if not used_ports:
-        return settings.DEFAULT_ODOO_PORT_START
-    
-    return max(used_ports) + 1
+def create_staging_database(db_name: str, db_user: str) -> str:
+    """Create an empty database owned by db_user for a restore to fill, returning its name"""
+    staging = f"{db_name[:40]}_restore_{secrets.token_hex(4)}"
+    with get_admin_pool().cursor() as cursor:
+        cursor.execute(sql.SQL("CREATE DATABASE {} OWNER {}").format(
+            sql.Identifier(staging),
+            sql.Identifier(db_user)
+        ))
+    return staging
 
 
-def render_template(template_path: str, context: dict) -> str:
-    with open(template_path, 'r') as f:
-        template_content = f.read()
-    
-    template = Template(template_content)
-    return template.render(**context)
+def drop_staging_database(staging: str) -> None:
+    try:
+        with get_admin_pool().cursor() as cursor:
+            cursor.execute(sql.SQL("DROP DATABASE IF EXISTS {}").format(sql.Identifier(staging)))
+    except Exception as e:
+        logger.error(f"Error dropping staging database {staging}: {e}")
+
+
+def replace_external_database(db_name: str, staging: str) -> None:
+    """Put a filled staging database in place of db_name and drop the old one.
+
+    A database cannot be renamed while anyone is connected to it, so new
+    connections to db_name are refused and its sessions terminated first.
+    Both renames commit together; if either fails db_name is left as it was
+    and accepts connections again.
+    """
+    retired = f"{db_name[:40]}_old_{secrets.token_hex(4)}"
+    with get_admin_pool().cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_database WHERE datname = %s", [db_name])
+        exists = cursor.fetchone() is not None
+        if exists:
+            cursor.execute(sql.SQL("ALTER DATABASE {} WITH ALLOW_CONNECTIONS false").format(
+                sql.Identifier(db_name)
+            ))
+        
+        cursor.execute("BEGIN")
+        try:
+            if exists:
+                cursor.execute(
+                    "SELECT pg_terminate_backend(pid) FROM pg_stat_activity "
+                    "WHERE datname = %s AND pid <> pg_backend_pid()",
+                    [db_name]
+                )
+                cursor.execute(sql.SQL("ALTER DATABASE {} RENAME TO {}").format(
+                    sql.Identifier(db_name),
+                    sql.Identifier(retired)
+                ))
+            cursor.execute(sql.SQL("ALTER DATABASE {} RENAME TO {}").format(
+                sql.Identifier(staging),
+                sql.Identifier(db_name)
+            ))
+            cursor.execute("COMMIT")
+        except Exception:
+            cursor.execute("ROLLBACK")
+            if exists:
+                cursor.execute(sql.SQL("ALTER DATABASE {} WITH ALLOW_CONNECTIONS true").format(
+                    sql.Identifier(db_name)
+                ))
+            raise
+        
+        if exists:
+            try:
+                cursor.execute(sql.SQL("DROP DATABASE {}").format(sql.Identifier(retired)))
+            except Exception as e:
+                logger.warning(f"Restored {db_name}, but could not drop the previous copy {retired}: {e}")
 
 
 def get_plan_resources(plan: str) -> dict:
@@ -183,8 +247,6 @@ def create_client_directories(client_name: str) -> None:
 
 
 def create_docker_compose(client: Client, db_password: str) -> None:
-    template_path = "/home/babatope/Documents/projects/saas/infrastructure/docker/templates/docker-compose.yml.j2"
-    
     context = {
         "CLIENT_NAME": client.name,
         "CLIENT_DOMAIN": client.domain,
@@ -201,9 +263,10 @@ def create_docker_compose(client: Client, db_password: str) -> None:
         "redis_enabled": client.redis_enabled,
         "REDIS_MEMORY": "512m" if client.redis_enabled else None,
         "PLAN": client.plan,
+        "odoo_version": settings.ODOO_VERSION,
     }
     
-    docker_compose_content = render_template(template_path, context)
+    docker_compose_content = render_template(COMPOSE_TEMPLATE, context)
     
     output_path = os.path.join(settings.ODOO_DATA_DIR, client.name, "docker-compose.yml")
     with open(output_path, 'w') as f:
@@ -246,33 +309,68 @@ BACKUP_SCHEDULE=0 2 * * *
         f.write(env_content)
 
 
-def create_nginx_config(client: Client) -> None:
-    template_path = "/home/babatope/Documents/projects/saas/infrastructure/nginx/sites-available/client.conf.j2"
+def nginx_context(client: Client) -> dict:
+    custom_domains = client.custom_domains
+    if not isinstance(custom_domains, list):
+        custom_domains = json.loads(custom_domains or "[]")
     
-    custom_domains = json.loads(client.custom_domains or "[]")
-    all_domains = [client.domain] + custom_domains
-    
-    context = {
+    return {
         "client_name": client.name,
         "client_domain": client.domain,
         "odoo_port": client.odoo_port,
-        "all_domains": all_domains,
+        "all_domains": [client.domain] + custom_domains,
     }
-    
-    nginx_content = render_template(template_path, context)
-    
-    output_path = os.path.join(settings.NGINX_CONFIG_DIR, f"{client.name}.conf")
+
+
+def write_nginx_config(client_name: str, nginx_content: str) -> None:
+    output_path = os.path.join(settings.NGINX_CONFIG_DIR, f"{client_name}.conf")
     with open(output_path, 'w') as f:
         f.write(nginx_content)
     
-    symlink_path = os.path.join(settings.NGINX_ENABLED_DIR, f"{client.name}.conf")
+    symlink_path = os.path.join(settings.NGINX_ENABLED_DIR, f"{client_name}.conf")
     if not os.path.exists(symlink_path):
         os.symlink(output_path, symlink_path)
 
 
+def remove_nginx_config(client_name: str) -> None:
+    for path in [
+        os.path.join(settings.NGINX_CONFIG_DIR, f"{client_name}.conf"),
+        os.path.join(settings.NGINX_ENABLED_DIR, f"{client_name}.conf"),
+    ]:
+        if os.path.lexists(path):
+            os.remove(path)
+
+
+def create_nginx_config(client: Client) -> None:
+    write_nginx_config(client.name, render_template(NGINX_TEMPLATE, nginx_context(client)))
+
+
+def create_nginx_configs(clients: list) -> int:
+    contents = render_many(NGINX_TEMPLATE, [nginx_context(client) for client in clients])
+    
+    for client, nginx_content in zip(clients, contents):
+        write_nginx_config(client.name, nginx_content)
+    
+    return len(contents)
+
+
 def start_client_stack(client_name: str) -> bool:
     client_dir = os.path.join(settings.ODOO_DATA_DIR, client_name)
+    docker = get_docker_client()
+    
+    try:
+        containers = docker.client_containers(client_name, all=True)
+        if containers:
+            # Start dependencies (redis) before odoo, mirroring compose's depends_on
+            containers.sort(key=lambda c: c.get("Labels", {}).get("com.docker.compose.service") == "odoo")
+            for container in containers:
+                if container.get("State") != "running":
+                    docker.start_container(container["Id"])
+            return True
+    except Exception as e:
+        logger.warning(f"Docker API start failed for {client_name}, falling back to docker-compose: {e}")
     
+    # First boot: compose has to create the network, volumes and containers
     try:
         subprocess.run(
             ["docker-compose", "up", "-d"],
@@ -291,16 +389,11 @@ def start_client_stack(client_name: str) -> bool:
 
 
 def stop_client_stack(client_name: str) -> bool:
-    client_dir = os.path.join(settings.ODOO_DATA_DIR, client_name)
+    docker = get_docker_client()
     
     try:
-        subprocess.run(
-            ["docker-compose", "down"],
-            cwd=client_dir,
-            check=True,
-            capture_output=True,
-            timeout=120
-        )
+        for container in docker.client_containers(client_name):
+            docker.stop_container(container["Id"])
         return True
     except Exception as e:
         logger.error(f"Error stopping client stack: {e}")
@@ -310,102 +403,55 @@ def stop_client_stack(client_name: str) -> bool:
 def remove_client_stack(client_name: str) -> bool:
     client_dir = os.path.join(settings.ODOO_DATA_DIR, client_name)
     
+    docker = get_docker_client()
+    project_label = f"{COMPOSE_PROJECT_LABEL}={compose_project_name(client_name)}"
+    
     try:
-        subprocess.run(
-            ["docker-compose", "down", "-v", "--remove-orphans"],
-            cwd=client_dir,
-            check=True,
-            capture_output=True,
-            timeout=120
-        )
+        for container in docker.client_containers(client_name, all=True):
+            docker.remove_container(container["Id"], force=True, volumes=True)
+        
+        for network in docker.list_networks(label=project_label):
+            docker.remove_network(network["Id"])
+        
+        for volume in docker.list_volumes(label=project_label):
+            docker.remove_volume(volume["Name"])
         
         import shutil
         if os.path.exists(client_dir):
             shutil.rmtree(client_dir)
         
+        get_disk_usage_indexer().forget(client_name)
+        
         return True
     except Exception as e:
         logger.error(f"Error removing client stack: {e}")
         return False
 
 
-def reload_nginx() -> bool:
-    try:
-        subprocess.run(
-            ["nginx", "-t"],
-            check=True,
-            capture_output=True
-        )
-        subprocess.run(
-            ["systemctl", "reload", "nginx"],
-            check=True,
-            capture_output=True
-        )
-        return True
-    except Exception as e:
-        logger.error(f"Error reloading nginx: {e}")
-        return False
+def reload_nginx(reason: str = None, wait: bool = True) -> bool:
+    return get_nginx_reloader().request_reload(reason, wait=wait)
 
 
 def get_container_stats(client_name: str) -> list:
+    collector = get_stats_collector()
+    if collector.has_client(client_name):
+        return collector.client_stats(client_name)
+    
+    docker = get_docker_client()
+    
     try:
-        result = subprocess.run(
-            [
-                "docker", "stats", "--no-stream", "--format",
-                "{{.Container}},{{.Name}},{{.Status}},{{.CPUPerc}},{{.MemUsage}},{{.MemPerc}},{{.NetIO}},{{.PIDs}}"
-            ],
-            capture_output=True,
-            text=True,
-            check=True
-        )
-        
-        stats = []
-        for line in result.stdout.strip().split('\n'):
-            if client_name in line:
-                parts = line.split(',')
-                if len(parts) >= 8:
-                    container_id = parts[0]
-                    name = parts[1]
-                    status = parts[2]
-                    cpu = parts[3]
-                    mem_usage = parts[4]
-                    mem_perc = parts[5]
-                    net_io = parts[6]
-                    pids = parts[7]
-                    
-                    stats.append({
-                        "container_id": container_id,
-                        "name": name,
-                        "status": status,
-                        "cpu_percent": cpu,
-                        "memory_usage": mem_usage,
-                        "memory_percent": mem_perc,
-                        "network_io": net_io,
-                        "pids": pids
-                    })
-        
-        return stats
+        return [
+            format_container_stats(container, docker.container_stats(container["Id"]))
+            for container in docker.client_containers(client_name)
+        ]
     except Exception as e:
         logger.error(f"Error getting container stats: {e}")
         return []
 
 
 def get_disk_usage(client_name: str) -> int:
-    client_dir = os.path.join(settings.ODOO_DATA_DIR, client_name)
-    
-    if not os.path.exists(client_dir):
-        return 0
-    
     try:
-        result = subprocess.run(
-            ["du", "-sm", client_dir],
-            capture_output=True,
-            text=True,
-            check=True
-        )
-        
-        size = result.stdout.split()[0]
-        return int(size)
+        return get_disk_usage_indexer().scan_client(client_name)
     except Exception:
         return 0
 
@@ -0,0 +1,239 @@
+import logging
+import secrets
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from backend.core.config import get_settings
+from backend.core.database import WorkerSessionLocal
+from backend.core.security import create_refresh_token, REFRESH_TOKEN_EXPIRE_DAYS
+from backend.api.models.models import RefreshToken, User
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+
+class RefreshTokenError(Exception):
+    pass
+
+
+class RefreshTokenReused(RefreshTokenError):
+    pass
+
+
+class RevokedTokenCache:
+    """Bounded LRU of revoked jtis and families, each kept until its token would expire.
+
+    Only a fast path: a miss falls through to the refresh_tokens row, so
+    entries evicted here or lost on restart are still caught there.
+    """
+    
+    def __init__(self, size: int = None):
+        self.size = size or settings.REFRESH_TOKEN_REVOKED_CACHE_SIZE
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, datetime]" = OrderedDict()
+    
+    def add(self, key: str, expires_at: datetime) -> None:
+        with self._lock:
+            self._entries[key] = expires_at
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+    
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            expires_at = self._entries.get(key)
+            if expires_at is None:
+                return False
+            if expires_at <= datetime.utcnow():
+                del self._entries[key]
+                return False
+            self._entries.move_to_end(key)
+            return True
+    
+    def prune(self) -> None:
+        now = datetime.utcnow()
+        with self._lock:
+            for key in [key for key, expires_at in self._entries.items() if expires_at <= now]:
+                del self._entries[key]
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def _family_key(family_id: str) -> str:
+    return f"family:{family_id}"
+
+
+class RefreshTokenStore:
+    """Issues, rotates and revokes refresh tokens recorded in the refresh_tokens table.
+
+    Every refresh revokes the presented token and issues its successor in
+    the same family. A revoked token coming back means two parties hold the
+    family, so the whole family is revoked and both must sign in again.
+    Expired rows are purged every REFRESH_TOKEN_PURGE_INTERVAL seconds.
+    """
+    
+    def __init__(self):
+        self.revoked = RevokedTokenCache()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.rotated = 0
+        self.reuse_detected = 0
+        self.purged = 0
+        self.last_purge: Optional[datetime] = None
+    
+    def _add(self, db: Session, user: User, family_id: str) -> Tuple[str, str]:
+        now = datetime.utcnow()
+        jti = secrets.token_hex(16)
+        expires_at = now + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
+        db.add(RefreshToken(
+            jti=jti,
+            family_id=family_id,
+            user_id=user.id,
+            issued_at=now,
+            expires_at=expires_at
+        ))
+        return jti, create_refresh_token(data={"sub": user.username, "fam": family_id}, jti=jti, expire=expires_at)
+    
+    def issue(self, db: Session, user: User) -> str:
+        """A refresh token starting a new family, as on login"""
+        _, token = self._add(db, user, secrets.token_hex(16))
+        db.commit()
+        return token
+    
+    def rotate(self, db: Session, payload: Dict[str, Any]) -> Tuple[User, str]:
+        """Revoke the presented refresh token and issue its successor, returning (user, token)"""
+        jti, family_id = payload.get("jti"), payload.get("fam")
+        if not jti or not family_id:
+            raise RefreshTokenError("Invalid refresh token")
+        
+        if _family_key(family_id) in self.revoked:
+            raise RefreshTokenReused("Refresh token has been revoked")
+        if jti in self.revoked:
+            raise self._reuse_detected(db, family_id)
+        
+        now = datetime.utcnow()
+        row = db.query(RefreshToken).filter(RefreshToken.jti == jti).first()
+        if row is None or row.family_id != family_id:
+            raise RefreshTokenError("Unknown refresh token")
+        if row.revoked_at is not None:
+            raise self._reuse_detected(db, family_id)
+        if row.expires_at <= now:
+            raise RefreshTokenError("Refresh token expired")
+        
+        user = db.query(User).filter(User.id == row.user_id).first()
+        if not user or not user.is_active:
+            self.revoke_family(db, family_id)
+            raise RefreshTokenError("User not found or inactive")
+        
+        new_jti, successor = self._add(db, user, family_id)
+        # Conditional, so of two concurrent refreshes with one token only one wins
+        claimed = db.query(RefreshToken).filter(
+            RefreshToken.jti == jti,
+            RefreshToken.revoked_at.is_(None)
+        ).update({"revoked_at": now, "replaced_by": new_jti}, synchronize_session=False)
+        if not claimed:
+            db.rollback()
+            raise self._reuse_detected(db, family_id)
+        db.commit()
+        
+        self.revoked.add(jti, row.expires_at)
+        with self._lock:
+            self.rotated += 1
+        return user, successor
+    
+    def _reuse_detected(self, db: Session, family_id: str) -> RefreshTokenReused:
+        revoked = self.revoke_family(db, family_id)
+        with self._lock:
+            self.reuse_detected += 1
+        logger.warning(f"Refresh token reuse detected, revoked family {family_id} ({revoked} live tokens)")
+        return RefreshTokenReused("Refresh token has been revoked")
+    
+    def revoke_family(self, db: Session, family_id: str) -> int:
+        now = datetime.utcnow()
+        live = db.query(RefreshToken.jti, RefreshToken.expires_at).filter(
+            RefreshToken.family_id == family_id,
+            RefreshToken.revoked_at.is_(None)
+        ).all()
+        if live:
+            db.query(RefreshToken).filter(
+                RefreshToken.family_id == family_id,
+                RefreshToken.revoked_at.is_(None)
+            ).update({"revoked_at": now}, synchronize_session=False)
+            db.commit()
+        
+        expires_at = max((row.expires_at for row in live), default=now + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS))
+        self.revoked.add(_family_key(family_id), expires_at)
+        for row in live:
+            self.revoked.add(row.jti, row.expires_at)
+        return len(live)
+    
+    def revoke_user(self, db: Session, user_id: int) -> int:
+        families = [row.family_id for row in db.query(RefreshToken.family_id).filter(
+            RefreshToken.user_id == user_id,
+            RefreshToken.revoked_at.is_(None)
+        ).distinct().all()]
+        return sum(self.revoke_family(db, family_id) for family_id in families)
+    
+    def purge_expired(self, db: Session) -> int:
+        cutoff = datetime.utcnow() - timedelta(hours=settings.REFRESH_TOKEN_PURGE_GRACE_HOURS)
+        purged = db.query(RefreshToken).filter(
+            RefreshToken.expires_at < cutoff
+        ).delete(synchronize_session=False)
+        db.commit()
+        self.revoked.prune()
+        
+        with self._lock:
+            self.purged += purged
+            self.last_purge = datetime.utcnow()
+        if purged:
+            logger.info(f"Purged {purged} expired refresh tokens")
+        return purged
+    
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "purge_enabled": settings.REFRESH_TOKEN_PURGE_ENABLED,
+                "revoked_cached": len(self.revoked),
+                "rotated": self.rotated,
+                "reuse_detected": self.reuse_detected,
+                "purged": self.purged,
+                "last_purge": self.last_purge.isoformat() if self.last_purge else None
+            }
+    
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            db = WorkerSessionLocal()
+            try:
+                self.purge_expired(db)
+            except Exception as e:
+                db.rollback()
+                logger.error(f"Refresh token purge failed: {e}")
+            finally:
+                db.close()
+            
+            self._stop.wait(settings.REFRESH_TOKEN_PURGE_INTERVAL)
+    
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="refresh-token-purge", daemon=True)
+        self._thread.start()
+    
+    def stop(self, timeout: float = 10.0) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+
+@lru_cache()
+def get_refresh_token_store() -> RefreshTokenStore:
+    return RefreshTokenStore()
@@ -0,0 +1,349 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+try:
+    import boto3
+    from boto3.s3.transfer import TransferConfig
+    from botocore.config import Config
+    BOTO3_AVAILABLE = True
+except ImportError:
+    BOTO3_AVAILABLE = False
+
+from backend.core.config import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+MIN_PART_SIZE = 5 * MB
+DELETE_BATCH = 1000
+
+UPLOAD = "upload"
+DOWNLOAD = "download"
+
+
+class TransferMetrics:
+    """Running totals of S3 transfer volume and time, per direction"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._totals: Dict[str, Dict[str, float]] = {}
+        self._last: Dict[str, Dict[str, Any]] = {}
+    
+    def record(self, direction: str, nbytes: int, seconds: float, success: bool = True) -> None:
+        with self._lock:
+            totals = self._totals.setdefault(direction, {
+                "transfers": 0, "failures": 0, "bytes": 0, "seconds": 0.0
+            })
+            if not success:
+                totals["failures"] += 1
+                return
+            totals["transfers"] += 1
+            totals["bytes"] += nbytes
+            totals["seconds"] += seconds
+            self._last[direction] = {
+                "bytes": nbytes,
+                "seconds": round(seconds, 3),
+                "throughput_mbps": round(nbytes / MB / seconds, 2) if seconds else None,
+            }
+    
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                direction: {
+                    "transfers": totals["transfers"],
+                    "failures": totals["failures"],
+                    "bytes": totals["bytes"],
+                    "avg_throughput_mbps": (
+                        round(totals["bytes"] / MB / totals["seconds"], 2) if totals["seconds"] else None
+                    ),
+                    "last": self._last.get(direction),
+                }
+                for direction, totals in self._totals.items()
+            }
+
+
+@lru_cache()
+def get_transfer_metrics() -> TransferMetrics:
+    return TransferMetrics()
+
+
+class BandwidthLimiter:
+    """Token bucket shared by every writer throttled against it.
+
+    consume() advances a virtual clock by nbytes / rate and sleeps for
+    however far that clock runs ahead of real time, less burst seconds of
+    slack, so concurrent writers split the rate between them.
+    """
+    
+    def __init__(self, bytes_per_sec: float, burst: float = 1.0):
+        self.bytes_per_sec = bytes_per_sec
+        self.burst = burst
+        self.throttled_seconds = 0.0
+        self._clock = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def consume(self, nbytes: int) -> None:
+        if self.bytes_per_sec <= 0:
+            return
+        
+        with self._lock:
+            now = time.monotonic()
+            self._clock = max(self._clock, now - self.burst) + nbytes / self.bytes_per_sec
+            delay = self._clock - now
+            if delay > 0:
+                self.throttled_seconds += delay
+        
+        if delay > 0:
+            time.sleep(delay)
+
+
+class ThrottledWriter:
+    """Write-only wrapper that paces writes to a sink through a BandwidthLimiter"""
+    
+    def __init__(self, sink, limiter: BandwidthLimiter):
+        self.sink = sink
+        self.limiter = limiter
+    
+    def writable(self) -> bool:
+        return True
+    
+    def write(self, data: bytes) -> int:
+        self.limiter.consume(len(data))
+        return self.sink.write(data)
+
+
+@lru_cache()
+def get_s3_client():
+    """Shared S3 client; boto3 clients are thread-safe once created"""
+    if not BOTO3_AVAILABLE:
+        logger.warning("boto3 not available, S3 operations will fail")
+        return None
+    return boto3.session.Session().client(
+        's3',
+        endpoint_url=settings.S3_ENDPOINT,
+        aws_access_key_id=settings.S3_ACCESS_KEY,
+        aws_secret_access_key=settings.S3_SECRET_KEY,
+        region_name=settings.S3_REGION,
+        config=Config(
+            max_pool_connections=settings.S3_MAX_POOL_CONNECTIONS,
+            retries={"max_attempts": 5, "mode": "adaptive"}
+        )
+    )
+
+
+@lru_cache()
+def get_transfer_config() -> "TransferConfig":
+    return TransferConfig(
+        multipart_threshold=settings.S3_MULTIPART_THRESHOLD_MB * MB,
+        multipart_chunksize=max(settings.S3_PART_SIZE_MB * MB, MIN_PART_SIZE),
+        max_concurrency=settings.S3_MAX_CONCURRENCY,
+        use_threads=True
+    )
+
+
+@lru_cache()
+def get_part_executor() -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(max_workers=settings.S3_MAX_CONCURRENCY, thread_name_prefix="s3-part")
+
+
+def upload_file(local_path: str, key: str, bucket: str = None, s3=None) -> int:
+    s3 = s3 or get_s3_client()
+    size = os.path.getsize(local_path)
+    started = time.monotonic()
+    try:
+        s3.upload_file(local_path, bucket or settings.S3_BUCKET, key, Config=get_transfer_config())
+    except Exception:
+        get_transfer_metrics().record(UPLOAD, 0, 0, success=False)
+        raise
+    get_transfer_metrics().record(UPLOAD, size, time.monotonic() - started)
+    return size
+
+
+def download_file(key: str, local_path: str, bucket: str = None, s3=None) -> int:
+    s3 = s3 or get_s3_client()
+    started = time.monotonic()
+    try:
+        s3.download_file(bucket or settings.S3_BUCKET, key, local_path, Config=get_transfer_config())
+    except Exception:
+        get_transfer_metrics().record(DOWNLOAD, 0, 0, success=False)
+        raise
+    size = os.path.getsize(local_path)
+    get_transfer_metrics().record(DOWNLOAD, size, time.monotonic() - started)
+    return size
+
+
+def list_keys(prefix: str, bucket: str = None, s3=None) -> List[str]:
+    s3 = s3 or get_s3_client()
+    return [
+        obj["Key"]
+        for page in s3.get_paginator("list_objects_v2").paginate(Bucket=bucket or settings.S3_BUCKET, Prefix=prefix)
+        for obj in page.get("Contents", [])
+    ]
+
+
+def delete_keys(keys: List[str], bucket: str = None, s3=None) -> List[Dict[str, Any]]:
+    """Delete objects 1000 keys per request, returning the per-key errors S3 reported"""
+    s3 = s3 or get_s3_client()
+    bucket = bucket or settings.S3_BUCKET
+    errors = []
+    
+    for i in range(0, len(keys), DELETE_BATCH):
+        response = s3.delete_objects(Bucket=bucket, Delete={
+            "Objects": [{"Key": key} for key in keys[i:i + DELETE_BATCH]],
+            "Quiet": True
+        })
+        errors.extend(response.get("Errors", []) if response else [])
+    
+    return errors
+
+
+def delete_prefix(prefix: str, bucket: str = None, s3=None) -> int:
+    """Delete every object under a prefix, 1000 keys per request"""
+    keys = list_keys(prefix, bucket, s3)
+    delete_keys(keys, bucket, s3)
+    return len(keys)
+
+
+class S3MultipartWriter:
+    """File-like sink that streams everything written to it into one S3 object.
+
+    Writes are buffered up to part_size and each full part is uploaded on the
+    shared part executor, with at most max_in_flight parts outstanding, so
+    memory stays at roughly (max_in_flight + 1) parts regardless of object
+    size. A SHA-256 and byte count are kept as data passes through. Objects
+    smaller than one part are sent with a single put_object on close. Call
+    close() to complete the upload or abort() to discard it; used as a
+    context manager an exception aborts.
+    """
+    
+    def __init__(self, s3, bucket: str, key: str, part_size: int = None, max_in_flight: int = None):
+        self.s3 = s3
+        self.bucket = bucket
+        self.key = key
+        self.part_size = max(part_size or settings.S3_PART_SIZE_MB * MB, MIN_PART_SIZE)
+        self.max_in_flight = max(max_in_flight or settings.S3_MAX_CONCURRENCY, 1)
+        self.bytes_written = 0
+        self._hash = hashlib.sha256()
+        self._buffer = bytearray()
+        self._parts: List[Dict[str, Any]] = []
+        self._pending: Deque[Tuple[int, Future]] = deque()
+        self._upload_id: Optional[str] = None
+        self._started = time.monotonic()
+        self.closed = False
+    
+    @property
+    def checksum(self) -> str:
+        return self._hash.hexdigest()
+    
+    def writable(self) -> bool:
+        return True
+    
+    def write(self, data: bytes) -> int:
+        self._hash.update(data)
+        self.bytes_written += len(data)
+        self._buffer += data
+        
+        while len(self._buffer) >= self.part_size:
+            chunk = bytes(self._buffer[:self.part_size])
+            del self._buffer[:self.part_size]
+            self._submit_part(chunk)
+        
+        return len(data)
+    
+    def _upload_part(self, part_number: int, chunk: bytes) -> str:
+        return self.s3.upload_part(
+            Bucket=self.bucket,
+            Key=self.key,
+            UploadId=self._upload_id,
+            PartNumber=part_number,
+            Body=chunk
+        )["ETag"]
+    
+    def _collect_oldest(self) -> None:
+        part_number, future = self._pending.popleft()
+        self._parts.append({"ETag": future.result(), "PartNumber": part_number})
+    
+    def _submit_part(self, chunk: bytes) -> None:
+        if self._upload_id is None:
+            self._upload_id = self.s3.create_multipart_upload(
+                Bucket=self.bucket, Key=self.key
+            )["UploadId"]
+        
+        # Back-pressure: the writer (and the dump feeding it) waits here
+        # rather than queueing parts without bound
+        while len(self._pending) >= self.max_in_flight:
+            self._collect_oldest()
+        
+        part_number = len(self._parts) + len(self._pending) + 1
+        self._pending.append((
+            part_number,
+            get_part_executor().submit(self._upload_part, part_number, chunk)
+        ))
+    
+    def close(self) -> None:
+        if self.closed:
+            return
+        
+        try:
+            if self._upload_id is None:
+                self.s3.put_object(Bucket=self.bucket, Key=self.key, Body=bytes(self._buffer))
+            else:
+                if self._buffer:
+                    self._submit_part(bytes(self._buffer))
+                while self._pending:
+                    self._collect_oldest()
+                self.s3.complete_multipart_upload(
+                    Bucket=self.bucket,
+                    Key=self.key,
+                    UploadId=self._upload_id,
+                    MultipartUpload={"Parts": self._parts}
+                )
+        except Exception:
+            # Otherwise the parts already uploaded stay stored (and billed)
+            # until a bucket lifecycle rule clears them
+            self.abort()
+            raise
+        
+        self._buffer = bytearray()
+        self.closed = True
+        get_transfer_metrics().record(UPLOAD, self.bytes_written, time.monotonic() - self._started)
+    
+    def abort(self) -> None:
+        if self.closed:
+            return
+        
+        self._buffer = bytearray()
+        self.closed = True
+        get_transfer_metrics().record(UPLOAD, 0, 0, success=False)
+        
+        for _, future in self._pending:
+            future.cancel()
+        for _, future in self._pending:
+            if not future.cancelled():
+                future.exception()
+        self._pending.clear()
+        
+        if self._upload_id is not None:
+            try:
+                self.s3.abort_multipart_upload(
+                    Bucket=self.bucket, Key=self.key, UploadId=self._upload_id
+                )
+            except Exception as e:
+                logger.warning(f"Could not abort multipart upload of {self.key}: {e}")
+    
+    def __enter__(self) -> "S3MultipartWriter":
+        return self
+    
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
@@ -0,0 +1,164 @@
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from functools import lru_cache
+from typing import Any, Deque, Dict, List, Optional
+
+import httpx
+
+from backend.core.config import get_settings
+from backend.api.services.docker_client import (
+    AsyncDockerClient, CLIENT_LABEL, parse_stats, format_parsed_stats
+)
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+
+class StatsCollector:
+    """Keeps a rolling window of Docker stats for every client container.
+
+    One stats stream is held open per labelled container (the Engine API has
+    no fleet-wide stats endpoint) and discovery re-lists containers every
+    STATS_DISCOVERY_INTERVAL seconds. Reads only touch in-memory buffers.
+    """
+    
+    def __init__(self, history_size: int = None):
+        self.history_size = history_size or settings.STATS_HISTORY_SIZE
+        self._containers: Dict[str, Dict[str, Any]] = {}
+        self._samples: Dict[str, Deque[Dict[str, Any]]] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._discovery: Optional[asyncio.Task] = None
+        self._docker: Optional[AsyncDockerClient] = None
+    
+    @property
+    def running(self) -> bool:
+        return self._discovery is not None and not self._discovery.done()
+    
+    async def start(self) -> None:
+        if self.running:
+            return
+        if not os.path.exists(settings.DOCKER_SOCKET_PATH):
+            logger.warning(f"Docker socket {settings.DOCKER_SOCKET_PATH} not found, stats collector disabled")
+            return
+        
+        # Streams are long-lived, so they get their own unbounded pool rather
+        # than starving the shared request pool
+        self._docker = AsyncDockerClient(limits=httpx.Limits(max_connections=None, max_keepalive_connections=0))
+        self._discovery = asyncio.create_task(self._discover_loop())
+        logger.info("Stats collector started")
+    
+    async def stop(self) -> None:
+        tasks = list(self._tasks.values())
+        if self._discovery:
+            tasks.append(self._discovery)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        
+        self._tasks.clear()
+        self._discovery = None
+        if self._docker:
+            await self._docker.aclose()
+            self._docker = None
+    
+    async def _discover_loop(self) -> None:
+        while True:
+            try:
+                await self.refresh_containers()
+            except Exception as e:
+                logger.warning(f"Stats discovery failed: {e}")
+            await asyncio.sleep(settings.STATS_DISCOVERY_INTERVAL)
+    
+    async def refresh_containers(self) -> None:
+        containers = await self._docker.list_containers(label=CLIENT_LABEL)
+        seen = set()
+        
+        for container in containers:
+            container_id = container["Id"]
+            seen.add(container_id)
+            self._containers[container_id] = container
+            
+            task = self._tasks.get(container_id)
+            if task is None or task.done():
+                self._samples.setdefault(container_id, deque(maxlen=self.history_size))
+                self._tasks[container_id] = asyncio.create_task(self._stream(container_id))
+        
+        for container_id in list(self._tasks):
+            if container_id not in seen:
+                self._tasks.pop(container_id).cancel()
+                self._containers.pop(container_id, None)
+                self._samples.pop(container_id, None)
+    
+    async def _stream(self, container_id: str) -> None:
+        try:
+            async for frame in self._docker.stream_stats(container_id):
+                sample = parse_stats(frame)
+                sample["timestamp"] = time.time()
+                self._samples[container_id].append(sample)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.debug(f"Stats stream for {container_id[:12]} ended: {e}")
+    
+    def _client_container_ids(self, client_name: str) -> List[str]:
+        return [
+            container_id for container_id, container in list(self._containers.items())
+            if (container.get("Labels") or {}).get(CLIENT_LABEL) == client_name
+        ]
+    
+    def has_client(self, client_name: str) -> bool:
+        return any(self._samples.get(cid) for cid in self._client_container_ids(client_name))
+    
+    def client_stats(self, client_name: str) -> list:
+        stats = []
+        for container_id in self._client_container_ids(client_name):
+            samples = self._samples.get(container_id)
+            if samples:
+                stats.append(format_parsed_stats(self._containers[container_id], samples[-1]))
+        return stats
+    
+    def client_history(self, client_name: str) -> Dict[str, list]:
+        history = {}
+        for container_id in self._client_container_ids(client_name):
+            names = self._containers[container_id].get("Names") or [container_id[:12]]
+            history[names[0].lstrip("/")] = list(self._samples.get(container_id) or [])
+        return history
+    
+    def fleet_summary(self) -> Dict[str, Any]:
+        per_client: Dict[str, Dict[str, float]] = {}
+        
+        for container_id, container in list(self._containers.items()):
+            samples = self._samples.get(container_id)
+            if not samples:
+                continue
+            latest = samples[-1]
+            client_name = (container.get("Labels") or {}).get(CLIENT_LABEL)
+            totals = per_client.setdefault(client_name, {
+                "cpu_percent": 0.0, "memory_usage": 0, "memory_limit": 0, "pids": 0
+            })
+            totals["cpu_percent"] += latest["cpu_percent"]
+            totals["memory_usage"] += latest["memory_usage"]
+            totals["memory_limit"] += latest["memory_limit"]
+            totals["pids"] += latest["pids"]
+        
+        memory_percents = [
+            totals["memory_usage"] / totals["memory_limit"] * 100.0
+            for totals in per_client.values() if totals["memory_limit"]
+        ]
+        
+        return {
+            "clients": len(per_client),
+            "containers": sum(1 for samples in list(self._samples.values()) if samples),
+            "total_cpu_percent": round(sum(t["cpu_percent"] for t in per_client.values()), 2),
+            "total_memory_mb": round(sum(t["memory_usage"] for t in per_client.values()) / (1024 * 1024), 2),
+            "avg_memory_usage_percent": round(sum(memory_percents) / len(memory_percents), 2) if memory_percents else 0.0,
+            "total_pids": sum(t["pids"] for t in per_client.values()),
+        }
+
+
+@lru_cache()
+def get_stats_collector() -> StatsCollector:
+    return StatsCollector()
@@ -0,0 +1,33 @@
+from functools import lru_cache
+from typing import Iterable, List
+import os
+
+from jinja2 import Environment, FileSystemLoader, FileSystemBytecodeCache
+
+from backend.core.config import get_settings
+
+settings = get_settings()
+
+COMPOSE_TEMPLATE = "docker/templates/docker-compose.yml.j2"
+NGINX_TEMPLATE = "nginx/sites-available/client.conf.j2"
+
+
+@lru_cache()
+def get_template_environment() -> Environment:
+    if settings.TEMPLATE_CACHE_DIR:
+        os.makedirs(settings.TEMPLATE_CACHE_DIR, exist_ok=True)
+    
+    return Environment(
+        loader=FileSystemLoader(settings.INFRASTRUCTURE_DIR),
+        bytecode_cache=FileSystemBytecodeCache(settings.TEMPLATE_CACHE_DIR),
+        auto_reload=settings.DEBUG,
+    )
+
+
+def render_template(template_name: str, context: dict) -> str:
+    return get_template_environment().get_template(template_name).render(**context)
+
+
+def render_many(template_name: str, contexts: Iterable[dict]) -> List[str]:
+    template = get_template_environment().get_template(template_name)
+    return [template.render(**context) for context in contexts]
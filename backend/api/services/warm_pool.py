@@ -0,0 +1,218 @@
+import logging
+import secrets
+import threading
+from collections import defaultdict
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from backend.core.config import get_settings
+from backend.core.database import WorkerSessionLocal
+from backend.api.models.models import Client, StandbyDatabase
+from backend.api.services.docker_client import get_docker_client
+from backend.api.services.db_templates import find_template
+from backend.api.services.provisioning import (
+    create_external_database, adopt_external_database, delete_external_databases
+)
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+STANDBY_READY = "ready"
+STANDBY_CLAIMED = "claimed"
+STANDBY_BROKEN = "broken"
+
+MAX_CLAIM_ATTEMPTS = 5
+
+
+def stack_images() -> list:
+    return [f"odoo:{settings.ODOO_VERSION}", "redis:7-alpine"]
+
+
+class WarmPool:
+    """Keeps WARM_POOL_SIZES[plan] standby tenant databases ready to claim.
+
+    A standby is cloned from the plan's golden template and already handed
+    to its own role, so claiming one at signup is two renames and a password
+    change instead of a clone. Container stacks are not pooled: their names,
+    labels, networks and volumes all derive from the client name and Docker
+    cannot relabel a container, so instead the replenisher keeps the stack
+    images pulled so that activation never waits on a registry.
+    """
+    
+    def __init__(self):
+        self.hits: Dict[str, int] = defaultdict(int)
+        self.misses: Dict[str, int] = defaultdict(int)
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    def target_size(self, plan: str) -> int:
+        return max(settings.WARM_POOL_SIZES.get(plan, 0), 0)
+    
+    def _claim_row(self, db: Session, plan: str, client: Client) -> Optional[StandbyDatabase]:
+        for _ in range(MAX_CLAIM_ATTEMPTS):
+            candidate = db.query(StandbyDatabase.id).filter(
+                StandbyDatabase.plan == plan,
+                StandbyDatabase.status == STANDBY_READY
+            ).order_by(StandbyDatabase.id).first()
+            if not candidate:
+                return None
+            
+            claimed = db.query(StandbyDatabase).filter(
+                StandbyDatabase.id == candidate.id,
+                StandbyDatabase.status == STANDBY_READY
+            ).update({
+                StandbyDatabase.status: STANDBY_CLAIMED,
+                StandbyDatabase.client_id: client.id,
+                StandbyDatabase.claimed_at: datetime.utcnow(),
+            }, synchronize_session=False)
+            db.commit()
+            
+            if claimed:
+                return db.query(StandbyDatabase).filter(StandbyDatabase.id == candidate.id).first()
+        return None
+    
+    def claim(self, db: Session, client: Client) -> Optional[StandbyDatabase]:
+        """Give a client a standby database under its own db_name/db_user, if one is ready"""
+        if not settings.WARM_POOL_ENABLED or not self.target_size(client.plan):
+            return None
+        
+        standby = self._claim_row(db, client.plan, client)
+        if standby:
+            try:
+                adopt_external_database(
+                    standby.db_name, standby.db_user,
+                    client.db_name, client.db_user, client.db_password
+                )
+            except Exception as e:
+                logger.warning(f"Could not adopt standby {standby.db_name} for {client.name}: {e}")
+                standby.status = STANDBY_BROKEN
+                standby.client_id = None
+                db.commit()
+                standby = None
+        
+        if standby:
+            self.hits[client.plan] += 1
+            logger.info(f"Warm pool hit for {client.name} ({client.plan}): {standby.db_name}")
+        else:
+            self.misses[client.plan] += 1
+            logger.info(f"Warm pool miss for {client.name} ({client.plan})")
+        
+        self._wakeup.set()
+        return standby
+    
+    def _create_standby(self, db: Session, plan: str, template: str) -> bool:
+        name = f"standby_{plan}_{secrets.token_hex(4)}"
+        if not create_external_database(name, name, secrets.token_urlsafe(24), template):
+            return False
+        
+        db.add(StandbyDatabase(plan=plan, db_name=name, db_user=name, template_name=template))
+        db.commit()
+        return True
+    
+    def _discard_stale(self, db: Session, templates: Dict[str, Optional[str]]) -> int:
+        stale = [
+            standby for standby in db.query(StandbyDatabase).filter(
+                StandbyDatabase.status.in_([STANDBY_READY, STANDBY_BROKEN])
+            ).all()
+            if standby.status == STANDBY_BROKEN
+            or standby.template_name != templates.get(standby.plan)
+            or not self.target_size(standby.plan)
+        ]
+        if not stale:
+            return 0
+        
+        dropped = delete_external_databases([(s.db_name, s.db_user) for s in stale])
+        for standby in stale:
+            if dropped.get(standby.db_name):
+                db.delete(standby)
+        db.commit()
+        return len(stale)
+    
+    def _pull_images(self) -> None:
+        docker = get_docker_client()
+        for image in stack_images():
+            try:
+                if not docker.image_exists(image):
+                    logger.info(f"Pulling {image}")
+                    docker.pull_image(image)
+            except Exception as e:
+                logger.warning(f"Could not pull {image}: {e}")
+    
+    def replenish(self, db: Session) -> Dict[str, int]:
+        if settings.WARM_POOL_PULL_IMAGES:
+            self._pull_images()
+        
+        templates = {plan: find_template(plan) for plan in settings.WARM_POOL_SIZES}
+        self._discard_stale(db, templates)
+        
+        created = {}
+        for plan, template in templates.items():
+            # Without a template a standby is just an empty database, which
+            # is no faster to adopt than to create
+            if not template:
+                continue
+            
+            missing = self.target_size(plan) - self.ready_count(db, plan)
+            created[plan] = 0
+            for _ in range(max(missing, 0)):
+                if self._stop.is_set() or not self._create_standby(db, plan, template):
+                    break
+                created[plan] += 1
+        
+        return created
+    
+    def ready_count(self, db: Session, plan: str) -> int:
+        return db.query(func.count(StandbyDatabase.id)).filter(
+            StandbyDatabase.plan == plan,
+            StandbyDatabase.status == STANDBY_READY
+        ).scalar()
+    
+    def status(self, db: Session) -> Dict[str, Any]:
+        return {
+            plan: {
+                "target": self.target_size(plan),
+                "ready": self.ready_count(db, plan),
+                "hits": self.hits[plan],
+                "misses": self.misses[plan],
+            }
+            for plan in settings.WARM_POOL_SIZES
+        }
+    
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            db = WorkerSessionLocal()
+            try:
+                created = self.replenish(db)
+                if any(created.values()):
+                    logger.info(f"Warm pool replenished: {created}")
+            except Exception as e:
+                logger.error(f"Warm pool replenish failed: {e}")
+            finally:
+                db.close()
+            
+            self._wakeup.wait(settings.WARM_POOL_REPLENISH_INTERVAL)
+            self._wakeup.clear()
+    
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="warm-pool", daemon=True)
+        self._thread.start()
+    
+    def stop(self, timeout: float = 10.0) -> None:
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+
+@lru_cache()
+def get_warm_pool() -> WarmPool:
+    return WarmPool()
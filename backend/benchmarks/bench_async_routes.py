@@ -0,0 +1,178 @@
+"""Hammer the async read routes and a sync copy of /api/clients with many open connections.
+
+Starts uvicorn in a child process on the configured control-plane database,
+without the lifespan's background services. The child also mounts the
+previous sync list_clients at /bench/clients-sync. Each route is then held
+at --connections concurrent keep-alive connections for --seconds. The
+report gives req/s, p50/p99 latency and the server's peak RSS. The load
+generator is one asyncio process, so run it on a separate core from the
+server. Point DATABASE_URL at PostgreSQL for production-like numbers.
+
+    ulimit -n 4096
+    cd $(mktemp -d) && PYTHONPATH=/path/to/repo \\
+        python /path/to/repo/backend/benchmarks/bench_async_routes.py --connections 1000 --seconds 20
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from typing import List
+
+import httpx
+import psutil
+
+from backend.core.database import Base, SessionLocal, engine
+from backend.core.security import create_access_token, get_password_hash
+from backend.api.models.models import Client, User
+from backend.api.models import payment_models  # noqa: F401 - payments table for create_all
+from backend.api.services.principal_cache import principal_claims
+
+BENCH_USER = "bench_async"
+ROUTES = ["/bench/clients-sync", "/api/clients", "/api/clients/stats", "/api/payments/history"]
+
+
+def serve(port: int) -> None:
+    import uvicorn
+    from fastapi import Depends
+    from sqlalchemy.orm import Session
+
+    from backend.core.database import get_db
+    from backend.api.routes.clients import get_current_user
+    from backend.api.schemas.schemas import ClientResponse
+    from backend.main import app
+
+    @app.get("/bench/clients-sync", response_model=List[ClientResponse])
+    def list_clients_sync(
+        skip: int = 0,
+        limit: int = 100,
+        db: Session = Depends(get_db),
+        current_user: User = Depends(get_current_user)
+    ):
+        clients = db.query(Client).offset(skip).limit(limit).all()
+        for client in clients:
+            if client.custom_domains and isinstance(client.custom_domains, str):
+                client.custom_domains = json.loads(client.custom_domains)
+            elif not client.custom_domains:
+                client.custom_domains = []
+        return clients
+
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning", lifespan="off", backlog=4096)
+
+
+def seed(clients: int) -> User:
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.username == BENCH_USER).first()
+        if user is None:
+            user = User(
+                email=f"{BENCH_USER}@example.com",
+                username=BENCH_USER,
+                hashed_password=get_password_hash("bench"),
+                is_superuser=True
+            )
+            db.add(user)
+        existing = db.query(Client).filter(Client.name.like("benchclient%")).count()
+        for i in range(existing, clients):
+            db.add(Client(
+                name=f"benchclient{i}",
+                domain=f"benchclient{i}.example.com",
+                email=f"benchclient{i}@example.com",
+                db_name=f"benchclient{i}",
+                db_user=f"benchclient{i}",
+                db_password="bench",
+                odoo_port=40000 + i,
+                status="active",
+                plan="basic"
+            ))
+        db.commit()
+        db.refresh(user)
+        db.expunge(user)
+        return user
+    finally:
+        db.close()
+
+
+def percentile(samples: list, pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))] if ordered else 0.0
+
+
+async def load(base_url: str, path: str, token: str, connections: int, seconds: float, server: psutil.Process) -> None:
+    limits = httpx.Limits(max_connections=connections, max_keepalive_connections=connections)
+    latencies, errors, peak_rss = [], 0, server.memory_info().rss
+    headers = {"Authorization": f"Bearer {token}"}
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120) as client:
+        deadline = time.perf_counter() + seconds
+
+        async def worker():
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                try:
+                    response = await client.get(path, headers=headers)
+                    ok = response.status_code == 200
+                except httpx.HTTPError:
+                    ok = False
+                if ok:
+                    latencies.append(time.perf_counter() - start)
+                else:
+                    errors += 1
+
+        async def sample_memory():
+            nonlocal peak_rss
+            while time.perf_counter() < deadline:
+                peak_rss = max(peak_rss, server.memory_info().rss)
+                await asyncio.sleep(0.2)
+
+        start = time.perf_counter()
+        await asyncio.gather(sample_memory(), *(worker() for _ in range(connections)))
+        elapsed = time.perf_counter() - start
+
+    print(
+        f"  {path:<24} {len(latencies) / elapsed:8.0f} {percentile(latencies, 0.5) * 1000:8.0f} "
+        f"{percentile(latencies, 0.99) * 1000:8.0f} {errors:7d} {peak_rss / 1024 / 1024:9.0f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--connections", type=int, default=1000)
+    parser.add_argument("--seconds", type=float, default=20)
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.port)
+        return
+
+    user = seed(args.clients)
+    token = create_access_token(data=principal_claims(user))
+    child = subprocess.Popen([sys.executable, os.path.abspath(__file__), "--serve", "--port", str(args.port)])
+    base_url = f"http://127.0.0.1:{args.port}"
+    try:
+        for _ in range(100):
+            try:
+                httpx.get(f"{base_url}/api/health", timeout=1)
+                break
+            except httpx.HTTPError:
+                time.sleep(0.2)
+        server = psutil.Process(child.pid)
+
+        print(f"connections: {args.connections}, seconds: {args.seconds}, clients: {args.clients}")
+        print(f"  {'route':<24} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7} {'peak MB':>9}")
+        for path in ROUTES:
+            asyncio.run(load(base_url, path, token, args.connections, args.seconds, server))
+    finally:
+        child.terminate()
+        child.wait()
+
+
+if __name__ == "__main__":
+    main()
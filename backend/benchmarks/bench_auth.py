@@ -0,0 +1,117 @@
+"""Load /api/clients with and without the principal cache and count the SQL each request runs.
+
+Runs in-process against the configured control-plane database; a bench
+user is created if missing. Run from a scratch directory to keep the
+default SQLite file out of the checkout:
+
+    cd $(mktemp -d) && PYTHONPATH=/path/to/repo \\
+        python /path/to/repo/backend/benchmarks/bench_auth.py --requests 2000
+"""
+import argparse
+import itertools
+import time
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from backend.core.config import get_settings
+from backend.core.database import Base, SessionLocal, engine, get_async_engine
+from backend.core.security import create_access_token, get_password_hash
+from backend.api.models.models import User
+from backend.api.services.principal_cache import get_principal_cache, principal_claims
+from backend.main import app
+
+settings = get_settings()
+
+BENCH_USER = "bench_principal"
+
+
+class StatementCounter:
+    def __init__(self):
+        self.total = 0
+        self.users = 0
+        # /api/clients runs on the async engine, authentication may still use the sync one
+        event.listen(engine, "before_cursor_execute", self)
+        event.listen(get_async_engine().sync_engine, "before_cursor_execute", self)
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.total += 1
+        if "FROM users" in statement:
+            self.users += 1
+
+    def reset(self):
+        self.total = 0
+        self.users = 0
+
+
+def bench_user() -> User:
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.username == BENCH_USER).first()
+        if user is None:
+            user = User(
+                email=f"{BENCH_USER}@example.com",
+                username=BENCH_USER,
+                hashed_password=get_password_hash("bench"),
+                is_superuser=True
+            )
+            db.add(user)
+            db.commit()
+            db.refresh(user)
+        db.expunge(user)
+        return user
+    finally:
+        db.close()
+
+
+def run(label: str, client: TestClient, tokens, requests: int, counter: StatementCounter) -> None:
+    client.get("/api/clients", headers={"Authorization": f"Bearer {next(tokens)}"})
+    counter.reset()
+
+    start = time.perf_counter()
+    for _ in range(requests):
+        response = client.get("/api/clients", headers={"Authorization": f"Bearer {next(tokens)}"})
+        assert response.status_code == 200, response.text
+    elapsed = time.perf_counter() - start
+
+    print(
+        f"  {label:<14} {requests / elapsed:9.0f} {elapsed / requests * 1e6:9.0f} "
+        f"{counter.total / requests:9.2f} {counter.users / requests:9.2f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    user = bench_user()
+    token = create_access_token(data=principal_claims(user))
+    counter = StatementCounter()
+    cache = get_principal_cache()
+    ttl = cache.ttl
+
+    # Not used as a context manager, so the lifespan's background services stay off
+    client = TestClient(app)
+    print(f"requests: {args.requests}")
+    print(f"  {'mode':<14} {'req/s':>9} {'us/req':>9} {'sql/req':>9} {'users/req':>9}")
+
+    cache.ttl = 0
+    cache.clear()
+    run("no cache", client, itertools.repeat(token), args.requests, counter)
+
+    cache.ttl = ttl
+    cache.clear()
+    run("cache", client, itertools.repeat(token), args.requests, counter)
+
+    # A new token every request: the cache cannot help, signed claims can
+    settings.AUTH_TRUST_TOKEN_CLAIMS = True
+    cache.clear()
+    fresh = (create_access_token(data=principal_claims(user)) for _ in itertools.count())
+    run("claims", client, fresh, args.requests, counter)
+    settings.AUTH_TRUST_TOKEN_CLAIMS = False
+
+
+if __name__ == "__main__":
+    main()
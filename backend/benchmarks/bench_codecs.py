@@ -0,0 +1,99 @@
+"""Compare backup codecs on a sample Odoo dump: compression ratio and throughput.
+
+Take the sample uncompressed so every codec starts from the same bytes:
+
+    pg_dump -U odoo -Fc -Z0 -f /tmp/odoo_sample.dump odoo_db
+    PYTHONPATH=. python backend/benchmarks/bench_codecs.py /tmp/odoo_sample.dump \\
+        --codecs none,gzip:1,gzip:6,zstd:1,zstd:3,zstd:9,lz4:0 --encrypt
+
+Codecs whose package is not installed are skipped.
+"""
+import argparse
+import os
+import time
+
+from backend.api.services.backup_codecs import (
+    EncodingWriter, DecodingWriter, codec_available, FRAME_SIZE
+)
+
+MB = 1024 * 1024
+
+
+class CountingSink:
+    def __init__(self, keep: bool = False):
+        self.size = 0
+        self.blocks = [] if keep else None
+
+    def write(self, data: bytes) -> int:
+        self.size += len(data)
+        if self.blocks is not None:
+            self.blocks.append(data)
+        return len(data)
+
+
+def parse_codecs(spec: str) -> list:
+    codecs = []
+    for item in spec.split(","):
+        codec, _, level = item.partition(":")
+        codecs.append((codec, int(level) if level else None))
+    return codecs
+
+
+def encode(data: bytes, codec: str, level: int, key: bytes) -> CountingSink:
+    sink = CountingSink(keep=True)
+    writer = EncodingWriter(sink, codec, level, key)
+    for i in range(0, len(data), FRAME_SIZE):
+        writer.write(data[i:i + FRAME_SIZE])
+    writer.finish()
+    return sink
+
+
+def decode(blocks: list, codec: str, key: bytes) -> int:
+    sink = CountingSink()
+    reader = DecodingWriter(sink, codec, key)
+    for block in blocks:
+        reader.write(block)
+    reader.finish()
+    return sink.size
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("dump", help="Uncompressed (-Z0) pg_dump file")
+    parser.add_argument("--codecs", default="none,gzip:1,gzip:6,zstd:1,zstd:3,zstd:9,lz4:0")
+    parser.add_argument("--encrypt", action="store_true", help="Also run each codec with AES-GCM encryption")
+    args = parser.parse_args()
+
+    with open(args.dump, "rb") as f:
+        data = f.read()
+    print(f"sample: {len(data) / MB:.1f} MB")
+    print(f"  {'codec':<14} {'ratio':>7} {'size MB':>9} {'enc MB/s':>9} {'dec MB/s':>9}")
+
+    keys = [None]
+    if args.encrypt:
+        keys.append(os.urandom(32))
+
+    for codec, level in parse_codecs(args.codecs):
+        if not codec_available(codec):
+            print(f"  {codec:<14} not installed")
+            continue
+        for key in keys:
+            label = f"{codec}:{level if level is not None else '-'}" + ("+aes" if key else "")
+
+            start = time.perf_counter()
+            encoded = encode(data, codec, level, key)
+            encode_seconds = time.perf_counter() - start
+
+            start = time.perf_counter()
+            decoded_size = decode(encoded.blocks, codec, key)
+            decode_seconds = time.perf_counter() - start
+            assert decoded_size == len(data)
+
+            print(
+                f"  {label:<14} {len(data) / encoded.size:7.2f} {encoded.size / MB:9.1f} "
+                f"{len(data) / MB / encode_seconds:9.1f} {len(data) / MB / decode_seconds:9.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
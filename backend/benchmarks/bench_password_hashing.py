@@ -0,0 +1,119 @@
+"""Login storm: bcrypt on the shared threadpool versus the password hashing process pool.
+
+Each mode fires --logins password checks at --concurrency in flight. A
+probe meanwhile times a no-op on the threadpool every 10 ms, standing in
+for every other sync endpoint. The last mode drives /api/auth/login itself
+in-process. Run from a scratch directory to keep the default SQLite file
+out of the checkout:
+
+    cd $(mktemp -d) && PYTHONPATH=/path/to/repo \\
+        python /path/to/repo/backend/benchmarks/bench_password_hashing.py --logins 200 --concurrency 64
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+from fastapi.concurrency import run_in_threadpool
+
+from backend.core.database import Base, SessionLocal, engine
+from backend.core.security import (
+    verify_password, verify_password_async, get_password_hash, get_password_hasher, close_password_hasher
+)
+from backend.api.models.models import User
+from backend.main import app
+
+BENCH_USER = "bench_login"
+PASSWORD = "Bench-Password-1"
+
+
+def percentile(samples: list, pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def bench_user() -> str:
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.username == BENCH_USER).first()
+        if user is None:
+            user = User(email=f"{BENCH_USER}@example.com", username=BENCH_USER, hashed_password=get_password_hash(PASSWORD))
+            db.add(user)
+            db.commit()
+        return user.hashed_password
+    finally:
+        db.close()
+
+
+async def storm(label: str, check, logins: int, concurrency: int) -> None:
+    slots = asyncio.Semaphore(concurrency)
+    latencies, probes = [], []
+    done = asyncio.Event()
+
+    async def one():
+        async with slots:
+            start = time.perf_counter()
+            await check()
+            latencies.append(time.perf_counter() - start)
+
+    async def probe():
+        while not done.is_set():
+            start = time.perf_counter()
+            await run_in_threadpool(lambda: None)
+            probes.append(time.perf_counter() - start)
+            await asyncio.sleep(0.01)
+
+    prober = asyncio.create_task(probe())
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(logins)))
+    elapsed = time.perf_counter() - start
+    done.set()
+    await prober
+
+    print(
+        f"  {label:<14} {logins / elapsed:8.1f} {statistics.median(latencies) * 1000:8.0f} "
+        f"{percentile(latencies, 0.99) * 1000:8.0f} {percentile(probes, 0.99) * 1000:10.1f}"
+    )
+
+
+async def run(args, hashed: str) -> None:
+    print(f"logins: {args.logins}, concurrency: {args.concurrency}, hash workers: {get_password_hasher().workers}")
+    print(f"  {'mode':<14} {'login/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'probe p99':>10}")
+
+    async def threadpool():
+        await run_in_threadpool(verify_password, PASSWORD, hashed)
+
+    async def process_pool():
+        await verify_password_async(PASSWORD, hashed)
+
+    # Warm the pool so process start-up is not counted
+    await asyncio.gather(*(process_pool() for _ in range(get_password_hasher().workers)))
+
+    await storm("threadpool", threadpool, args.logins, args.concurrency)
+    await storm("process pool", process_pool, args.logins, args.concurrency)
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        async def login_route():
+            response = await client.post("/api/auth/login", data={"username": BENCH_USER, "password": PASSWORD})
+            assert response.status_code in (200, 503), response.text
+
+        await storm("login route", login_route, args.logins, args.concurrency)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=64)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    hashed = bench_user()
+    try:
+        asyncio.run(run(args, hashed))
+    finally:
+        close_password_hasher()
+
+
+if __name__ == "__main__":
+    main()
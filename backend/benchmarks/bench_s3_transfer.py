@@ -0,0 +1,103 @@
+"""Compare default boto3 transfers with the tuned shared transfer manager on large dumps.
+
+Needs a reachable S3 endpoint (e.g. MinIO) configured through the usual
+S3_* settings. Each size is written once as a local file, then uploaded and
+downloaded with boto3's default TransferConfig and with get_transfer_config(),
+and streamed through S3MultipartWriter as trigger_backup does.
+
+    S3_ENDPOINT=http://localhost:9000 PYTHONPATH=. \\
+        python backend/benchmarks/bench_s3_transfer.py --sizes-gb 1,2,5,10
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import boto3
+from boto3.s3.transfer import TransferConfig
+
+from backend.core.config import get_settings
+from backend.api.services.s3_transfer import (
+    get_s3_client, get_transfer_config, S3MultipartWriter, MB
+)
+
+settings = get_settings()
+
+BLOCK = 64 * MB
+
+
+def make_dump(path: str, size: int) -> None:
+    # Random blocks so nothing along the way can compress or dedupe the data
+    block = os.urandom(BLOCK)
+    with open(path, "wb") as f:
+        remaining = size
+        while remaining > 0:
+            f.write(block[:min(remaining, BLOCK)])
+            remaining -= BLOCK
+
+
+def timed(label: str, size: int, func) -> None:
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<22} {elapsed:8.1f} s   {size / MB / elapsed:8.1f} MB/s")
+
+
+def stream_upload(s3, path: str, key: str) -> None:
+    with open(path, "rb") as f, S3MultipartWriter(s3, settings.S3_BUCKET, key) as upload:
+        while True:
+            chunk = f.read(1024 * 1024)
+            if not chunk:
+                break
+            upload.write(chunk)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes-gb", default="1,2,5,10")
+    parser.add_argument("--dir", default=tempfile.gettempdir(), help="Where to write the dump files")
+    args = parser.parse_args()
+
+    tuned_client = get_s3_client()
+    default_client = boto3.client(
+        's3',
+        endpoint_url=settings.S3_ENDPOINT,
+        aws_access_key_id=settings.S3_ACCESS_KEY,
+        aws_secret_access_key=settings.S3_SECRET_KEY,
+        region_name=settings.S3_REGION
+    )
+    tuned = get_transfer_config()
+    print(
+        f"tuned: part {tuned.multipart_chunksize // MB} MB, concurrency {tuned.max_concurrency}, "
+        f"pool {settings.S3_MAX_POOL_CONNECTIONS}"
+    )
+
+    for size_gb in [float(s) for s in args.sizes_gb.split(",")]:
+        size = int(size_gb * 1024 * MB)
+        path = os.path.join(args.dir, f"bench_dump_{size_gb:g}g.bin")
+        key = f"{settings.S3_PREFIX}_bench/dump_{size_gb:g}g.bin"
+        print(f"{size_gb:g} GB")
+
+        make_dump(path, size)
+        try:
+            timed("upload default", size, lambda: default_client.upload_file(
+                path, settings.S3_BUCKET, key, Config=TransferConfig()
+            ))
+            timed("upload tuned", size, lambda: tuned_client.upload_file(
+                path, settings.S3_BUCKET, key, Config=tuned
+            ))
+            timed("upload streamed", size, lambda: stream_upload(tuned_client, path, key))
+            timed("download default", size, lambda: default_client.download_file(
+                settings.S3_BUCKET, key, path, Config=TransferConfig()
+            ))
+            timed("download tuned", size, lambda: tuned_client.download_file(
+                settings.S3_BUCKET, key, path, Config=tuned
+            ))
+        finally:
+            tuned_client.delete_object(Bucket=settings.S3_BUCKET, Key=key)
+            if os.path.exists(path):
+                os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
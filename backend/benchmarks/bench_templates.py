@@ -0,0 +1,64 @@
+"""Compare per-call template compilation with the cached template environment.
+
+    PYTHONPATH=. python backend/benchmarks/bench_templates.py --clients 500
+"""
+import argparse
+import os
+import time
+from types import SimpleNamespace
+
+from jinja2 import Template
+
+from backend.core.config import get_settings
+from backend.api.services.templates import render_many, get_template_environment, NGINX_TEMPLATE
+from backend.api.services.provisioning import nginx_context
+
+settings = get_settings()
+
+
+def fake_clients(count: int) -> list:
+    return [
+        SimpleNamespace(
+            name=f"client{i}",
+            domain=f"client{i}.example.com",
+            odoo_port=settings.DEFAULT_ODOO_PORT_START + i,
+            custom_domains='["www.client%d.example.com"]' % i,
+        )
+        for i in range(count)
+    ]
+
+
+def render_per_call(clients: list) -> list:
+    path = os.path.join(settings.INFRASTRUCTURE_DIR, NGINX_TEMPLATE)
+    rendered = []
+    for client in clients:
+        with open(path, 'r') as f:
+            rendered.append(Template(f.read()).render(**nginx_context(client)))
+    return rendered
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=500)
+    args = parser.parse_args()
+
+    clients = fake_clients(args.clients)
+
+    start = time.perf_counter()
+    legacy = render_per_call(clients)
+    legacy_time = time.perf_counter() - start
+
+    get_template_environment().get_template(NGINX_TEMPLATE)
+    start = time.perf_counter()
+    cached = render_many(NGINX_TEMPLATE, [nginx_context(c) for c in clients])
+    cached_time = time.perf_counter() - start
+
+    assert legacy == cached
+    print(f"clients:            {args.clients}")
+    print(f"per-call compile:   {legacy_time * 1000:.1f} ms")
+    print(f"render_many:        {cached_time * 1000:.1f} ms")
+    print(f"speedup:            {legacy_time / cached_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
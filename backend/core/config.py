@@ -1,6 +1,6 @@
 from pydantic_settings import BaseSettings
 from functools import lru_cache
-from typing import Optional
+from typing import Dict, Optional
 import os
 
 
@@ -15,8 +15,20 @@ class Settings(BaseSettings):
     
     CORS_ORIGINS: str = "http://localhost:5173,http://localhost:3000"
     
-    # Platform database (SQLite for control panel)
+    # Platform database (SQLite for single-node installs, PostgreSQL in production)
     DATABASE_URL: str = "sqlite:///./odoo_cloud.db"
+    DATABASE_POOL_SIZE: int = 10
+    DATABASE_MAX_OVERFLOW: int = 10
+    DATABASE_POOL_TIMEOUT: float = 10.0
+    DATABASE_POOL_RECYCLE: int = 1800
+    DATABASE_STATEMENT_TIMEOUT_MS: int = 30000
+    DATABASE_ASYNC_POOL_SIZE: int = 20
+    DATABASE_ASYNC_MAX_OVERFLOW: int = 20
+    DATABASE_WORKER_POOL_SIZE: int = 5
+    DATABASE_WORKER_MAX_OVERFLOW: int = 5
+    DATABASE_WORKER_STATEMENT_TIMEOUT_MS: int = 600000
+    DATABASE_SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    DATABASE_SLOW_QUERY_MS: int = 500
     
     # External PostgreSQL for client databases (separate VPS)
     EXTERNAL_DB_HOST: str = "10.0.0.20"
@@ -24,6 +36,25 @@ class Settings(BaseSettings):
     EXTERNAL_DB_USER: str = "odoo_clients"
     EXTERNAL_DB_PASSWORD: str = "change_me_strong_password"
     EXTERNAL_DB_NAME: str = "template1"
+    EXTERNAL_DB_POOL_MAX: int = 5
+    EXTERNAL_DB_POOL_TIMEOUT: float = 30.0
+    EXTERNAL_DB_CONNECT_TIMEOUT: int = 10
+    EXTERNAL_DB_HEALTHCHECK_INTERVAL: float = 30.0
+    
+    # Pre-initialized Odoo databases cloned with CREATE DATABASE ... TEMPLATE
+    ODOO_VERSION: str = "17.0"
+    ODOO_TEMPLATE_DB_ENABLED: bool = True
+    ODOO_TEMPLATE_OWNER: str = "odoo_template"
+    ODOO_TEMPLATE_MODULES: str = "base,web"
+    ODOO_TEMPLATE_BUILD_TIMEOUT: int = 1800
+    ODOO_LOGIN_PROBE_TIMEOUT: int = 900
+    ODOO_LOGIN_PROBE_INTERVAL: float = 2.0
+    
+    # Standby databases cloned ahead of signups, per plan
+    WARM_POOL_ENABLED: bool = True
+    WARM_POOL_SIZES: Dict[str, int] = {"basic": 2, "business": 1, "enterprise": 0}
+    WARM_POOL_REPLENISH_INTERVAL: float = 60.0
+    WARM_POOL_PULL_IMAGES: bool = True
     
     REDIS_HOST: str = "localhost"
     REDIS_PORT: int = 6379
@@ -32,12 +63,38 @@ class Settings(BaseSettings):
     SECRET_KEY: str = "dev-secret-key-change-in-production-12345678901234567890"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    PRINCIPAL_CACHE_SIZE: int = 10000
+    PRINCIPAL_CACHE_TTL: float = 60.0
+    AUTH_TRUST_TOKEN_CLAIMS: bool = False
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 0
+    PASSWORD_HASH_QUEUE_LIMIT: int = 64
+    REFRESH_TOKEN_REVOKED_CACHE_SIZE: int = 100000
+    REFRESH_TOKEN_PURGE_ENABLED: bool = True
+    REFRESH_TOKEN_PURGE_INTERVAL: float = 3600.0
+    REFRESH_TOKEN_PURGE_GRACE_HOURS: int = 24
     
     DOCKER_SOCKET_PATH: str = "/var/run/docker.sock"
+    DOCKER_API_VERSION: str = "v1.41"
+    DOCKER_POOL_SIZE: int = 10
+    DOCKER_TIMEOUT: float = 30.0
+    
+    STATS_COLLECTOR_ENABLED: bool = True
+    STATS_HISTORY_SIZE: int = 60
+    STATS_DISCOVERY_INTERVAL: float = 15.0
+    
+    DISK_USAGE_SCAN_INTERVAL: int = 300
+    DISK_USAGE_FULL_SCAN_EVERY: int = 12
     ODOO_DATA_DIR: str = os.getenv("ODOO_DATA_DIR", "/home/babatope/Documents/projects/saas/clients")
     NGINX_CONFIG_DIR: str = os.getenv("NGINX_CONFIG_DIR", "/etc/nginx/sites-available")
     NGINX_ENABLED_DIR: str = os.getenv("NGINX_ENABLED_DIR", "/etc/nginx/sites-enabled")
+    NGINX_RELOAD_WINDOW: float = 2.0
     BACKUP_DIR: str = os.getenv("BACKUP_DIR", "/home/babatope/Documents/projects/saas/backups")
+    INFRASTRUCTURE_DIR: str = os.getenv(
+        "INFRASTRUCTURE_DIR",
+        os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "infrastructure")
+    )
+    TEMPLATE_CACHE_DIR: Optional[str] = None
     
     S3_ENDPOINT: str = "https://s3.amazonaws.com"
     S3_BUCKET: str = "odoo-backups"
@@ -45,6 +102,50 @@ class Settings(BaseSettings):
     S3_SECRET_KEY: str = "test-secret"
     S3_REGION: str = "eu-west-1"
     S3_PREFIX: str = "clients/"
+    S3_PART_SIZE_MB: int = 16
+    BACKUP_FORMAT: str = "custom"
+    BACKUP_CODEC: str = "zstd"
+    BACKUP_CODEC_LEVEL: Optional[int] = None
+    BACKUP_ZSTD_THREADS: int = -1
+    BACKUP_ENCRYPTION_KEY: str = ""
+    BACKUP_MAX_PARALLEL_JOBS: int = 8
+    BACKUP_DUMP_TIMEOUT: int = 3600
+    BACKUP_RESTORE_TIMEOUT: int = 3600
+    BACKUP_RESTORE_IMAGE: str = "postgres:15"
+    BACKUP_CHUNK_PREFIX: str = "chunks/"
+    BACKUP_CHUNK_AVG_KB: int = 1024
+    BACKUP_CHUNK_COMPRESSION_LEVEL: int = 6
+    BACKUP_CHUNK_GC_GRACE_HOURS: int = 24
+    BACKUP_SCHEDULER_ENABLED: bool = True
+    BACKUP_SCHEDULER_INTERVAL: float = 30.0
+    BACKUP_SCHEDULE_JITTER: float = 0.1
+    BACKUP_RETRY_DELAY: int = 900
+    BACKUP_CLAIM_LEASE: int = 600
+    BACKUP_MAX_CONCURRENT: int = 4
+    BACKUP_MAX_CONCURRENT_PER_DB_HOST: int = 2
+    BACKUP_MAX_MB_PER_SEC: float = 0.0
+    BACKUP_RETENTION_ENABLED: bool = True
+    BACKUP_RETENTION_INTERVAL: int = 3600
+    BACKUP_VERIFY_ENABLED: bool = False
+    BACKUP_VERIFY_INTERVAL: float = 300.0
+    BACKUP_VERIFY_MAX_CONCURRENT: int = 1
+    BACKUP_VERIFY_PARALLEL_JOBS: int = 2
+    BACKUP_VERIFY_MAX_MB_PER_SEC: float = 20.0
+    BACKUP_VERIFY_MAX_AGE_DAYS: int = 7
+    BACKUP_VERIFY_TIMEOUT: int = 3600
+    BACKUP_VERIFY_IMAGE: str = "postgres:15"
+    BACKUP_VERIFY_REQUIRED_TABLES: str = "res_users,res_company,ir_module_module"
+    BACKUP_VERIFY_DB_HOST: str = ""
+    BACKUP_VERIFY_DB_PORT: int = 5432
+    BACKUP_VERIFY_DB_USER: str = ""
+    BACKUP_VERIFY_DB_PASSWORD: str = ""
+    BACKUP_LIST_MAX_LIMIT: int = 200
+    BACKUP_COUNT_CACHE_TTL: float = 60.0
+    BACKUP_COUNT_ESTIMATE_THRESHOLD: int = 100000
+    BACKUP_EXPORT_BATCH: int = 1000
+    S3_MULTIPART_THRESHOLD_MB: int = 64
+    S3_MAX_CONCURRENCY: int = 8
+    S3_MAX_POOL_CONNECTIONS: int = 32
     
     SMTP_HOST: str = "smtp.gmail.com"
     SMTP_PORT: int = 587
@@ -74,6 +175,12 @@ class Settings(BaseSettings):
     
     FRONTEND_URL: str = "http://localhost:5173"
     
+    # Background job queue (provisioning, activation, ...)
+    JOB_WORKERS: int = 4
+    JOB_POLL_INTERVAL: float = 2.0
+    JOB_STALE_SECONDS: int = 900
+    CLEANUP_WORKERS: int = 8
+    
     class Config:
         env_file = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), ".env")
         case_sensitive = True
@@ -1,29 +1,315 @@
-from sqlalchemy import create_engine
+import logging
+import threading
+import time
+from collections import deque
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import create_engine, event, exc, inspect, text
+from sqlalchemy.engine import Connection, Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from sqlalchemy.schema import Column, CreateIndex, Table
 from backend.core.config import get_settings
 
 settings = get_settings()
+logger = logging.getLogger(__name__)
+
+RECENT_SAMPLES = 1024
+
+_pools: Dict[str, Tuple[Engine, "DatabaseMetrics"]] = {}
+
+
+def _database_url() -> str:
+    if not settings.USE_SQLITE and settings.DATABASE_URL.startswith("sqlite"):
+        # Older installs switched to PostgreSQL with USE_SQLITE alone, which
+        # put the platform's tables on the client database cluster
+        logger.warning("USE_SQLITE=false without a PostgreSQL DATABASE_URL; using the EXTERNAL_DB_* server")
+        return (
+            f"postgresql://{settings.EXTERNAL_DB_USER}:{settings.EXTERNAL_DB_PASSWORD}"
+            f"@{settings.EXTERNAL_DB_HOST}:{settings.EXTERNAL_DB_PORT}/{settings.EXTERNAL_DB_NAME}"
+        )
+    return settings.DATABASE_URL
+
+
+DATABASE_URL = _database_url()
+IS_SQLITE = make_url(DATABASE_URL).get_backend_name() == "sqlite"
+
+
+class DatabaseMetrics:
+    """Pool checkout waits and query times for one engine, kept in memory"""
+    
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.checkout_timeouts = 0
+        self.checkout_wait_total = 0.0
+        self.checkout_wait_max = 0.0
+        self.queries = 0
+        self.query_total = 0.0
+        self.query_max = 0.0
+        self.slow_queries = 0
+        self._waits = deque(maxlen=RECENT_SAMPLES)
+        self._query_times = deque(maxlen=RECENT_SAMPLES)
+    
+    def record_checkout(self, seconds: float, timed_out: bool = False) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.checkout_timeouts += int(timed_out)
+            self.checkout_wait_total += seconds
+            self.checkout_wait_max = max(self.checkout_wait_max, seconds)
+            self._waits.append(seconds)
+    
+    def record_query(self, seconds: float, statement: str) -> None:
+        slow = seconds * 1000 >= settings.DATABASE_SLOW_QUERY_MS
+        with self._lock:
+            self.queries += 1
+            self.query_total += seconds
+            self.query_max = max(self.query_max, seconds)
+            self.slow_queries += int(slow)
+            self._query_times.append(seconds)
+        if slow:
+            logger.warning(f"Slow query on {self.name} pool ({seconds * 1000:.0f} ms): {statement[:200]}")
+    
+    @staticmethod
+    def _p95_ms(samples) -> Optional[float]:
+        if not samples:
+            return None
+        ordered = sorted(samples)
+        return round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 2)
+    
+    def snapshot(self, engine: Engine) -> Dict[str, Any]:
+        pool = engine.pool
+        with self._lock:
+            waits, query_times = list(self._waits), list(self._query_times)
+            snapshot = {
+                "checkouts": self.checkouts,
+                "checkout_timeouts": self.checkout_timeouts,
+                "checkout_wait_avg_ms": (
+                    round(self.checkout_wait_total / self.checkouts * 1000, 2) if self.checkouts else None
+                ),
+                "checkout_wait_p95_ms": None,
+                "checkout_wait_max_ms": round(self.checkout_wait_max * 1000, 2),
+                "queries": self.queries,
+                "query_avg_ms": round(self.query_total / self.queries * 1000, 2) if self.queries else None,
+                "query_p95_ms": None,
+                "query_max_ms": round(self.query_max * 1000, 2),
+                "slow_queries": self.slow_queries,
+            }
+        snapshot["checkout_wait_p95_ms"] = self._p95_ms(waits)
+        snapshot["query_p95_ms"] = self._p95_ms(query_times)
+        if isinstance(pool, QueuePool):
+            snapshot.update({
+                "pool_size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "overflow": max(pool.overflow(), 0),
+                "idle": pool.checkedin(),
+            })
+        return snapshot
+
+
+def _metered_pool(metrics: DatabaseMetrics, base=QueuePool):
+    class MeteredQueuePool(base):
+        """QueuePool that records how long each checkout waited for a connection"""
+        
+        def _do_get(self):
+            start = time.perf_counter()
+            try:
+                connection = super()._do_get()
+            except exc.TimeoutError:
+                metrics.record_checkout(time.perf_counter() - start, timed_out=True)
+                raise
+            metrics.record_checkout(time.perf_counter() - start)
+            return connection
+    
+    return MeteredQueuePool
+
+
+def _configure_sqlite(dbapi_connection, connection_record) -> None:
+    # WAL lets readers carry on while one writer commits; busy_timeout makes
+    # concurrent writers wait their turn instead of failing with "locked"
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute(f"PRAGMA busy_timeout={settings.DATABASE_SQLITE_BUSY_TIMEOUT_MS}")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.close()
+
+
+def _engine_options(
+    name: str, pool_size: int, max_overflow: int, statement_timeout_ms: int, metrics: DatabaseMetrics,
+    asynchronous: bool = False
+) -> Dict[str, Any]:
+    options: Dict[str, Any] = {
+        "poolclass": _metered_pool(metrics, AsyncAdaptedQueuePool if asynchronous else QueuePool),
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "pool_timeout": settings.DATABASE_POOL_TIMEOUT,
+    }
+    
+    if IS_SQLITE:
+        options["connect_args"] = {
+            "check_same_thread": False,
+            "timeout": settings.DATABASE_SQLITE_BUSY_TIMEOUT_MS / 1000,
+        }
+        return options
+    
+    options.update({
+        "pool_pre_ping": True,
+        "pool_recycle": settings.DATABASE_POOL_RECYCLE,
+        # Newest idle connection first, so spare ones age out via recycle
+        "pool_use_lifo": True,
+    })
+    if asynchronous:
+        options["connect_args"] = {"server_settings": {
+            "application_name": f"odoo-cloud-{name}",
+            "statement_timeout": str(statement_timeout_ms),
+        }}
+    else:
+        options["connect_args"] = {
+            "application_name": f"odoo-cloud-{name}",
+            "options": f"-c statement_timeout={statement_timeout_ms}",
+        }
+    return options
+
+
+def _instrument(name: str, sync_engine: Engine, metrics: DatabaseMetrics) -> None:
+    _pools[name] = (sync_engine, metrics)
+    
+    if IS_SQLITE:
+        event.listen(sync_engine, "connect", _configure_sqlite)
+    
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _query_started(conn, cursor, statement, parameters, context, executemany):
+        conn.info["query_started"] = time.perf_counter()
+    
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _query_finished(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.pop("query_started", None)
+        if started is not None:
+            metrics.record_query(time.perf_counter() - started, statement)
+
+
+def _create_engine(name: str, pool_size: int, max_overflow: int, statement_timeout_ms: int) -> Engine:
+    metrics = DatabaseMetrics(name)
+    new_engine = create_engine(
+        DATABASE_URL, **_engine_options(name, pool_size, max_overflow, statement_timeout_ms, metrics)
+    )
+    _instrument(name, new_engine, metrics)
+    return new_engine
+
 
-# Use SQLite for local development (default), PostgreSQL for production
-if settings.USE_SQLITE:
-    DATABASE_URL = "sqlite:///./odoo_cloud.db"
-    engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+# Request handlers and background workers (job queue, backup scheduler and
+# verifier, warm pool, purges) draw from separate pools, so a busy worker
+# fleet can never leave requests waiting for a connection. SQLite has a
+# single writer anyway, so there both share one engine.
+engine = _create_engine(
+    "api", settings.DATABASE_POOL_SIZE, settings.DATABASE_MAX_OVERFLOW, settings.DATABASE_STATEMENT_TIMEOUT_MS
+)
+if IS_SQLITE:
+    worker_engine = engine
 else:
-    DATABASE_URL = (
-        f"postgresql://{settings.EXTERNAL_DB_USER}:{settings.EXTERNAL_DB_PASSWORD}"
-        f"@{settings.EXTERNAL_DB_HOST}:{settings.EXTERNAL_DB_PORT}/{settings.EXTERNAL_DB_NAME}"
+    worker_engine = _create_engine(
+        "worker", settings.DATABASE_WORKER_POOL_SIZE, settings.DATABASE_WORKER_MAX_OVERFLOW,
+        settings.DATABASE_WORKER_STATEMENT_TIMEOUT_MS
     )
-    engine = create_engine(DATABASE_URL, pool_pre_ping=True, pool_size=10)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+WorkerSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=worker_engine)
 
 Base = declarative_base()
 
 
+def _add_column(conn: Connection, table: Table, column: Column) -> None:
+    preparer = conn.dialect.identifier_preparer
+    # Concurrent API processes may race here; PostgreSQL can skip the loser
+    if_not_exists = "" if conn.dialect.name == "sqlite" else "IF NOT EXISTS "
+    conn.execute(text(
+        f"ALTER TABLE {preparer.format_table(table)} ADD COLUMN {if_not_exists}"
+        f"{preparer.format_column(column)} {column.type.compile(dialect=conn.dialect)}"
+    ))
+    if column.default is not None and column.default.is_scalar:
+        conn.execute(table.update().where(column.is_(None)).values({column.name: column.default.arg}))
+    logger.info(f"Added column {table.name}.{column.name}")
+
+
+def upgrade_schema(bind: Optional[Engine] = None) -> None:
+    """Add the columns and indexes that tables created by an older release lack.
+
+    create_all only creates missing tables, so an existing install upgrades
+    here on startup. Columns are added as nullable and existing rows get the
+    column's scalar default; anything present is left alone, so it is safe to
+    run on every start.
+    """
+    with (bind or engine).begin() as conn:
+        inspector = inspect(conn)
+        existing = set(inspector.get_table_names())
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing:
+                continue
+            columns = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in columns:
+                    _add_column(conn, table, column)
+            indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in indexes:
+                    conn.execute(CreateIndex(index, if_not_exists=True))
+                    logger.info(f"Created index {index.name} on {table.name}")
+
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+
+def _async_database_url() -> str:
+    url = make_url(DATABASE_URL)
+    driver = "aiosqlite" if IS_SQLITE else "asyncpg"
+    return url.set(drivername=f"{url.get_backend_name()}+{driver}").render_as_string(hide_password=False)
+
+
+@lru_cache()
+def get_async_engine() -> AsyncEngine:
+    """Engine for async routes, created on first use so sync-only tools never need the async driver"""
+    metrics = DatabaseMetrics("async")
+    async_engine = create_async_engine(_async_database_url(), **_engine_options(
+        "async", settings.DATABASE_ASYNC_POOL_SIZE, settings.DATABASE_ASYNC_MAX_OVERFLOW,
+        settings.DATABASE_STATEMENT_TIMEOUT_MS, metrics, asynchronous=True
+    ))
+    _instrument("async", async_engine.sync_engine, metrics)
+    return async_engine
+
+
+@lru_cache()
+def get_async_sessionmaker() -> async_sessionmaker:
+    # Nothing may lazy-load after a commit in async code, so keep attributes loaded
+    return async_sessionmaker(get_async_engine(), autoflush=False, expire_on_commit=False)
+
+
+async def get_async_db():
+    async with get_async_sessionmaker()() as db:
+        yield db
+
+
+def get_database_metrics() -> Dict[str, Any]:
+    return {
+        "backend": make_url(DATABASE_URL).get_backend_name(),
+        "pools": {name: metrics.snapshot(pool_engine) for name, (pool_engine, metrics) in _pools.items()},
+    }
+
+
+def dispose_engines() -> None:
+    engine.dispose()
+    if worker_engine is not engine:
+        worker_engine.dispose()
+
+
+async def dispose_async_engine() -> None:
+    if get_async_engine.cache_info().currsize:
+        await get_async_engine().dispose()
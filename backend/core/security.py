@@ -1,13 +1,21 @@
+from concurrent.futures import Future, ProcessPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from functools import lru_cache
+from typing import Optional, Tuple
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from backend.core.config import get_settings
+import asyncio
+import multiprocessing
+import os
 import secrets
+import threading
 
 settings = get_settings()
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Hashes with fewer rounds (or another scheme) count as deprecated, so
+# verify_and_update hands back a fresh hash when BCRYPT_ROUNDS is raised
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS)
 
 REFRESH_TOKEN_EXPIRE_DAYS = 7
 
@@ -20,21 +28,109 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """(valid, new_hash); new_hash is set when the stored hash no longer matches pwd_context"""
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+class PasswordHasherBusy(Exception):
+    pass
+
+
+class PasswordHasher:
+    """Runs bcrypt on a process pool, off the request threads and outside the GIL.
+
+    At most `workers` hashes run at once and `queue_limit` more may wait.
+    Beyond that, calls fail fast with PasswordHasherBusy rather than queue
+    a login storm behind seconds of bcrypt.
+    """
+    
+    def __init__(self, workers: int = None, queue_limit: int = None):
+        self.workers = workers or settings.PASSWORD_HASH_WORKERS or max(1, min(4, os.cpu_count() or 1))
+        self.queue_limit = settings.PASSWORD_HASH_QUEUE_LIMIT if queue_limit is None else queue_limit
+        self._slots = threading.BoundedSemaphore(self.workers + self.queue_limit)
+        # spawn, not fork: the API process has threads and open sockets
+        self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+    
+    def _done(self, future: Future) -> None:
+        self._slots.release()
+        with self._lock:
+            self.in_flight -= 1
+            self.completed += 1
+    
+    def submit(self, fn, *args) -> Future:
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise PasswordHasherBusy("Too many password operations in progress")
+        try:
+            future = self._executor.submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        with self._lock:
+            self.in_flight += 1
+        future.add_done_callback(self._done)
+        return future
+    
+    async def hash(self, password: str) -> str:
+        return await asyncio.wrap_future(self.submit(get_password_hash, password))
+    
+    async def verify(self, plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        return await asyncio.wrap_future(self.submit(verify_and_update_password, plain_password, hashed_password))
+    
+    def status(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "queue_limit": self.queue_limit,
+                "in_flight": self.in_flight,
+                "completed": self.completed,
+                "rejected": self.rejected
+            }
+    
+    def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+@lru_cache()
+def get_password_hasher() -> PasswordHasher:
+    return PasswordHasher()
+
+
+def close_password_hasher() -> None:
+    if get_password_hasher.cache_info().currsize:
+        get_password_hasher().close()
+        get_password_hasher.cache_clear()
+
+
+async def hash_password_async(password: str) -> str:
+    return await get_password_hasher().hash(password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    return await get_password_hasher().verify(plain_password, hashed_password)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
     else:
         expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire, "type": "access"})
+    to_encode.update({"exp": expire, "iat": datetime.utcnow(), "type": "access", "jti": secrets.token_hex(8)})
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
 
-def create_refresh_token(data: dict) -> str:
+def create_refresh_token(data: dict, jti: str = None, expire: datetime = None) -> str:
     to_encode = data.copy()
-    expire = datetime.utcnow() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
-    to_encode.update({"exp": expire, "type": "refresh", "jti": secrets.token_hex(16)})
+    expire = expire or datetime.utcnow() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
+    to_encode.update({"exp": expire, "type": "refresh", "jti": jti or secrets.token_hex(16)})
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
@@ -3,8 +3,22 @@ from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 from datetime import datetime
 from backend.core.config import get_settings
-from backend.core.database import engine, Base
-from backend.api.routes import clients, payments
+from backend.core.database import (
+    engine, Base, SessionLocal, dispose_engines, dispose_async_engine, upgrade_schema
+)
+from backend.core.security import close_password_hasher
+from backend.api.routes import clients, payments, jobs
+from backend.api.services.job_queue import start_job_workers, stop_job_workers
+from backend.api.services.login_probe import get_login_prober
+from backend.api.services.docker_client import close_docker_clients
+from backend.api.services.stats_collector import get_stats_collector
+from backend.api.services.disk_usage import get_disk_usage_indexer
+from backend.api.services.port_allocator import ensure_port_allocations
+from backend.api.services.external_db import close_admin_pool
+from backend.api.services.warm_pool import get_warm_pool
+from backend.api.services.backup_scheduler import get_backup_scheduler
+from backend.api.services.backup_verify import get_backup_verifier
+from backend.api.services.refresh_tokens import get_refresh_token_store
 import logging
 
 settings = get_settings()
@@ -14,7 +28,39 @@ logger = logging.getLogger(__name__)
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     Base.metadata.create_all(bind=engine)
+    upgrade_schema()
+    db = SessionLocal()
+    try:
+        ensure_port_allocations(db)
+    finally:
+        db.close()
+    start_job_workers()
+    get_login_prober().start()
+    get_disk_usage_indexer().start()
+    if settings.WARM_POOL_ENABLED:
+        get_warm_pool().start()
+    if settings.BACKUP_SCHEDULER_ENABLED:
+        get_backup_scheduler().start()
+    if settings.BACKUP_VERIFY_ENABLED:
+        get_backup_verifier().start()
+    if settings.REFRESH_TOKEN_PURGE_ENABLED:
+        get_refresh_token_store().start()
+    if settings.STATS_COLLECTOR_ENABLED:
+        await get_stats_collector().start()
     yield
+    await get_stats_collector().stop()
+    get_refresh_token_store().stop()
+    get_backup_verifier().stop()
+    get_backup_scheduler().stop()
+    get_warm_pool().stop()
+    get_disk_usage_indexer().stop()
+    get_login_prober().stop()
+    stop_job_workers()
+    await close_docker_clients()
+    close_admin_pool()
+    close_password_hasher()
+    dispose_engines()
+    await dispose_async_engine()
 
 
 app = FastAPI(
@@ -35,6 +81,7 @@ app.add_middleware(
 
 app.include_router(clients.router, prefix="/api", tags=["Clients"])
 app.include_router(payments.router, prefix="/api/payments", tags=["Payments"])
+app.include_router(jobs.router, prefix="/api", tags=["Jobs"])
 
 
 @app.post("/api/payments/webhook")
@@ -59,9 +106,8 @@ async def paystack_webhook(request: Request):
                 from backend.core.database import SessionLocal
                 from backend.api.models.payment_models import Payment
                 from backend.api.models.models import Client, ClientStatus
-                from backend.api.services.provisioning import (
-                    start_client_stack, create_nginx_config, reload_nginx, request_ssl_certificate
-                )
+                from backend.api.services.job_queue import enqueue_job
+                from backend.api.services.client_jobs import ACTIVATE_CLIENT
                 
                 db = SessionLocal()
                 try:
@@ -76,23 +122,10 @@ async def paystack_webhook(request: Request):
                         if payment.client_id:
                             client = db.query(Client).filter(Client.id == payment.client_id).first()
                             if client and client.status == ClientStatus.PENDING.value:
-                                try:
-                                    if start_client_stack(client.name):
-                                        client.status = ClientStatus.ACTIVE.value
-                                        client.activated_at = datetime.utcnow()
-                                        
-                                        create_nginx_config(client)
-                                        reload_nginx()
-                                        
-                                        try:
-                                            request_ssl_certificate(client.domain, settings.SMTP_FROM)
-                                            reload_nginx()
-                                        except Exception as e:
-                                            logger.warning(f"SSL certificate not ready: {e}")
-                                        
-                                        logger.info(f"Client {client.name} activated after payment")
-                                except Exception as e:
-                                    logger.error(f"Failed to activate client: {e}")
+                                job = enqueue_job(
+                                    db, ACTIVATE_CLIENT, client_id=client.id, user_id=payment.user_id
+                                )
+                                logger.info(f"Queued activation job {job.id} for {client.name} after payment")
                         
                         db.commit()
                         logger.info(f"Payment {reference} marked as successful")
@@ -0,0 +1,75 @@
+import os
+import sys
+
+import pytest
+
+# The services import each other as backend.*, so the repository root has to
+# be importable when pytest is started from backend/ (make test)
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+try:
+    from pytest_postgresql import factories
+except ImportError:
+    factories = None
+
+if factories:
+    postgresql_server = factories.postgresql_proc()
+
+SYSTEM_DATABASES = ("postgres", "template0", "template1")
+
+
+@pytest.fixture
+def external_db(request, monkeypatch):
+    """A throwaway PostgreSQL server standing in for the client DB cluster.
+
+    EXTERNAL_DB_* and the admin pool point at it for the duration of the
+    test, and every database and role the test created is dropped after it.
+    Skipped when pytest-postgresql or the PostgreSQL binaries are missing;
+    pass --postgresql-exec=/path/to/pg_ctl if they are not on the usual path.
+    """
+    if factories is None:
+        pytest.skip("pytest-postgresql not installed")
+    try:
+        server = request.getfixturevalue("postgresql_server")
+    except FileNotFoundError as e:
+        pytest.skip(f"PostgreSQL binaries not found: {e}")
+    
+    from backend.core.config import get_settings
+    from backend.api.services.external_db import get_admin_pool, close_admin_pool
+    
+    settings = get_settings()
+    monkeypatch.setattr(settings, "EXTERNAL_DB_HOST", server.host)
+    monkeypatch.setattr(settings, "EXTERNAL_DB_PORT", server.port)
+    monkeypatch.setattr(settings, "EXTERNAL_DB_USER", server.user)
+    monkeypatch.setattr(settings, "EXTERNAL_DB_PASSWORD", server.password or "")
+    monkeypatch.setattr(settings, "EXTERNAL_DB_NAME", "postgres")
+    get_admin_pool.cache_clear()
+    
+    yield server
+    
+    close_admin_pool()
+    get_admin_pool.cache_clear()
+    _drop_everything(server)
+
+
+def _drop_everything(server) -> None:
+    import psycopg2
+    from psycopg2 import sql
+    
+    conn = psycopg2.connect(
+        host=server.host, port=server.port, user=server.user, password=server.password or "", dbname="postgres"
+    )
+    conn.autocommit = True
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT datname FROM pg_database WHERE datname <> ALL(%s)", [list(SYSTEM_DATABASES)])
+            for (name,) in cursor.fetchall():
+                cursor.execute(sql.SQL("ALTER DATABASE {} WITH IS_TEMPLATE false").format(sql.Identifier(name)))
+                cursor.execute(sql.SQL("DROP DATABASE {} WITH (FORCE)").format(sql.Identifier(name)))
+            cursor.execute(
+                "SELECT rolname FROM pg_roles WHERE rolname <> %s AND rolname NOT LIKE 'pg\\_%%'", [server.user]
+            )
+            for (name,) in cursor.fetchall():
+                cursor.execute(sql.SQL("DROP ROLE {}").format(sql.Identifier(name)))
+    finally:
+        conn.close()
@@ -0,0 +1,166 @@
+"""A minimal Docker Engine API served on a unix socket, for DockerClient tests.
+
+Only the endpoints DockerClient uses for exec and archives are implemented.
+Each exec's outcome is looked up by the first word of its command in
+FakeDocker.commands, and archives are kept in memory per container path.
+"""
+import io
+import json
+import os
+import re
+import socketserver
+import tarfile
+import threading
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+API_PREFIX = re.compile(r"^/v[0-9.]+")
+
+
+@dataclass
+class Command:
+    stdout: bytes = b""
+    stderr: bytes = b""
+    exit_code: Optional[int] = 0
+    # Number of inspects that still report the exec as running
+    running_polls: int = 0
+
+
+@dataclass
+class Exec:
+    container: str
+    cmd: List[str]
+    env: List[str]
+    command: Command
+    inspects: int = 0
+
+
+def frame(stream: int, payload: bytes) -> bytes:
+    return bytes([stream, 0, 0, 0]) + len(payload).to_bytes(4, "big") + payload
+
+
+class _Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class FakeDocker:
+    def __init__(self, socket_path: str):
+        self.socket_path = socket_path
+        self.commands: Dict[str, Command] = {}
+        self.execs: Dict[str, Exec] = {}
+        self.files: Dict[str, Dict[str, bytes]] = {}
+        self._server = _Server(socket_path, self._handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+    
+    def start(self) -> "FakeDocker":
+        self._thread.start()
+        return self
+    
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+    
+    def _handler(self):
+        fake = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            
+            def log_message(self, format, *args):
+                pass
+            
+            def _body(self) -> bytes:
+                if self.headers.get("Transfer-Encoding") == "chunked":
+                    body = b""
+                    while True:
+                        size = int(self.rfile.readline().split(b";")[0], 16)
+                        if not size:
+                            self.rfile.readline()
+                            return body
+                        body += self.rfile.read(size)
+                        self.rfile.readline()
+                return self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            
+            def _send(self, status: int, body: bytes = b"", content_type: str = "application/json") -> None:
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            
+            def _json(self, status: int, value) -> None:
+                self._send(status, json.dumps(value).encode())
+            
+            def _route(self, method: str) -> None:
+                url = urlparse(self.path)
+                path = API_PREFIX.sub("", url.path)
+                query = {key: values[0] for key, values in parse_qs(url.query).items()}
+                body = self._body()
+                
+                match = re.fullmatch(r"/containers/([^/]+)/exec", path)
+                if method == "POST" and match:
+                    request = json.loads(body)
+                    exec_id = f"{len(fake.execs):064x}"
+                    fake.execs[exec_id] = Exec(
+                        match.group(1), request["Cmd"], request.get("Env") or [],
+                        fake.commands.get(request["Cmd"][0], Command())
+                    )
+                    return self._json(201, {"Id": exec_id})
+                
+                match = re.fullmatch(r"/exec/([^/]+)/start", path)
+                if method == "POST" and match:
+                    command = fake.execs[match.group(1)].command
+                    return self._send(
+                        200, frame(1, command.stdout) + frame(2, command.stderr),
+                        "application/vnd.docker.raw-stream"
+                    )
+                
+                match = re.fullmatch(r"/exec/([^/]+)/json", path)
+                if method == "GET" and match:
+                    execution = fake.execs[match.group(1)]
+                    execution.inspects += 1
+                    running = execution.inspects <= execution.command.running_polls
+                    return self._json(200, {
+                        "Running": running,
+                        "ExitCode": None if running else execution.command.exit_code,
+                    })
+                
+                match = re.fullmatch(r"/containers/([^/]+)/archive", path)
+                if match and method == "PUT":
+                    files = fake.files.setdefault(match.group(1), {})
+                    with tarfile.open(fileobj=io.BytesIO(body)) as tar:
+                        for member in tar.getmembers():
+                            if member.isfile():
+                                files[os.path.join(query["path"], member.name)] = tar.extractfile(member).read()
+                    return self._send(200)
+                if match and method == "GET":
+                    files = fake.files.get(match.group(1), {})
+                    prefix = query["path"].rstrip("/")
+                    selected = {name: data for name, data in files.items() if name == prefix or name.startswith(prefix + "/")}
+                    if not selected:
+                        return self._json(404, {"message": f"Could not find the file {query['path']} in container"})
+                    archive = io.BytesIO()
+                    base = os.path.dirname(prefix)
+                    with tarfile.open(fileobj=archive, mode="w") as tar:
+                        for name, data in sorted(selected.items()):
+                            info = tarfile.TarInfo(os.path.relpath(name, base))
+                            info.size = len(data)
+                            tar.addfile(info, io.BytesIO(data))
+                    return self._send(200, archive.getvalue(), "application/x-tar")
+                
+                self._json(404, {"message": f"page not found: {method} {path}"})
+            
+            def do_GET(self):
+                self._route("GET")
+            
+            def do_POST(self):
+                self._route("POST")
+            
+            def do_PUT(self):
+                self._route("PUT")
+        
+        return Handler
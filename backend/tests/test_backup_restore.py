@@ -0,0 +1,148 @@
+import os
+import subprocess
+
+import boto3
+import pytest
+from moto import mock_aws
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from backend.core.config import get_settings
+from backend.core.database import Base
+from backend.api.models import payment_models  # noqa: F401 - payments table for create_all
+from backend.api.models.models import Backup, Client
+from backend.api.services import backup_service
+from backend.api.services.external_db import database_connection
+from backend.api.services.provisioning import create_external_database
+
+settings = get_settings()
+
+CLIENT = "acme"
+DB_NAME = "odoo_acme"
+
+
+@pytest.fixture
+def control_db():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
+
+
+@pytest.fixture
+def s3(monkeypatch):
+    with mock_aws():
+        client = boto3.client("s3", region_name=settings.S3_REGION)
+        client.create_bucket(
+            Bucket=settings.S3_BUCKET, CreateBucketConfiguration={"LocationConstraint": settings.S3_REGION}
+        )
+        monkeypatch.setattr(backup_service, "get_s3_client", lambda: client)
+        yield client
+
+
+@pytest.fixture
+def tenant(external_db, control_db, monkeypatch):
+    """A client whose database lives on the external server, restored with that server's own pg_restore"""
+    bindir = os.path.dirname(external_db.executable)
+    run_fed = backup_service.run_fed
+    
+    def run_local(cmd, source, timeout, env=None):
+        # Same arguments, minus the docker run wrapper
+        return run_fed([os.path.join(bindir, "pg_restore"), *cmd[cmd.index("pg_restore") + 1:]], source, timeout, env)
+    
+    monkeypatch.setattr(backup_service, "run_fed", run_local)
+    assert create_external_database(DB_NAME, DB_NAME, "secret")
+    control_db.add(Client(
+        name=CLIENT, domain="acme.example.com", email="acme@example.com", db_name=DB_NAME, db_user=DB_NAME,
+        db_password="secret", odoo_port=40001, status="active", plan="basic"
+    ))
+    control_db.commit()
+    return bindir
+
+
+def notes() -> list:
+    with database_connection(DB_NAME) as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT body FROM notes ORDER BY body")
+            return [body for (body,) in cursor.fetchall()]
+
+
+def staging_databases() -> list:
+    with database_connection("postgres") as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT datname FROM pg_database WHERE datname LIKE %s", [f"{DB_NAME}\\_%"])
+            return cursor.fetchall()
+
+
+def tenant_sql(*statements) -> None:
+    with database_connection(DB_NAME) as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("SET ROLE odoo_acme")
+            for statement in statements:
+                cursor.execute(statement)
+
+
+def upload_backup(control_db, s3, filename: str, body: bytes) -> None:
+    s3_key = f"{settings.S3_PREFIX}{CLIENT}/{filename}"
+    s3.put_object(Bucket=settings.S3_BUCKET, Key=s3_key, Body=body)
+    control_db.add(Backup(
+        client_id=0, client_name=CLIENT, backup_type="manual", filename=filename, s3_key=s3_key,
+        format=backup_service.BACKUP_FORMAT_CUSTOM, codec=None, encrypted=False, status="completed"
+    ))
+    control_db.commit()
+
+
+def pg_dump(bindir: str) -> bytes:
+    return subprocess.run(
+        [os.path.join(bindir, "pg_dump"), "-Fc", "-h", settings.EXTERNAL_DB_HOST, "-p", str(settings.EXTERNAL_DB_PORT),
+         "-U", DB_NAME, DB_NAME],
+        env={**os.environ, "PGPASSWORD": "secret"}, check=True, capture_output=True
+    ).stdout
+
+
+def test_restore_replaces_the_database_on_the_external_server(tenant, control_db, s3):
+    tenant_sql("CREATE TABLE notes (body text)", "INSERT INTO notes VALUES ('before')")
+    upload_backup(control_db, s3, "acme_manual.dump", pg_dump(tenant))
+    tenant_sql("INSERT INTO notes VALUES ('after')")
+    
+    result = backup_service.restore_backup(CLIENT, "acme_manual.dump", control_db)
+    
+    assert result["success"], result
+    assert notes() == ["before"]
+    assert staging_databases() == []
+    with database_connection(DB_NAME) as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT tableowner FROM pg_tables WHERE tablename = 'notes'")
+            assert cursor.fetchone()[0] == DB_NAME
+
+
+def test_failed_pg_restore_is_reported(tenant, control_db, s3):
+    tenant_sql("CREATE TABLE notes (body text)", "INSERT INTO notes VALUES ('live')")
+    upload_backup(control_db, s3, "acme_broken.dump", b"PGDMP not really an archive")
+    
+    result = backup_service.restore_backup(CLIENT, "acme_broken.dump", control_db)
+    
+    assert not result["success"]
+    assert "pg_restore failed" in result["message"]
+    assert notes() == ["live"]
+    assert staging_databases() == []
+
+
+def test_restore_without_the_backup_object_fails_before_dropping(tenant, control_db, s3):
+    tenant_sql("CREATE TABLE notes (body text)", "INSERT INTO notes VALUES ('live')")
+    control_db.add(Backup(
+        client_id=0, client_name=CLIENT, backup_type="manual", filename="acme_missing.dump",
+        s3_key=f"{settings.S3_PREFIX}{CLIENT}/acme_missing.dump", format=backup_service.BACKUP_FORMAT_CUSTOM,
+        status="completed"
+    ))
+    control_db.commit()
+    
+    result = backup_service.restore_backup(CLIENT, "acme_missing.dump", control_db)
+    
+    assert not result["success"]
+    assert notes() == ["live"]
@@ -0,0 +1,102 @@
+import io
+import os
+import shutil
+import tarfile
+import tempfile
+
+import pytest
+
+from backend.api.services.docker_client import DockerClient, DockerError, IterStream
+from fake_docker import Command, FakeDocker
+
+
+@pytest.fixture
+def docker():
+    # Unix socket paths are limited to ~100 bytes, too short for tmp_path
+    directory = tempfile.mkdtemp(prefix="docker")
+    fake = FakeDocker(os.path.join(directory, "docker.sock")).start()
+    client = DockerClient(socket_path=fake.socket_path, timeout=5)
+    try:
+        yield fake, client
+    finally:
+        client.close()
+        fake.stop()
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def test_exec_run_returns_output_and_exit_code(docker):
+    fake, client = docker
+    fake.commands["pg_dump"] = Command(stdout=b"dump", stderr=b"notice", exit_code=0)
+    
+    assert client.exec_run("db_acme", ["pg_dump", "-Fc"], env=["PGPASSWORD"]) == (0, "dump", "notice")
+    execution = next(iter(fake.execs.values()))
+    assert (execution.container, execution.cmd, execution.env) == ("db_acme", ["pg_dump", "-Fc"], ["PGPASSWORD"])
+
+
+def test_exec_stream_writes_stdout_and_reports_failure(docker):
+    fake, client = docker
+    fake.commands["pg_restore"] = Command(stdout=b"x" * 100000, stderr=b"boom", exit_code=1)
+    output = io.BytesIO()
+    
+    assert client.exec_stream("db_acme", ["pg_restore"], output) == (1, "boom")
+    assert output.getvalue() == b"x" * 100000
+
+
+def test_exit_code_waits_for_the_exec_to_finish(docker):
+    fake, client = docker
+    fake.commands["pg_dump"] = Command(exit_code=2, running_polls=3)
+    
+    exit_code, _, _ = client.exec_run("db_acme", ["pg_dump"])
+    
+    assert exit_code == 2
+    assert next(iter(fake.execs.values())).inspects == 4
+
+
+def test_missing_exit_code_is_a_failure(docker):
+    fake, client = docker
+    fake.commands["pg_dump"] = Command(exit_code=None)
+    
+    exit_code, _, _ = client.exec_run("db_acme", ["pg_dump"])
+    
+    assert exit_code != 0
+
+
+def test_put_file_then_get_archive_round_trips(docker, tmp_path):
+    fake, client = docker
+    dump = tmp_path / "acme.dump"
+    dump.write_bytes(os.urandom(3 * 1024 * 1024 + 17))
+    
+    client.put_file("db_acme", str(dump), "/tmp")
+    assert fake.files["db_acme"]["/tmp/acme.dump"] == dump.read_bytes()
+    
+    with tarfile.open(fileobj=IterStream(client.get_archive("db_acme", "/tmp/acme.dump")), mode="r|") as tar:
+        member = next(iter(tar))
+        assert member.name == "acme.dump"
+        assert tar.extractfile(member).read() == dump.read_bytes()
+
+
+def test_put_file_uploads_a_directory(docker, tmp_path):
+    fake, client = docker
+    dump_dir = tmp_path / "acme"
+    dump_dir.mkdir()
+    (dump_dir / "toc.dat").write_bytes(b"toc")
+    (dump_dir / "3001.dat").write_bytes(b"rows")
+    
+    client.put_file("db_acme", str(dump_dir), "/tmp")
+    
+    assert fake.files["db_acme"] == {"/tmp/acme/toc.dat": b"toc", "/tmp/acme/3001.dat": b"rows"}
+
+
+def test_put_stream_rejects_a_short_source(docker):
+    _, client = docker
+    
+    with pytest.raises(ValueError):
+        client.put_stream("db_acme", "/tmp", "acme.dump", 10, iter([b"12345"]))
+
+
+def test_get_archive_of_a_missing_path_raises(docker):
+    _, client = docker
+    
+    with pytest.raises(DockerError) as error:
+        list(client.get_archive("db_acme", "/tmp/missing"))
+    assert error.value.status_code == 404
@@ -0,0 +1,204 @@
+import psycopg2
+import pytest
+from psycopg2 import sql
+
+from backend.core.config import get_settings
+from backend.api.services.external_db import AdminConnectionPool, ExternalDBError, database_connection, get_admin_pool
+from backend.api.services.provisioning import (
+    adopt_external_database, create_external_database, create_staging_database, delete_external_databases,
+    replace_external_database
+)
+
+settings = get_settings()
+
+
+def fetch(database: str, query: str, params=None) -> list:
+    with database_connection(database) as conn:
+        with conn.cursor() as cursor:
+            cursor.execute(query, params)
+            return cursor.fetchall()
+
+
+def execute(database: str, *statements) -> None:
+    with database_connection(database) as conn:
+        with conn.cursor() as cursor:
+            for statement in statements:
+                cursor.execute(statement)
+
+
+def databases() -> set:
+    return {name for (name,) in fetch("postgres", "SELECT datname FROM pg_database")}
+
+
+def roles() -> set:
+    return {name for (name,) in fetch("postgres", "SELECT rolname FROM pg_roles")}
+
+
+def table_owner(database: str, table: str) -> str:
+    return fetch(database, "SELECT tableowner FROM pg_tables WHERE tablename = %s", [table])[0][0]
+
+
+def test_admin_pool_reuses_connections(external_db):
+    pool = AdminConnectionPool(max_size=2)
+    
+    with pool.cursor() as cursor:
+        cursor.execute("SELECT pg_backend_pid()")
+        first = cursor.fetchone()[0]
+    with pool.cursor() as cursor:
+        cursor.execute("SELECT pg_backend_pid()")
+        second = cursor.fetchone()[0]
+    
+    assert first == second
+    assert pool.stats()["opened"] == 1
+    pool.close()
+
+
+def test_admin_pool_replaces_a_dead_connection(external_db, monkeypatch):
+    monkeypatch.setattr(settings, "EXTERNAL_DB_HEALTHCHECK_INTERVAL", 0)
+    pool = AdminConnectionPool(max_size=1)
+    with pool.cursor() as cursor:
+        cursor.execute("SELECT pg_backend_pid()")
+        pid = cursor.fetchone()[0]
+    
+    fetch("postgres", "SELECT pg_terminate_backend(%s)", [pid])
+    
+    with pool.cursor() as cursor:
+        cursor.execute("SELECT pg_backend_pid()")
+        assert cursor.fetchone()[0] != pid
+    assert pool.stats()["discarded"] == 1
+    pool.close()
+
+
+def test_admin_pool_times_out_when_exhausted(external_db):
+    pool = AdminConnectionPool(max_size=1, timeout=0.1)
+    
+    with pool.connection():
+        with pytest.raises(ExternalDBError):
+            with pool.connection():
+                pass
+    pool.close()
+
+
+def test_create_external_database(external_db):
+    assert create_external_database("odoo_acme", "odoo_acme", "secret")
+    
+    assert fetch("postgres", "SELECT pg_get_userbyid(datdba) FROM pg_database WHERE datname = 'odoo_acme'") == [
+        ("odoo_acme",)
+    ]
+    conn = psycopg2.connect(
+        host=settings.EXTERNAL_DB_HOST, port=settings.EXTERNAL_DB_PORT,
+        user="odoo_acme", password="secret", dbname="odoo_acme"
+    )
+    conn.close()
+
+
+def test_create_external_database_from_template(external_db):
+    owner = settings.ODOO_TEMPLATE_OWNER
+    with get_admin_pool().cursor() as cursor:
+        cursor.execute(sql.SQL("CREATE ROLE {}").format(sql.Identifier(owner)))
+        cursor.execute(sql.SQL("CREATE DATABASE odoo_tpl OWNER {}").format(sql.Identifier(owner)))
+    execute(
+        "odoo_tpl",
+        "CREATE TABLE ir_config_parameter (key varchar PRIMARY KEY, value text)",
+        f"ALTER TABLE ir_config_parameter OWNER TO {owner}",
+        "INSERT INTO ir_config_parameter VALUES ('database.uuid', 'template-uuid'), ('web.base.url', 'x')",
+        "CREATE TABLE ir_attachment (url varchar, store_fname varchar, db_datas bytea)",
+        f"ALTER TABLE ir_attachment OWNER TO {owner}",
+        "INSERT INTO ir_attachment VALUES ('/web/assets/1/web.assets_web.min.js', 'ab/abcdef', NULL), "
+        "('/web/image/logo', NULL, 'png')",
+    )
+    with get_admin_pool().cursor() as cursor:
+        cursor.execute("ALTER DATABASE odoo_tpl WITH IS_TEMPLATE true")
+    
+    assert create_external_database("odoo_acme", "odoo_acme", "secret", template="odoo_tpl")
+    
+    assert table_owner("odoo_acme", "ir_config_parameter") == "odoo_acme"
+    params = dict(fetch("odoo_acme", "SELECT key, value FROM ir_config_parameter"))
+    assert params["database.uuid"] != "template-uuid"
+    assert params["web.base.url"] == "x"
+    # File-backed attachments point into a filestore the clone does not have
+    assert fetch("odoo_acme", "SELECT url FROM ir_attachment") == [("/web/image/logo",)]
+    assert table_owner("odoo_tpl", "ir_config_parameter") == owner
+
+
+def test_failed_clone_is_dropped(external_db):
+    with get_admin_pool().cursor() as cursor:
+        cursor.execute("CREATE DATABASE odoo_tpl")
+    
+    # No ir_config_parameter, so finalize_clone fails
+    assert not create_external_database("odoo_acme", "odoo_acme", "secret", template="odoo_tpl")
+    
+    assert "odoo_acme" not in databases()
+    assert "odoo_acme" not in roles()
+
+
+def test_adopt_external_database(external_db):
+    assert create_external_database("odoo_standby_1", "odoo_standby_1", "standby")
+    
+    adopt_external_database("odoo_standby_1", "odoo_standby_1", "odoo_acme", "odoo_acme", "secret")
+    
+    assert "odoo_acme" in databases() and "odoo_standby_1" not in databases()
+    assert "odoo_acme" in roles() and "odoo_standby_1" not in roles()
+    assert fetch("postgres", "SELECT pg_get_userbyid(datdba) FROM pg_database WHERE datname = 'odoo_acme'") == [
+        ("odoo_acme",)
+    ]
+
+
+def test_adopt_rolls_back_when_the_name_is_taken(external_db):
+    assert create_external_database("odoo_standby_1", "odoo_standby_1", "standby")
+    assert create_external_database("odoo_acme", "odoo_other", "secret")
+    
+    with pytest.raises(psycopg2.Error):
+        adopt_external_database("odoo_standby_1", "odoo_standby_1", "odoo_acme", "odoo_acme", "secret")
+    
+    assert "odoo_standby_1" in databases()
+    assert "odoo_standby_1" in roles()
+
+
+def test_delete_external_databases(external_db):
+    assert create_external_database("odoo_acme", "odoo_acme", "secret")
+    assert create_external_database("odoo_beta", "odoo_beta", "secret")
+    
+    results = delete_external_databases([("odoo_acme", "odoo_acme"), ("odoo_beta", "odoo_beta"), ("odoo_gone", "odoo_gone")])
+    
+    assert results == {"odoo_acme": True, "odoo_beta": True, "odoo_gone": True}
+    assert not {"odoo_acme", "odoo_beta"} & databases()
+    assert not {"odoo_acme", "odoo_beta"} & roles()
+
+
+def test_replace_external_database_swaps_in_the_staging_copy(external_db):
+    assert create_external_database("odoo_acme", "odoo_acme", "secret")
+    execute("odoo_acme", "CREATE TABLE live (id int)")
+    staging = create_staging_database("odoo_acme", "odoo_acme")
+    execute(staging, "CREATE TABLE restored (id int)")
+    tenant = psycopg2.connect(
+        host=settings.EXTERNAL_DB_HOST, port=settings.EXTERNAL_DB_PORT,
+        user="odoo_acme", password="secret", dbname="odoo_acme"
+    )
+    
+    try:
+        replace_external_database("odoo_acme", staging)
+        
+        # The open session was terminated rather than blocking the rename
+        with pytest.raises(psycopg2.Error):
+            with tenant.cursor() as cursor:
+                cursor.execute("SELECT 1")
+    finally:
+        tenant.close()
+    
+    assert fetch("odoo_acme", "SELECT tablename FROM pg_tables WHERE schemaname = 'public'") == [("restored",)]
+    assert fetch(
+        "postgres", "SELECT pg_get_userbyid(datdba), datallowconn FROM pg_database WHERE datname = 'odoo_acme'"
+    ) == [("odoo_acme", True)]
+    assert databases() == {"postgres", "template0", "template1", "odoo_acme"}
+
+
+def test_failed_replace_leaves_the_live_database_usable(external_db):
+    assert create_external_database("odoo_acme", "odoo_acme", "secret")
+    execute("odoo_acme", "CREATE TABLE live (id int)")
+    
+    with pytest.raises(psycopg2.Error):
+        replace_external_database("odoo_acme", "odoo_acme_restore_gone")
+    
+    assert fetch("odoo_acme", "SELECT tablename FROM pg_tables WHERE schemaname = 'public'") == [("live",)]
+    assert fetch("postgres", "SELECT datallowconn FROM pg_database WHERE datname = 'odoo_acme'") == [(True,)]
@@ -0,0 +1,163 @@
+import hashlib
+import os
+import threading
+import time
+
+import boto3
+import pytest
+from botocore.exceptions import ClientError
+from moto import mock_aws
+
+from backend.core.config import get_settings
+from backend.api.services.s3_transfer import MIN_PART_SIZE, S3MultipartWriter
+
+settings = get_settings()
+
+KEY = "clients/acme/acme_manual.dump"
+
+
+class HookedS3:
+    """The moto client, with hooks on the calls S3MultipartWriter makes"""
+    
+    def __init__(self, s3):
+        self.s3 = s3
+        self.calls = []
+        self.part_delay = {}
+        self.part_gate = threading.Event()
+        self.part_gate.set()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.fail_complete = False
+        self._lock = threading.Lock()
+    
+    def create_multipart_upload(self, **kwargs):
+        self.calls.append("create_multipart_upload")
+        return self.s3.create_multipart_upload(**kwargs)
+    
+    def upload_part(self, **kwargs):
+        with self._lock:
+            self.calls.append("upload_part")
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            self.part_gate.wait()
+            time.sleep(self.part_delay.get(kwargs["PartNumber"], 0))
+            return self.s3.upload_part(**kwargs)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+    
+    def complete_multipart_upload(self, **kwargs):
+        self.calls.append("complete_multipart_upload")
+        if self.fail_complete:
+            raise ClientError({"Error": {"Code": "InternalError", "Message": "boom"}}, "CompleteMultipartUpload")
+        return self.s3.complete_multipart_upload(**kwargs)
+    
+    def abort_multipart_upload(self, **kwargs):
+        self.calls.append("abort_multipart_upload")
+        return self.s3.abort_multipart_upload(**kwargs)
+    
+    def put_object(self, **kwargs):
+        self.calls.append("put_object")
+        return self.s3.put_object(**kwargs)
+
+
+@pytest.fixture
+def s3():
+    with mock_aws():
+        client = boto3.client("s3", region_name=settings.S3_REGION)
+        client.create_bucket(
+            Bucket=settings.S3_BUCKET, CreateBucketConfiguration={"LocationConstraint": settings.S3_REGION}
+        )
+        yield HookedS3(client)
+
+
+def stored(s3) -> bytes:
+    return s3.s3.get_object(Bucket=settings.S3_BUCKET, Key=KEY)["Body"].read()
+
+
+def open_uploads(s3) -> list:
+    return s3.s3.list_multipart_uploads(Bucket=settings.S3_BUCKET).get("Uploads", [])
+
+
+def writer(s3, max_in_flight: int = 4) -> S3MultipartWriter:
+    return S3MultipartWriter(s3, settings.S3_BUCKET, KEY, part_size=MIN_PART_SIZE, max_in_flight=max_in_flight)
+
+
+def test_parts_are_assembled_in_write_order(s3):
+    # Earlier parts finish last, so completion order is the reverse of write order
+    s3.part_delay = {1: 0.3, 2: 0.2, 3: 0.1}
+    data = os.urandom(3 * MIN_PART_SIZE + 1234)
+    
+    with writer(s3) as upload:
+        for i in range(0, len(data), 64 * 1024):
+            upload.write(data[i:i + 64 * 1024])
+    
+    assert stored(s3) == data
+    assert upload.bytes_written == len(data)
+    assert upload.checksum == hashlib.sha256(data).hexdigest()
+    assert s3.calls.count("upload_part") == 4
+    assert open_uploads(s3) == []
+
+
+def test_writes_block_while_max_in_flight_parts_are_outstanding(s3):
+    s3.part_gate.clear()
+    upload = writer(s3, max_in_flight=2)
+    part = os.urandom(MIN_PART_SIZE)
+    third_part_written = threading.Event()
+    
+    def write_parts():
+        upload.write(part)
+        upload.write(part)
+        upload.write(part)
+        third_part_written.set()
+    
+    thread = threading.Thread(target=write_parts)
+    thread.start()
+    
+    assert not third_part_written.wait(0.5)
+    assert s3.calls.count("upload_part") == 2
+    
+    s3.part_gate.set()
+    thread.join(10)
+    upload.close()
+    
+    assert third_part_written.is_set()
+    assert s3.max_in_flight == 2
+    assert stored(s3) == part * 3
+
+
+def test_object_smaller_than_one_part_uses_put_object(s3):
+    with writer(s3) as upload:
+        upload.write(b"small dump")
+    
+    assert stored(s3) == b"small dump"
+    assert s3.calls == ["put_object"]
+    assert upload.checksum == hashlib.sha256(b"small dump").hexdigest()
+
+
+def test_exception_in_the_with_block_aborts_the_upload(s3):
+    with pytest.raises(RuntimeError):
+        with writer(s3) as upload:
+            upload.write(os.urandom(2 * MIN_PART_SIZE))
+            raise RuntimeError("pg_dump died")
+    
+    assert upload.closed
+    assert "abort_multipart_upload" in s3.calls
+    assert "complete_multipart_upload" not in s3.calls
+    assert open_uploads(s3) == []
+    with pytest.raises(ClientError):
+        stored(s3)
+
+
+def test_failed_complete_aborts_the_upload(s3):
+    s3.fail_complete = True
+    upload = writer(s3)
+    upload.write(os.urandom(MIN_PART_SIZE + 10))
+    
+    with pytest.raises(ClientError):
+        upload.close()
+    
+    assert upload.closed
+    assert s3.calls[-1] == "abort_multipart_upload"
+    assert open_uploads(s3) == []
@@ -0,0 +1,74 @@
+import pytest
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.pool import StaticPool
+
+from backend.core.database import Base, upgrade_schema
+from backend.api.models import payment_models  # noqa: F401 - payments table for create_all
+from backend.api.models.models import Backup
+
+# The backups table as the first release created it
+OLD_BACKUPS = """
+CREATE TABLE backups (
+    id INTEGER PRIMARY KEY,
+    client_id INTEGER NOT NULL,
+    client_name VARCHAR(255) NOT NULL,
+    backup_type VARCHAR(50) NOT NULL,
+    filename VARCHAR(255) NOT NULL,
+    size_mb FLOAT,
+    s3_key VARCHAR(500),
+    status VARCHAR(50),
+    error_message TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    completed_at TIMESTAMP
+)
+"""
+
+
+@pytest.fixture(params=["sqlite", "postgresql"])
+def old_install(request):
+    if request.param == "sqlite":
+        engine = create_engine("sqlite://", poolclass=StaticPool)
+    else:
+        server = request.getfixturevalue("external_db")
+        from backend.api.services.external_db import get_admin_pool
+        with get_admin_pool().cursor() as cursor:
+            cursor.execute("CREATE DATABASE control")
+        engine = create_engine(
+            f"postgresql://{server.user}:{server.password or ''}@{server.host}:{server.port}/control"
+        )
+    with engine.begin() as conn:
+        conn.execute(text(OLD_BACKUPS))
+        conn.execute(text(
+            "INSERT INTO backups (id, client_id, client_name, backup_type, filename, status) "
+            "VALUES (1, 1, 'acme', 'manual', 'acme_manual.sql.gz', 'completed')"
+        ))
+    Base.metadata.create_all(bind=engine)
+    try:
+        yield engine
+    finally:
+        engine.dispose()
+
+
+def test_upgrade_adds_missing_columns_and_indexes(old_install):
+    upgrade_schema(old_install)
+    
+    inspector = inspect(old_install)
+    assert {column.name for column in Backup.__table__.columns} <= {
+        column["name"] for column in inspector.get_columns("backups")
+    }
+    assert {"idx_backup_client_created_id", "idx_backup_created_id"} <= {
+        index["name"] for index in inspector.get_indexes("backups")
+    }
+    with old_install.connect() as conn:
+        row = conn.execute(text("SELECT format, encrypted, codec, verify_status FROM backups")).one()
+    # Backups taken before the upgrade were plain pg_dump -Fc archives
+    assert (row.format, bool(row.encrypted), row.codec, row.verify_status) == ("custom", False, None, None)
+
+
+def test_upgrade_is_idempotent(old_install):
+    upgrade_schema(old_install)
+    
+    upgrade_schema(old_install)
+    
+    with old_install.connect() as conn:
+        assert conn.execute(text("SELECT count(*) FROM backups")).scalar() == 1
@@ -1,6 +1,7 @@
 #!/bin/bash
 
 set -e
+set -o pipefail
 
 CLIENT_NAME="${CLIENT_NAME}"
 DB_NAME="${DB_NAME}"
@@ -14,6 +15,8 @@ RETENTION_WEEKLY="${RETENTION_WEEKLY:-4}"
 RETENTION_MONTHLY="${RETENTION_MONTHLY:-3}"
 ENCRYPTION_KEY="${ENCRYPTION_KEY}"
 GPG_RECIPIENT="${GPG_RECIPIENT}"
+BACKUP_CODEC="${BACKUP_CODEC:-zstd}"
+BACKUP_CODEC_LEVEL="${BACKUP_CODEC_LEVEL:-}"
 
 BACKUP_DIR="/backups"
 DATE=$(date +%Y%m%d_%H%M%S)
@@ -48,29 +51,84 @@ wait_for_db() {
     return 1
 }
 
+resolve_codec() {
+    case "${BACKUP_CODEC}" in
+        zstd|lz4)
+            if ! command -v "${BACKUP_CODEC}" > /dev/null 2>&1; then
+                log "${BACKUP_CODEC} not installed, falling back to gzip"
+                BACKUP_CODEC="gzip"
+            fi
+            ;;
+        gzip|none)
+            ;;
+        *)
+            error "Unknown BACKUP_CODEC ${BACKUP_CODEC}"
+            return 1
+            ;;
+    esac
+}
+
+compress() {
+    case "${BACKUP_CODEC}" in
+        zstd) zstd -q -T0 "-${BACKUP_CODEC_LEVEL:-3}" -c ;;
+        lz4) lz4 -q "-${BACKUP_CODEC_LEVEL:-1}" -c ;;
+        gzip)
+            if command -v pigz > /dev/null 2>&1; then
+                pigz "-${BACKUP_CODEC_LEVEL:-6}" -c
+            else
+                gzip "-${BACKUP_CODEC_LEVEL:-6}" -c
+            fi
+            ;;
+        none) cat ;;
+    esac
+}
+
+codec_extension() {
+    case "${BACKUP_CODEC}" in
+        zstd) echo ".zst" ;;
+        lz4) echo ".lz4" ;;
+        gzip) echo ".gz" ;;
+        none) echo "" ;;
+    esac
+}
+
+encrypt() {
+    if [ -n "${ENCRYPTION_KEY}" ]; then
+        # gpg must not compress again; the codec already did
+        gpg --batch --yes --pinentry-mode loopback --compress-algo none \
+            --passphrase-fd 3 -c 3<<< "${ENCRYPTION_KEY}"
+    else
+        cat
+    fi
+}
+
 create_backup() {
     local backup_type="$1"
-    local backup_file="${BACKUP_DIR}/${backup_type}/${CLIENT_NAME}_${backup_type}_${DATE}.sql.gz.enc"
-    local temp_file="${BACKUP_DIR}/${backup_type}/${CLIENT_NAME}_${backup_type}_${DATE}.sql.gz"
+    local suffix="$(codec_extension)"
     
-    log "Starting ${backup_type} backup for ${CLIENT_NAME}"
+    if [ -n "${ENCRYPTION_KEY}" ]; then
+        if ! command -v gpg > /dev/null 2>&1; then
+            error "ENCRYPTION_KEY is set but gpg is not installed"
+            return 1
+        fi
+        suffix="${suffix}.enc"
+    fi
+    
+    local backup_file="${BACKUP_DIR}/${backup_type}/${CLIENT_NAME}_${backup_type}_${DATE}.dump${suffix}"
+    
+    log "Starting ${backup_type} backup for ${CLIENT_NAME} (${BACKUP_CODEC})"
     
-    if pg_dump -h "${DB_HOST}" -U "${DB_USER}" -d "${DB_NAME}" -Fc -f "${temp_file}" 2>/dev/null; then
+    # Dump, compression and encryption run as one pipeline, so the dump is
+    # read once and only the final file is written
+    if pg_dump -h "${DB_HOST}" -U "${DB_USER}" -d "${DB_NAME}" -Fc -Z0 2>/dev/null \
+        | compress | encrypt > "${backup_file}"; then
         log "Database dump created successfully"
     else
         error "Database dump failed"
+        rm -f "${backup_file}"
         return 1
     fi
     
-    if [ -n "${ENCRYPTION_KEY}" ] && command -v gpg > /dev/null 2>&1; then
-        log "Encrypting backup with GPG"
-        echo "${ENCRYPTION_KEY}" | gpg --batch --yes --passphrase-fd 0 -c -o "${backup_file}" "${temp_file}"
-        rm -f "${temp_file}"
-        backup_file="${temp_file}.enc"
-    else
-        mv "${temp_file}" "${backup_file}"
-    fi
-    
     local backup_size=$(du -h "${backup_file}" | cut -f1)
     log "Backup created: ${backup_file} (${backup_size})"
     
@@ -118,7 +176,7 @@ cleanup_old_backups() {
             ;;
     esac
     
-    for file in "${BACKUP_DIR}/${backup_type}"/*.sql.gz.enc; do
+    for file in "${BACKUP_DIR}/${backup_type}/${CLIENT_NAME}_${backup_type}_"*; do
         if [ -f "$file" ]; then
             local filename=$(basename "$file")
             local file_date=$(echo "$filename" | grep -oP '\d{8}_\d{6}')
@@ -139,9 +197,10 @@ main() {
     log "=== Backup process started for ${CLIENT_NAME} ==="
     
     wait_for_db
+    resolve_codec
     
-    create_backup "_old_backups "daily"
-    cleanupdaily" "${RETENTION_DAILY}"
+    create_backup "daily"
+    cleanup_old_backups "daily" "${RETENTION_DAILY}"
     
     if [ "$DAY_OF_WEEK" = "1" ]; then
         create_backup "weekly"